@@ -0,0 +1,170 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+申请人实体消解
+专利权人名称存在大小写、标点、全角/半角和公司后缀等书写差异，同一机构会成为合作研发网络中的多个节点，
+也会在机构分类缓存中占用多个条目（多次调用API）。消解分两步：
+
+    1. 规范键：NFKC（全角转半角）、转小写、标点替换为空白，去掉末尾的公司法律后缀后删除所有空白，
+       规范键相同的名称视为同一实体；
+    2. 模糊匹配：对规范键的字符二元组按全局频率排序建立前缀倒排索引（prefix filtering 分块），
+       只比较共享前缀二元组且长度相近的候选对；Dice 相似度不低于阈值、且较短的键是较长键的子序列
+       （只有漏字/多字，没有替换）的合并（并查集）。
+
+前缀分块保证不遗漏相似度不低于阈值的键对，同时避免两两比较。替换字符的键（如"北京理工大学"/"南京理工大学"）
+多为不同机构，不会被合并；较短的键只做精确匹配。
+每个实体以出现次数最多的原始名称为规范名称，作为 step 1.2 和 step 2 使用的节点名。
+"""
+
+import math
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+APPLICANT_COLUMN = '专利权人'
+DEFAULT_THRESHOLD = 0.9
+MIN_FUZZY_LENGTH = 6
+
+# 公司法律后缀（可连续出现），中文后缀直接去除，英文后缀须为独立的词
+CHINESE_SUFFIX_PATTERN = r'(?:股份有限公司|有限责任公司|有限公司|股份公司|公司)+$'
+ENGLISH_SUFFIX_PATTERN = (r'(?:\s+(?:co|company|corp|corporation|inc|incorporated|ltd|limited|llc|plc|gmbh|ag|sa|kk))+$')
+
+
+def canonical_keys(names: pd.Series) -> pd.Series:
+    """名称的规范键（按列向量化）"""
+    text = names.astype(str).str.normalize('NFKC').str.lower()
+    text = text.str.replace(r'[\W_]+', ' ', regex=True).str.strip()
+    stripped = text.str.replace(ENGLISH_SUFFIX_PATTERN, '', regex=True)
+    stripped = stripped.str.replace(r'\s+', '', regex=True).str.replace(CHINESE_SUFFIX_PATTERN, '', regex=True)
+    # 只有后缀的名称保留原样（去空白）
+    return stripped.where(stripped != '', text.str.replace(r'\s+', '', regex=True))
+
+
+def _bigrams(key: str) -> set:
+    return {key[i:i + 2] for i in range(len(key) - 1)} or {key}
+
+
+def candidate_pairs(keys: list, threshold: float = DEFAULT_THRESHOLD) -> set:
+    """前缀分块：返回可能满足 Dice >= threshold 的键编号对 (i, j)
+
+    Dice >= t 等价于 Jaccard >= t / (2 - t)。按长度从小到大处理，每个键只需把按全局频率排序后
+    最稀有的 |x| - ceil(J|x|) + 1 个二元组写入倒排索引并用它们查询，即可找到所有满足阈值的键对。
+    """
+    grams = [_bigrams(key) for key in keys]
+    frequency = Counter(g for gs in grams for g in gs)
+    jaccard = threshold / (2 - threshold)
+    index = defaultdict(list)
+    pairs = set()
+    for i in sorted(range(len(keys)), key=lambda k: len(grams[k])):
+        size = len(grams[i])
+        ordered = sorted(grams[i], key=lambda g: (frequency[g], g))
+        for g in ordered[:size - math.ceil(jaccard * size) + 1]:
+            for j in index[g]:
+                # 长度过滤：已处理的键不长于当前键
+                if len(grams[j]) >= jaccard * size:
+                    pairs.add((j, i))
+            index[g].append(i)
+    return pairs
+
+
+def dice_similarity(a: str, b: str) -> float:
+    """字符二元组 Dice 相似度"""
+    ga, gb = _bigrams(a), _bigrams(b)
+    return 2 * len(ga & gb) / (len(ga) + len(gb))
+
+
+def is_subsequence(short: str, long: str) -> bool:
+    """short 是否可由 long 删去若干字符得到"""
+    chars = iter(long)
+    return all(c in chars for c in short)
+
+
+def is_match(a: str, b: str, threshold: float = DEFAULT_THRESHOLD) -> bool:
+    """两个规范键是否视为同一实体"""
+    short, long = sorted((a, b), key=len)
+    return dice_similarity(a, b) >= threshold and is_subsequence(short, long)
+
+
+def _find(parent: np.ndarray, i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def resolve_names(names: pd.Series, threshold: float = DEFAULT_THRESHOLD,
+                  min_fuzzy_length: int = MIN_FUZZY_LENGTH) -> pd.DataFrame:
+    """对名称（每次出现一行）做实体消解
+
+    Args:
+        names (Series): 名称，每次出现一行
+        threshold (float): 模糊匹配的 Dice 相似度阈值，大于1时只做规范键精确匹配
+        min_fuzzy_length (int): 参与模糊匹配的规范键最小长度
+
+    Returns:
+        DataFrame: 映射表，列为 原始名称、规范键、实体编号、规范名称、出现次数
+    """
+    counts = names.value_counts(sort=False)
+    mapping = pd.DataFrame({"原始名称": counts.index.astype(str), "出现次数": counts.to_numpy()})
+    mapping["规范键"] = canonical_keys(mapping["原始名称"]).to_numpy()
+
+    keys = pd.unique(mapping["规范键"])
+    parent = np.arange(len(keys))
+    if threshold <= 1:
+        long_keys = [k for k, key in enumerate(keys) if len(key) >= min_fuzzy_length]
+        for a, b in candidate_pairs([keys[k] for k in long_keys], threshold):
+            i, j = long_keys[a], long_keys[b]
+            if is_match(keys[i], keys[j], threshold):
+                ri, rj = _find(parent, i), _find(parent, j)
+                if ri != rj:
+                    parent[max(ri, rj)] = min(ri, rj)
+    roots = np.array([_find(parent, k) for k in range(len(keys))])
+    mapping["cluster"] = roots[pd.Index(keys).get_indexer(mapping["规范键"])]
+
+    # 规范名称：出现次数最多，其次最短，再按字符串排序
+    mapping["长度"] = mapping["原始名称"].str.len()
+    ranked = mapping.sort_values(["cluster", "出现次数", "长度", "原始名称"], ascending=[True, False, True, True])
+    canonical = ranked.drop_duplicates("cluster").set_index("cluster")["原始名称"]
+    mapping["规范名称"] = mapping["cluster"].map(canonical)
+    entity_ids = {name: f"E{k:06d}" for k, name in enumerate(sorted(canonical))}
+    mapping["实体编号"] = mapping["规范名称"].map(entity_ids)
+    return mapping.sort_values(["实体编号", "原始名称"], ignore_index=True)[
+        ["原始名称", "规范键", "实体编号", "规范名称", "出现次数"]]
+
+
+def resolve_applicant_column(series: pd.Series, threshold: float = DEFAULT_THRESHOLD) -> tuple:
+    """对'|'分隔的专利权人列做实体消解，名称替换为规范名称
+
+    拆分方式与 step 2 构建一致（按'|'拆分、去空白、去空项），同一专利内消解后重复的名称只保留第一次出现，
+    缺失值和没有有效名称的记录保持原值。
+
+    Returns:
+        tuple: (消解后的列, 映射表)
+    """
+    items = series.dropna().astype(str).str.split('|').explode().str.strip()
+    items = items[items != '']
+    mapping = resolve_names(items, threshold)
+    canonical = items.map(mapping.set_index("原始名称")["规范名称"])
+
+    resolved = pd.DataFrame({"row": items.index, "name": canonical.to_numpy()}).drop_duplicates(ignore_index=True)
+    joined = resolved.groupby("row", sort=False)["name"].agg('|'.join)
+    result = series.copy()
+    if len(joined):
+        result = result.astype(object)
+        result.loc[joined.index] = joined
+    return result, mapping
+
+
+def load_entity_mapping(mapping_path) -> dict:
+    """读取映射表，返回 {原始名称: 规范名称}"""
+    mapping_df = pd.read_csv(Path(mapping_path), encoding='utf-8', dtype=str, keep_default_na=False)
+    return dict(zip(mapping_df["原始名称"], mapping_df["规范名称"]))
+
+
+def load_entity_ids(mapping_path) -> dict:
+    """读取映射表，返回 {原始名称: 实体编号}（规范名称本身也是原始名称之一）"""
+    mapping_df = pd.read_csv(Path(mapping_path), encoding='utf-8', dtype=str, keep_default_na=False)
+    return dict(zip(mapping_df["原始名称"], mapping_df["实体编号"]))
@@ -0,0 +1,239 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+基于数组的轻量图结构
+以 int32 CSR 存储无向图，节点编号与step 2节点文件行号一致，所有按节点的结果都是以编号为下标的NumPy向量。
+提供流程中用到的操作：度数、邻居、PageRank、自我中心网络和两步路径积，并可与networkx互相转换。
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from graph_store import build_csr, csr_fingerprint, load_graph_store
+
+
+class PowerIterationFailedConvergence(RuntimeError):
+    """PageRank幂迭代未在最大迭代次数内收敛"""
+
+
+class ArrayGraph:
+    """CSR无向图
+
+    Attributes:
+        nodes (ndarray): 节点名，下标即节点编号
+        indptr (ndarray): 行指针（int64）
+        indices (ndarray): 邻居编号（int32，节点数超出范围时为int64）
+        weights (ndarray): 边权重，无权图为 None
+        ordering (tuple): 图存储中的节点重排 (order, indptr, indices, weights)，PageRank在其上迭代
+    """
+
+    __slots__ = ("nodes", "indptr", "indices", "weights", "ordering", "_node_index", "_rows", "_fingerprint")
+
+    def __init__(self, nodes, indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray = None,
+                 fingerprint: str = None, ordering: tuple = None):
+        self.nodes = np.asarray(nodes, dtype=object)
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.ordering = ordering
+        self._node_index = None
+        self._rows = None
+        self._fingerprint = fingerprint
+
+    @classmethod
+    def from_edges(cls, nodes, edges_df: pd.DataFrame, weights: np.ndarray = None) -> "ArrayGraph":
+        """由节点表和含'节点1'、'节点2'列的边表构建，不在节点表中的端点被忽略"""
+        nodes = pd.Series(nodes, dtype=str).to_numpy(dtype=object)
+        node_ids = pd.Index(nodes)
+        src = node_ids.get_indexer(edges_df['节点1'].astype(str))
+        dst = node_ids.get_indexer(edges_df['节点2'].astype(str))
+        valid = (src >= 0) & (dst >= 0)
+        edge_weights = None if weights is None else np.asarray(weights)[valid]
+        indptr, indices, edge_weights = build_csr(len(nodes), src[valid], dst[valid], edge_weights)
+        return cls(nodes, indptr, indices, edge_weights)
+
+    @classmethod
+    def from_store(cls, graph) -> "ArrayGraph":
+        """包装 graph_store.CSRGraph（零拷贝，数组仍为内存映射），带上已保存的节点重排"""
+        return cls(graph.nodes, graph.indptr, graph.indices, graph.weights, graph.meta.get('fingerprint'),
+                   graph.reordered())
+
+    @classmethod
+    def from_networkx(cls, G, weight: str = None) -> "ArrayGraph":
+        """由networkx无向图构建，节点顺序与 G.nodes 一致"""
+        nodes = list(G.nodes)
+        node_ids = {node: i for i, node in enumerate(nodes)}
+        edges = list(G.edges(data=weight, default=1.0)) if weight else list(G.edges())
+        src = np.fromiter((node_ids[e[0]] for e in edges), dtype=np.int64, count=len(edges))
+        dst = np.fromiter((node_ids[e[1]] for e in edges), dtype=np.int64, count=len(edges))
+        weights = np.array([e[2] for e in edges], dtype=np.float64) if weight else None
+        indptr, indices, weights = build_csr(len(nodes), src, dst, weights)
+        return cls(np.array(nodes, dtype=object), indptr, indices, weights)
+
+    def to_networkx(self, weight: str = "weight"):
+        """转换为networkx无向图，供临时分析使用"""
+        import networkx as nx
+
+        G = nx.Graph()
+        G.add_nodes_from(self.nodes)
+        rows = self.rows
+        upper = rows <= self.indices
+        src, dst = self.nodes[rows[upper]], self.nodes[self.indices[upper]]
+        if self.weights is None:
+            G.add_edges_from(zip(src, dst))
+        else:
+            G.add_weighted_edges_from(zip(src, dst, self.weights[upper]), weight=weight)
+        return G
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def n_edges(self) -> int:
+        """无向边数（自环计1）"""
+        self_loops = int(np.count_nonzero(self.rows == self.indices))
+        return (len(self.indices) + self_loops) // 2
+
+    @property
+    def rows(self) -> np.ndarray:
+        """每个CSR条目所在的行号（按需生成并缓存）"""
+        if self._rows is None:
+            self._rows = np.repeat(np.arange(self.n_nodes, dtype=self.indices.dtype), np.diff(self.indptr))
+        return self._rows
+
+    @property
+    def fingerprint(self) -> str:
+        """CSR结构的内容指纹；来自图存储时直接读取写入时计算的值"""
+        if self._fingerprint is None:
+            self._fingerprint = csr_fingerprint(self.indptr, self.indices, self.weights)
+        return self._fingerprint
+
+    @property
+    def degree(self) -> np.ndarray:
+        """每个节点的邻居数（自环计1）"""
+        return np.diff(self.indptr)
+
+    def index_of(self, names) -> np.ndarray:
+        """节点名转编号，不存在的节点为-1"""
+        if self._node_index is None:
+            self._node_index = pd.Index(self.nodes)
+        return self._node_index.get_indexer(pd.Series(names, dtype=str))
+
+    def neighbors(self, i: int) -> np.ndarray:
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def ego(self, i: int, radius: int = 1) -> np.ndarray:
+        """节点 i 的自我中心网络：距离不超过 radius 的节点编号（含 i，升序）"""
+        visited = np.zeros(self.n_nodes, dtype=bool)
+        visited[i] = True
+        frontier = np.array([i])
+        for _ in range(radius):
+            if len(frontier) == 0:
+                break
+            reached = np.concatenate([self.neighbors(j) for j in frontier])
+            frontier = np.unique(reached[~visited[reached]])
+            visited[frontier] = True
+        return np.flatnonzero(visited)
+
+    def transition_row(self, i: int) -> np.ndarray:
+        """节点 i 到各邻居的转移概率 p_ij（无权为 1/deg(i)，有权按权重归一化）"""
+        start, end = self.indptr[i], self.indptr[i + 1]
+        if self.weights is None:
+            return np.full(end - start, 1.0 / max(end - start, 1))
+        w = self.weights[start:end]
+        return w / w.sum() if w.sum() > 0 else np.zeros(end - start)
+
+    def two_hop(self, i: int) -> tuple:
+        """节点 i 经一个中间节点到达各节点的路径积 Σ_{k≠i,j} p_ik p_kj
+
+        Returns:
+            tuple: (节点编号, 路径积)，只含路径积非零的节点，编号升序
+        """
+        targets, products = [], []
+        for k, p_ik in zip(self.neighbors(i), self.transition_row(i)):
+            if k == i:
+                continue
+            nbrs = self.neighbors(k)
+            keep = (nbrs != i) & (nbrs != k)
+            targets.append(nbrs[keep])
+            products.append(p_ik * self.transition_row(k)[keep])
+        if not targets:
+            return np.array([], dtype=self.indices.dtype), np.array([])
+        uniq, inverse = np.unique(np.concatenate(targets), return_inverse=True)
+        return uniq, np.bincount(inverse, weights=np.concatenate(products), minlength=len(uniq))
+
+    def pagerank(self, alpha: float = 0.85, max_iter: int = 100, tol: float = 1e-6,
+                 nstart: np.ndarray = None) -> np.ndarray:
+        """PageRank幂迭代，与 networkx.pagerank 对无向图的定义一致
+
+        孤立节点（悬挂节点）的得分均匀分配给所有节点；收敛判据为 Σ|x - x_prev| < n·tol。
+        nstart 为初始向量（如上次运行的结果，会被归一化），默认均匀分布。
+        带有节点重排时在重排后的CSR上迭代，结果按原编号返回。
+
+        Returns:
+            ndarray: 以节点编号为下标的PageRank向量
+        """
+        n = self.n_nodes
+        if n == 0:
+            return np.array([])
+        if self.ordering is not None:
+            order, indptr, indices, weights = self.ordering
+            ordered = ArrayGraph(self.nodes[order], indptr, indices, weights)
+            start = np.asarray(nstart)[order] if nstart is not None and len(nstart) == n else None
+            x = np.empty(n)
+            x[order] = ordered.pagerank(alpha, max_iter, tol, start)
+            return x
+        if self.weights is None:
+            out_weight = self.degree.astype(np.float64)
+            entry_weight = None
+        else:
+            out_weight = np.bincount(self.rows, weights=self.weights, minlength=n)
+            entry_weight = np.asarray(self.weights, dtype=np.float64)
+        dangling = out_weight == 0
+        inv_out = np.divide(1.0, out_weight, where=~dangling, out=np.zeros(n))
+        rows = self.rows
+
+        if nstart is not None and len(nstart) == n and np.sum(nstart) > 0:
+            x = np.asarray(nstart, dtype=np.float64) / np.sum(nstart)
+        else:
+            x = np.full(n, 1.0 / n)
+        for _ in range(max_iter):
+            x_last = x
+            # 无向图邻接对称：y_i = Σ_{j∈N(i)} x_j·w_ji / out_j
+            share = (x_last * inv_out)[self.indices]
+            if entry_weight is not None:
+                share = share * entry_weight
+            x = alpha * np.bincount(rows, weights=share, minlength=n)
+            x += (alpha * x_last[dangling].sum() + 1 - alpha) / n
+            if np.abs(x - x_last).sum() < n * tol:
+                return x
+        raise PowerIterationFailedConvergence(f"PageRank在{max_iter}次迭代内未收敛")
+
+
+def load_array_graph(input_dir, name: str) -> ArrayGraph:
+    """加载step 2输出的网络：优先内存映射CSR图存储，不存在或已过期时读取CSV
+
+    Args:
+        input_dir (str/Path): step2输出目录
+        name (str): 网络名，如 knowledge、knowledge-technology
+
+    Returns:
+        ArrayGraph: 图
+    """
+    input_dir = Path(input_dir)
+    nodes_path = input_dir / f"{name}_network_nodes.csv"
+    edges_path = input_dir / f"{name}_network_edges.csv"
+
+    graph = load_graph_store(input_dir, name, edges_path=edges_path)
+    if graph is not None:
+        return ArrayGraph.from_store(graph)
+
+    if not nodes_path.exists() or not edges_path.exists():
+        raise FileNotFoundError(f"网络文件不存在：{nodes_path} 或 {edges_path}")
+    nodes = pd.read_csv(nodes_path, encoding='utf-8')['节点'].astype(str).unique()
+    edges = pd.read_csv(edges_path, encoding='utf-8')
+    return ArrayGraph.from_edges(nodes, edges)
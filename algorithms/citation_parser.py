@@ -0,0 +1,125 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+引文解析
+用 pandas 字符串操作按列向量化解析引文字段：一次预编译正则去除括号内容，按"|"拆分后 explode，
+得到有向引用边（施引专利 -> 被引专利）：
+    引文专利公开号：本专利引用的专利，即 本专利 -> 引文专利
+    施引专利公开号：引用本专利的专利，即 施引专利 -> 本专利
+
+知识网络的无向边由有向边两端排序去重得到，与逐行解析的结果一致。
+有向边保存为 knowledge_network_citations.csv，后续步骤由 load_citation_graph 得到出/入邻接，无需重新解析。
+"""
+
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from inter_layer_index import directed_csr
+
+KEY_COLUMN = '公开（公告）号'
+CITED_COLUMN = '引文专利公开号'
+CITING_COLUMN = '施引专利公开号'
+
+# 去除半角/全角括号及其内容
+CLEAN_PATTERN = re.compile(r"\(.*?\)|（.*?）")
+
+
+def clean_column(series: pd.Series) -> pd.Series:
+    """整列清洗：缺失值为空串，去除括号内容并去掉首尾空白"""
+    return series.fillna('').astype(str).str.replace(CLEAN_PATTERN, '', regex=True).str.strip()
+
+
+def explode_column(series: pd.Series) -> pd.Series:
+    """清洗后按"|"拆分为一项一行（索引为原记录的行索引），去掉空项"""
+    items = clean_column(series).str.split('|').explode().str.strip()
+    return items[items.notna() & (items != '')]
+
+
+def citation_edges(df: pd.DataFrame) -> pd.DataFrame:
+    """有向引用边（含重复），列为 施引专利、被引专利"""
+    patents = clean_column(df[KEY_COLUMN])
+    cited = explode_column(df[CITED_COLUMN])
+    citing = explode_column(df[CITING_COLUMN])
+    return pd.concat([
+        pd.DataFrame({'施引专利': patents.loc[cited.index].to_numpy(), '被引专利': cited.to_numpy()}),
+        pd.DataFrame({'施引专利': citing.to_numpy(), '被引专利': patents.loc[citing.index].to_numpy()}),
+    ], ignore_index=True)
+
+
+def knowledge_network_tables(df: pd.DataFrame) -> tuple:
+    """由专利记录得到知识网络的节点表、无向边表和有向引用边表（均已排序去重）
+
+    Returns:
+        tuple: (nodes_df, edges_df, citations_df)
+    """
+    directed = citation_edges(df)
+    source = directed['施引专利'].to_numpy(dtype=object)
+    target = directed['被引专利'].to_numpy(dtype=object)
+    # 无向边：两端按字符串大小排序
+    swap = source > target
+    edges_df = pd.DataFrame({
+        '节点1': np.where(swap, target, source),
+        '节点2': np.where(swap, source, target),
+    }).drop_duplicates().sort_values(['节点1', '节点2'], ignore_index=True)
+    citations_df = directed.drop_duplicates().sort_values(['施引专利', '被引专利'], ignore_index=True)
+
+    nodes = pd.unique(np.concatenate([clean_column(df[KEY_COLUMN]).to_numpy(dtype=object), source, target]))
+    nodes_df = pd.DataFrame(sorted(nodes), columns=['节点'])
+    return nodes_df, edges_df, citations_df
+
+
+class CitationGraph:
+    """知识网络的有向引用图：出邻接（引用的专利）和入邻接（施引专利）两份CSR
+
+    Attributes:
+        nodes (Index): 节点名，顺序同知识网络节点文件
+        out_indptr, out_indices (ndarray): 节点 -> 其引用的专利
+        in_indptr, in_indices (ndarray): 节点 -> 引用它的专利
+    """
+
+    def __init__(self, nodes, citations_df: pd.DataFrame):
+        self.nodes = pd.Index(pd.Series(nodes).astype(str))
+        source = self.nodes.get_indexer(citations_df['施引专利'].astype(str))
+        target = self.nodes.get_indexer(citations_df['被引专利'].astype(str))
+        valid = (source >= 0) & (target >= 0)
+        source, target = source[valid], target[valid]
+        n = len(self.nodes)
+        self.out_indptr, self.out_indices = directed_csr(n, n, source, target)
+        self.in_indptr, self.in_indices = directed_csr(n, n, target, source)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.out_indptr)
+
+    @property
+    def in_degree(self) -> np.ndarray:
+        return np.diff(self.in_indptr)
+
+    def successors(self, i: int) -> np.ndarray:
+        """节点 i 引用的专利编号"""
+        return self.out_indices[self.out_indptr[i]:self.out_indptr[i + 1]]
+
+    def predecessors(self, i: int) -> np.ndarray:
+        """引用节点 i 的专利编号"""
+        return self.in_indices[self.in_indptr[i]:self.in_indptr[i + 1]]
+
+
+def load_citation_graph(step2_dir) -> CitationGraph:
+    """读取step 2保存的知识网络节点和有向引用边，构建出/入邻接"""
+    step2_dir = Path(step2_dir)
+    nodes_path = step2_dir / 'knowledge_network_nodes.csv'
+    citations_path = step2_dir / 'knowledge_network_citations.csv'
+    for path in (nodes_path, citations_path):
+        if not path.exists():
+            raise FileNotFoundError(f"文件不存在：{path}")
+    nodes = pd.read_csv(nodes_path, encoding='utf-8', dtype={'节点': str}, keep_default_na=False)['节点']
+    citations_df = pd.read_csv(citations_path, encoding='utf-8', dtype=str, keep_default_na=False)
+    return CitationGraph(nodes.unique(), citations_df)
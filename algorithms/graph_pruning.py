@@ -0,0 +1,136 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+剪枝与k-核约简
+知识网络包含所有引文和施引专利（包括数据集以外的专利），其中大多数是度为1的叶节点。
+在昂贵的指标（step 4.1 限制度的 n×n 稠密矩阵）之前先把网络约简为核心，剪除的节点用闭式值回填：
+
+    leaf        剪除度为1的叶节点（唯一邻居不是自身）。叶节点的限制度恰为1；
+                它对邻居 j 的限制度只贡献 p_jl² = 1/deg(j)²，也不出现在任何间接项中，因此核心的结果可精确修正
+    kcore:k     只保留 k-核（不计自环的度数逐轮剥离到不小于k）
+    external    知识网络中剪除数据集以外的专利（与技术层、合作研发层都没有层间边的节点），其他网络层不适用
+
+多个规则用逗号组合，如 "leaf,external"。度为0的孤立节点总是剪除（限制度为0）。
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+from inter_layer_index import load_inter_layer_index
+from jit_support import jit
+
+PRUNE_RULES = ("leaf", "kcore", "external")
+
+
+def parse_prune_rules(spec) -> dict:
+    """解析剪枝规则，如 "leaf,kcore:3" -> {"leaf": True, "kcore": 3}
+
+    Args:
+        spec (str/list/None): 逗号分隔的规则字符串或规则列表
+
+    Returns:
+        dict: 规则名 -> 参数（k-核为整数k，其余为True）
+    """
+    if not spec:
+        return {}
+    items = spec.split(',') if isinstance(spec, str) else list(spec)
+    rules = {}
+    for item in items:
+        name, _, value = item.strip().partition(':')
+        if name not in PRUNE_RULES:
+            raise ValueError(f"未知的剪枝规则：{name}，可选：{', '.join(PRUNE_RULES)}")
+        if name == "kcore":
+            if not value.isdigit() or int(value) < 1:
+                raise ValueError(f"k-核规则需指定正整数k，如 kcore:2，实际为：{item}")
+            rules[name] = int(value)
+        else:
+            rules[name] = True
+    return rules
+
+
+def leaf_mask(indptr: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """度为1且唯一邻居不是自身的节点"""
+    degree = np.diff(indptr)
+    mask = degree == 1
+    ids = np.flatnonzero(mask)
+    mask[ids[indices[indptr[ids]] == ids]] = False
+    return mask
+
+
+@jit(nopython=True)
+def kcore_mask(indptr: np.ndarray, indices: np.ndarray, k: int) -> np.ndarray:
+    """k-核成员：反复剥离不计自环的度数小于k的节点"""
+    n = indptr.shape[0] - 1
+    degree = np.zeros(n, dtype=np.int64)
+    for i in range(n):
+        for a in range(indptr[i], indptr[i + 1]):
+            if indices[a] != i:
+                degree[i] += 1
+    alive = np.ones(n, dtype=np.bool_)
+    stack = np.empty(n, dtype=np.int64)
+    top = 0
+    for i in range(n):
+        if degree[i] < k:
+            alive[i] = False
+            stack[top] = i
+            top += 1
+    while top > 0:
+        top -= 1
+        i = stack[top]
+        for a in range(indptr[i], indptr[i + 1]):
+            j = indices[a]
+            if j != i and alive[j]:
+                degree[j] -= 1
+                if degree[j] < k:
+                    alive[j] = False
+                    stack[top] = j
+                    top += 1
+    return alive
+
+
+def internal_mask(step2_dir, n_nodes: int) -> np.ndarray:
+    """知识网络中属于数据集的专利：与技术层或合作研发层有层间边（数据集以外的专利没有IPC和专利权人）"""
+    mask = np.zeros(n_nodes, dtype=bool)
+    for dst_layer in ("technology", "collaborative_R&D"):
+        index = load_inter_layer_index(Path(step2_dir), "knowledge", dst_layer)
+        if index.n_src != n_nodes:
+            raise ValueError(f"层间邻居索引与知识网络节点数不一致：{index.n_src} != {n_nodes}")
+        mask |= index.degree > 0
+    return mask
+
+
+def core_mask(indptr: np.ndarray, indices: np.ndarray, rules: dict, internal: np.ndarray = None) -> np.ndarray:
+    """按规则得到保留的核心节点
+
+    Args:
+        indptr, indices (ndarray): 无向图的CSR邻接
+        rules (dict): parse_prune_rules 的结果
+        internal (ndarray): external 规则使用的数据集内节点掩码，为None时不应用该规则
+    """
+    keep = np.diff(indptr) > 0
+    if rules.get("leaf"):
+        keep &= ~leaf_mask(indptr, indices)
+    if "kcore" in rules:
+        keep &= kcore_mask(indptr, indices, rules["kcore"])
+    if rules.get("external") and internal is not None:
+        keep &= internal
+    return keep
+
+
+def induced_csr(indptr: np.ndarray, indices: np.ndarray, keep: np.ndarray) -> tuple:
+    """保留节点的诱导子图，节点按原编号顺序重新编号
+
+    Returns:
+        tuple: (indptr, indices)
+    """
+    new_ids = np.full(len(keep), -1, dtype=np.int64)
+    new_ids[keep] = np.arange(int(keep.sum()))
+    rows = np.repeat(np.arange(len(keep)), np.diff(indptr))
+    valid = keep[rows] & keep[indices]
+    sub_rows, sub_cols = new_ids[rows[valid]], new_ids[indices[valid]]
+    sub_indptr = np.zeros(int(keep.sum()) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sub_rows, minlength=len(sub_indptr) - 1), out=sub_indptr[1:])
+    # 原CSR按行有序，筛选后仍按行有序
+    return sub_indptr, sub_cols.astype(indices.dtype)
@@ -0,0 +1,385 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+二进制CSR图存储
+step 2 在写出节点/边CSV的同时，把每个网络层和层间耦合网络保存为CSR结构：
+
+    {output_dir}/csr/{name}_network/
+        indptr.npy        int64，长度 n+1
+        indices.npy       int32/int64，长度 2E（无向图双向存储，自环只记一次）
+        weights.npy       float64，可选，与 indices 对齐
+        node_offsets.npy  int64，长度 n+1，节点名在 node_bytes 中的字节区间
+        node_bytes.npy    uint8，UTF-8 编码的节点名拼接
+        meta.json         规模信息及对应边CSV的大小/修改时间（用于判断是否过期）
+        order.npy         int64，可选，节点重排置换（见 node_ordering），以及重排后的
+                          ordered_indptr.npy / ordered_indices.npy / ordered_weights.npy
+
+节点编号与节点CSV的行号一致。所有数组以 np.load(mmap_mode='r') 零拷贝打开，
+多个工作进程可同时映射同一个图而不复制数据。
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+STORE_VERSION = 1
+ORDER_FILES = ('order', 'ordered_indptr', 'ordered_indices', 'ordered_weights')
+
+
+def graph_store_dir(base_dir, name: str) -> Path:
+    """图存储目录：{base_dir}/csr/{name}_network"""
+    return Path(base_dir) / 'csr' / f'{name}_network'
+
+
+def build_csr(n: int, src: np.ndarray, dst: np.ndarray, weights: np.ndarray = None) -> tuple:
+    """由边端点编号构建无向CSR结构
+
+    双向展开后按 (行, 列) 去重，重复边保留首次出现的权重；自环只记一次。
+
+    Returns:
+        tuple: (indptr, indices, weights)，无权重时 weights 为 None
+    """
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    rows = np.concatenate([src, dst])
+    cols = np.concatenate([dst, src])
+    keys, first = np.unique(rows * n + cols, return_index=True)
+    rows, cols = keys // n, keys % n
+
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    index_dtype = np.int32 if n < np.iinfo(np.int32).max else np.int64
+    indices = cols.astype(index_dtype)
+    if weights is not None:
+        weights = np.concatenate([weights, weights]).astype(np.float64)[first]
+    return indptr, indices, weights
+
+
+def csr_fingerprint(indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray = None) -> str:
+    """CSR结构的内容指纹（blake2b），结构或权重任一变化指纹即不同"""
+    digest = hashlib.blake2b(digest_size=16)
+    for array in (indptr, indices, weights):
+        if array is None:
+            digest.update(b'none')
+            continue
+        array = np.ascontiguousarray(array)
+        digest.update(f'{array.dtype.str}{array.shape}'.encode())
+        digest.update(memoryview(array).cast('B'))
+    return digest.hexdigest()
+
+
+def _encode_nodes(nodes) -> tuple:
+    encoded = [str(node).encode('utf-8') for node in nodes]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+def file_signature(path: Path) -> dict:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def write_graph_store(output_dir, name: str, nodes, edges_df: pd.DataFrame,
+                      weights: np.ndarray = None, edges_path=None) -> Path:
+    """将一个网络写为CSR图存储
+
+    Args:
+        output_dir (str/Path): step2输出目录
+        name (str): 网络名，如 knowledge、knowledge-technology
+        nodes (list/Series): 节点名，顺序即节点编号
+        edges_df (DataFrame): 含'节点1'、'节点2'列的边表
+        weights (ndarray): 与边表对齐的边权重，可选
+        edges_path (str/Path): 对应的边CSV，记录其签名用于过期判断
+
+    Returns:
+        Path: 图存储目录
+    """
+    node_ids = pd.Index(pd.Series(nodes, dtype=str))
+    src = node_ids.get_indexer(edges_df['节点1'].astype(str))
+    dst = node_ids.get_indexer(edges_df['节点2'].astype(str))
+    valid = (src >= 0) & (dst >= 0)
+    edge_weights = None if weights is None else np.asarray(weights)[valid]
+    return write_graph_store_from_ids(output_dir, name, node_ids, src[valid], dst[valid], edge_weights, edges_path)
+
+
+def write_graph_store_from_ids(output_dir, name: str, nodes, src: np.ndarray, dst: np.ndarray,
+                               weights: np.ndarray = None, edges_path=None) -> Path:
+    """由边端点编号写出CSR图存储（端点已按 nodes 的顺序编号）
+
+    Returns:
+        Path: 图存储目录
+    """
+    store_dir = _begin_store(output_dir, name)
+    node_ids = pd.Index(pd.Series(nodes, dtype=str))
+    indptr, indices, edge_weights = build_csr(len(node_ids), src, dst, weights)
+
+    np.save(store_dir / 'indices.npy', indices)
+    self_loops = int(np.count_nonzero(indices == np.repeat(np.arange(len(node_ids)), np.diff(indptr))))
+    return _finish_store(store_dir, name, node_ids, indptr, indices, edge_weights, edges_path, self_loops)
+
+
+def patch_graph_store(output_dir, name: str, new_nodes, src: np.ndarray, dst: np.ndarray, edges_path=None) -> Path:
+    """在已有的无权CSR图存储上追加节点和边（增量导入），不读取边CSV、不重新排序已有条目
+
+    新节点的编号接在已有节点之后；src/dst 为新增边的端点编号，须是存储中尚不存在的边。
+    每个新条目在所在行内二分查找插入位置，已有条目整体平移一次。
+
+    Args:
+        output_dir (str/Path): step2输出目录
+        name (str): 网络名
+        new_nodes (list/ndarray): 新节点名，依次编号为 n, n+1, ...
+        src (ndarray): 新增边的端点编号
+        dst (ndarray): 新增边的另一端点编号
+        edges_path (str/Path): 对应的边CSV，记录其签名用于过期判断
+
+    Returns:
+        Path: 图存储目录
+    """
+    graph = load_graph_store(output_dir, name, mmap=True)
+    if graph is None or graph.meta['weighted']:
+        raise ValueError(f"[{name}]图存储不存在或带有权重，无法追加")
+    n_old = graph.n_nodes
+    n = n_old + len(new_nodes)
+    self_loops = 2 * graph.n_edges - len(graph.indices)
+
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    mirror = src != dst
+    rows = np.concatenate([src, dst[mirror]])
+    cols = np.concatenate([dst, src[mirror]])
+    order = np.lexsort((cols, rows))
+    rows, cols = rows[order], cols[order]
+
+    # 插入位置：所在行内列号小于新列号的已有条目之后（新节点的行为空，位于末尾）
+    old_indptr = np.asarray(graph.indptr)
+    positions = np.empty(len(rows), dtype=np.int64)
+    for a, (r, c) in enumerate(zip(rows, cols)):
+        if r < n_old:
+            start, end = old_indptr[r], old_indptr[r + 1]
+            positions[a] = start + np.searchsorted(graph.indices[start:end], c)
+        else:
+            positions[a] = old_indptr[-1]
+    index_dtype = np.int32 if n < np.iinfo(np.int32).max else np.int64
+    indices = np.insert(np.asarray(graph.indices, dtype=index_dtype), positions, cols.astype(index_dtype))
+
+    indptr = np.concatenate([old_indptr, np.full(len(new_nodes), old_indptr[-1])])
+    indptr[1:] += np.cumsum(np.bincount(rows, minlength=n))
+    new_offsets, new_bytes = _encode_nodes(new_nodes)
+    node_offsets = np.concatenate([graph._node_offsets, graph._node_offsets[-1] + new_offsets[1:]])
+    node_bytes = np.concatenate([graph._node_bytes, new_bytes])
+    self_loops += int(np.count_nonzero(~mirror))
+    # 释放对旧数组的内存映射后再覆盖文件
+    del graph, old_indptr
+
+    store_dir = _begin_store(output_dir, name)
+    np.save(store_dir / 'indices.npy', indices)
+    return _finish_store(store_dir, name, None, indptr, indices, None, edges_path, self_loops,
+                         encoded_nodes=(node_offsets, node_bytes))
+
+
+def write_graph_store_from_blocks(output_dir, name: str, nodes, key_blocks, edges_path=None) -> Path:
+    """由分块的有序边键流式写出CSR图存储，不在内存中展开全部边
+
+    边键为 小编号*n + 大编号，整体严格递增（已去重）。分两遍读取：第一遍统计度数得到行指针，
+    第二遍按键序把两个方向的条目依次填入内存映射的 indices.npy。键序下每行先收到编号较小的邻居，
+    因此各行列索引天然有序，结果与 build_csr 相同。
+
+    Args:
+        output_dir (str/Path): step2输出目录
+        name (str): 网络名
+        nodes (list/ndarray): 节点名，顺序即节点编号
+        key_blocks (callable): 每次调用返回一个 int64 边键分块的迭代器
+        edges_path (str/Path): 对应的边CSV，记录其签名用于过期判断
+
+    Returns:
+        Path: 图存储目录
+    """
+    node_ids = pd.Index(pd.Series(nodes, dtype=str))
+    n = len(node_ids)
+    degree = np.zeros(n, dtype=np.int64)
+    self_loops = 0
+    for keys in key_blocks():
+        lo, hi = np.divmod(keys, n)
+        loop = lo == hi
+        degree += np.bincount(lo, minlength=n) + np.bincount(hi[~loop], minlength=n)
+        self_loops += int(np.count_nonzero(loop))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(degree, out=indptr[1:])
+
+    store_dir = _begin_store(output_dir, name)
+    index_dtype = np.int32 if n < np.iinfo(np.int32).max else np.int64
+    indices = np.lib.format.open_memmap(store_dir / 'indices.npy', mode='w+', dtype=index_dtype,
+                                        shape=(int(indptr[-1]),))
+    cursor = indptr[:-1].copy()
+    for keys in key_blocks():
+        lo, hi = np.divmod(keys, n)
+        mirror = lo != hi
+        rows = np.concatenate([lo, hi[mirror]])
+        cols = np.concatenate([hi, lo[mirror]])
+        arrival = np.concatenate([np.arange(len(keys)), np.flatnonzero(mirror)])
+        order = np.lexsort((arrival, rows))
+        rows, cols = rows[order], cols[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows, side='left')
+        indices[cursor[rows] + rank] = cols
+        cursor += np.bincount(rows, minlength=n)
+    indices.flush()
+    del indices
+
+    indices = np.load(store_dir / 'indices.npy', mmap_mode='r')
+    return _finish_store(store_dir, name, node_ids, indptr, indices, None, edges_path, self_loops)
+
+
+def _begin_store(output_dir, name: str) -> Path:
+    store_dir = graph_store_dir(output_dir, name)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    # 先删除元数据，写入中断时存储被视为不存在
+    (store_dir / 'meta.json').unlink(missing_ok=True)
+    for array_name in ORDER_FILES:
+        (store_dir / f'{array_name}.npy').unlink(missing_ok=True)
+    return store_dir
+
+
+def _finish_store(store_dir: Path, name: str, node_ids: pd.Index, indptr: np.ndarray, indices: np.ndarray,
+                  edge_weights: np.ndarray, edges_path, self_loops: int, encoded_nodes: tuple = None) -> Path:
+    """写出 indices 以外的数组和元数据（元数据最后写入）；encoded_nodes 为已编码的节点名时不再编码 node_ids"""
+    node_offsets, node_bytes = encoded_nodes if encoded_nodes is not None else _encode_nodes(node_ids)
+    np.save(store_dir / 'indptr.npy', indptr)
+    np.save(store_dir / 'node_offsets.npy', node_offsets)
+    np.save(store_dir / 'node_bytes.npy', node_bytes)
+    if edge_weights is not None:
+        np.save(store_dir / 'weights.npy', edge_weights)
+    else:
+        (store_dir / 'weights.npy').unlink(missing_ok=True)
+
+    meta = {
+        "version": STORE_VERSION,
+        "name": name,
+        "n_nodes": len(indptr) - 1,
+        "n_entries": len(indices),
+        "n_edges": (len(indices) + self_loops) // 2,
+        "weighted": edge_weights is not None,
+        "fingerprint": csr_fingerprint(indptr, indices, edge_weights),
+        "edges_csv": file_signature(Path(edges_path)) if edges_path else None,
+    }
+    with open(store_dir / 'meta.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return store_dir
+
+
+class CSRGraph:
+    """内存映射的CSR图
+
+    Attributes:
+        indptr (ndarray): 行指针
+        indices (ndarray): 邻居编号
+        weights (ndarray): 边权重，无权图为 None
+        meta (dict): 元数据
+    """
+
+    def __init__(self, store_dir: Path, mmap: bool = True):
+        self.store_dir = Path(store_dir)
+        self.mmap = mmap
+        with open(self.store_dir / 'meta.json', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.indptr = self._load('indptr')
+        self.indices = self._load('indices')
+        self.weights = self._load('weights') if self.meta['weighted'] else None
+        self._node_offsets = self._load('node_offsets')
+        self._node_bytes = self._load('node_bytes')
+        self._nodes = None
+
+    def _load(self, name: str) -> np.ndarray:
+        # np.asarray 去掉memmap子类（不复制），便于直接传给numba内核
+        path = self.store_dir / f'{name}.npy'
+        array = np.load(path, mmap_mode='r' if self.mmap else None)
+        return np.asarray(array)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def n_edges(self) -> int:
+        return self.meta['n_edges']
+
+    @property
+    def degree(self) -> np.ndarray:
+        """每个节点的邻居数（自环计1）"""
+        return np.diff(self.indptr)
+
+    @property
+    def nodes(self) -> np.ndarray:
+        """节点名数组（首次访问时解码）"""
+        if self._nodes is None:
+            blob = self._node_bytes.tobytes()
+            offsets = self._node_offsets
+            self._nodes = np.array(
+                [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(self.n_nodes)],
+                dtype=object
+            )
+        return self._nodes
+
+    def neighbors(self, i: int) -> np.ndarray:
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    @property
+    def ordering(self) -> str:
+        """节点重排方式，未重排或重排已过期时为 None"""
+        ordering = self.meta.get('ordering')
+        if not ordering or ordering.get('fingerprint') != self.meta.get('fingerprint'):
+            return None
+        return ordering['method']
+
+    def reordered(self):
+        """重排后的CSR
+
+        Returns:
+            tuple: (order, indptr, indices, weights)，重排后的第 k 个节点为原编号 order[k]；未重排时返回 None
+        """
+        if self.ordering is None:
+            return None
+        weights = self._load('ordered_weights') if self.meta['weighted'] else None
+        return self._load('order'), self._load('ordered_indptr'), self._load('ordered_indices'), weights
+
+    def record_ordering(self, method: str) -> None:
+        """在元数据中登记已写出的重排数组（以当前CSR指纹为准，图存储重写后自动失效）"""
+        fingerprint = self.meta.setdefault('fingerprint', csr_fingerprint(self.indptr, self.indices, self.weights))
+        self.meta['ordering'] = {"method": method, "fingerprint": fingerprint}
+        with open(self.store_dir / 'meta.json', 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+
+    def index_of(self, names) -> np.ndarray:
+        """节点名转编号，不存在的节点为-1"""
+        return pd.Index(self.nodes).get_indexer(pd.Series(names, dtype=str))
+
+
+def load_graph_store(base_dir, name: str, mmap: bool = True, edges_path=None):
+    """打开CSR图存储
+
+    Args:
+        base_dir (str/Path): step2输出目录
+        name (str): 网络名
+        mmap (bool): 是否以内存映射方式打开
+        edges_path (str/Path): 对应的边CSV；给定时若其大小或修改时间与写入时不一致则视为过期
+
+    Returns:
+        CSRGraph: 图；存储不存在、版本不符或已过期时返回 None
+    """
+    store_dir = graph_store_dir(base_dir, name)
+    meta_path = store_dir / 'meta.json'
+    if not meta_path.exists():
+        return None
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('version') != STORE_VERSION:
+        return None
+    if edges_path is not None:
+        edges_path = Path(edges_path)
+        if not edges_path.exists() or meta.get('edges_csv') != file_signature(edges_path):
+            return None
+    return CSRGraph(store_dir, mmap=mmap)
@@ -0,0 +1,334 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+超图（关联矩阵）表示
+技术网络和合作研发网络是 专利->IPC分类 / 专利->专利权人 隶属关系的团投影，边数随每条专利的元素数平方增长。
+超图模式只保存隶属关系的关联矩阵 B（每条专利一条超边）：
+
+    {output_dir}/incidence/{name}_network/
+        patent_ptr.npy   int64，长度 超边数+1
+        members.npy      int32/int64，各超边的成员节点编号（超边内去重、升序）
+        self_loop.npy    bool，长度 n，节点是否在某条专利中重复出现（团投影中的自环）
+        meta.json        规模信息及节点CSV签名（用于判断是否过期）
+
+投影图的邻居 N(i) = ∪_{p∋i} members(p) \\ {i}（有自环时含 i），即 B·Bᵀ 的非零模式。
+度数（step 5.1）和结构洞限制度（step 4.1）按需逐行展开 B·Bᵀ 计算：用标记数组对每个节点的邻居去重，
+结果与团投影图上的计算一致，但不生成投影边，内存只与关联矩阵大小成正比。
+PageRank（step 3）每次迭代只做两次关联矩阵乘积 B(Bᵀz)，代价与隶属关系数成正比；
+B·Bᵀ 相对0/1邻接多计的对角项（所在专利数与自环之差）和重复共现的节点对只在首次迭代前展开一次，逐次迭代减去。
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from array_graph import PowerIterationFailedConvergence, load_array_graph
+from graph_store import file_signature, csr_fingerprint
+from jit_support import jit
+
+INCIDENCE_VERSION = 1
+
+
+def incidence_store_dir(base_dir, name: str) -> Path:
+    """关联矩阵存储目录：{base_dir}/incidence/{name}_network"""
+    return Path(base_dir) / 'incidence' / f'{name}_network'
+
+
+def build_incidence(series: pd.Series) -> tuple:
+    """由'|'分隔的隶属列构建关联矩阵
+
+    节点与团投影构建一致：str(值)按'|'拆分、去空白、去空项，按字符串排序编号。
+
+    Returns:
+        tuple: (节点名数组, patent_ptr, members, self_loop)
+    """
+    items = series.astype(str).str.split('|').explode().str.strip()
+    items = items[items != '']
+    nodes = np.array(sorted(set(items)), dtype=object)
+    n = len(nodes)
+    ids = pd.Index(nodes).get_indexer(items.to_numpy()).astype(np.int64)
+    patents = pd.factorize(items.index)[0].astype(np.int64)
+
+    keys, counts = np.unique(patents * n + ids, return_counts=True)
+    self_loop = np.zeros(n, dtype=bool)
+    self_loop[keys[counts > 1] % n] = True
+    patent_ids = keys // n if n else keys
+    patent_ptr = np.zeros(int(patents.max()) + 2 if len(patents) else 1, dtype=np.int64)
+    np.cumsum(np.bincount(patent_ids, minlength=len(patent_ptr) - 1), out=patent_ptr[1:])
+    index_dtype = np.int32 if n < np.iinfo(np.int32).max else np.int64
+    members = (keys % n if n else keys).astype(index_dtype)
+    return nodes, patent_ptr, members, self_loop
+
+
+def write_incidence_store(output_dir, name: str, patent_ptr: np.ndarray, members: np.ndarray,
+                          self_loop: np.ndarray, nodes_path) -> Path:
+    """写出关联矩阵存储（元数据最后写入）"""
+    store_dir = incidence_store_dir(output_dir, name)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    (store_dir / 'meta.json').unlink(missing_ok=True)
+    np.save(store_dir / 'patent_ptr.npy', patent_ptr)
+    np.save(store_dir / 'members.npy', members)
+    np.save(store_dir / 'self_loop.npy', self_loop)
+    meta = {
+        "version": INCIDENCE_VERSION,
+        "name": name,
+        "n_nodes": len(self_loop),
+        "n_patents": len(patent_ptr) - 1,
+        "n_members": len(members),
+        "nodes_csv": file_signature(Path(nodes_path)),
+    }
+    with open(store_dir / 'meta.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return store_dir
+
+
+@jit(nopython=True)
+def _collect_neighbors(i, node_ptr, node_patents, patent_ptr, members, self_loop, mark, stamp, out):
+    """把投影图中 i 的邻居写入 out，返回邻居数；mark 中等于 stamp 的节点视为已收集"""
+    count = 0
+    mark[i] = stamp
+    if self_loop[i]:
+        out[count] = i
+        count += 1
+    for a in range(node_ptr[i], node_ptr[i + 1]):
+        p = node_patents[a]
+        for b in range(patent_ptr[p], patent_ptr[p + 1]):
+            j = members[b]
+            if mark[j] != stamp:
+                mark[j] = stamp
+                out[count] = j
+                count += 1
+    return count
+
+
+@jit(nopython=True)
+def projection_degree(node_ptr, node_patents, patent_ptr, members, self_loop):
+    """投影图的度数（自环计1，与CSR行长度一致）"""
+    n = node_ptr.shape[0] - 1
+    degree = np.zeros(n, dtype=np.int64)
+    mark = np.full(n, -1, dtype=np.int64)
+    out = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        degree[i] = _collect_neighbors(i, node_ptr, node_patents, patent_ptr, members, self_loop, mark, i, out)
+    return degree
+
+
+@jit(nopython=True)
+def projection_overcount(node_ptr, node_patents, patent_ptr, members):
+    """B·Bᵀ 相对0/1邻接多计的非对角项：共现于 c>1 条专利的节点对 (i, j) 多计 c-1
+
+    Returns:
+        tuple: (rows, cols, excess)，只含多计的节点对，用于 B(Bᵀz) 的修正
+    """
+    n = node_ptr.shape[0] - 1
+    counts = np.zeros(n, dtype=np.int64)
+    touched = np.empty(n, dtype=np.int64)
+    total = 0
+    # 第一遍统计多计的节点对数，第二遍写出
+    for fill in range(2):
+        if fill == 1:
+            rows = np.empty(total, dtype=np.int64)
+            cols = np.empty(total, dtype=np.int64)
+            excess = np.empty(total)
+            total = 0
+        for i in range(n):
+            count = 0
+            for a in range(node_ptr[i], node_ptr[i + 1]):
+                p = node_patents[a]
+                for b in range(patent_ptr[p], patent_ptr[p + 1]):
+                    j = members[b]
+                    if counts[j] == 0:
+                        touched[count] = j
+                        count += 1
+                    counts[j] += 1
+            for a in range(count):
+                j = touched[a]
+                if j != i and counts[j] > 1:
+                    if fill == 1:
+                        rows[total] = i
+                        cols[total] = j
+                        excess[total] = counts[j] - 1
+                    total += 1
+                counts[j] = 0
+    return rows, cols, excess
+
+
+@jit(nopython=True)
+def projection_ego_sums(node_ptr, node_patents, patent_ptr, members, self_loop, degree):
+    """投影图上每个节点的自我中心网络累计量 (n, 4)，与 step 4.1 的 calculate_ego_sums 逐项一致"""
+    n = node_ptr.shape[0] - 1
+    sums = np.zeros((n, 4))
+    p_row = np.zeros(n)
+    mark_i = np.full(n, -1, dtype=np.int64)
+    mark_j = np.full(n, -1, dtype=np.int64)
+    neighbors_i = np.empty(n, dtype=np.int64)
+    neighbors_j = np.empty(n, dtype=np.int64)
+    stamp_j = 0
+    for i in range(n):
+        count_i = _collect_neighbors(i, node_ptr, node_patents, patent_ptr, members, self_loop,
+                                     mark_i, i, neighbors_i)
+        if count_i == 0:
+            continue
+        p_i = 1.0 / count_i
+        for a in range(count_i):
+            p_row[neighbors_i[a]] = p_i
+
+        for a in range(count_i):
+            j = neighbors_i[a]
+            if j == i:
+                continue
+            count_j = _collect_neighbors(j, node_ptr, node_patents, patent_ptr, members, self_loop,
+                                         mark_j, stamp_j, neighbors_j)
+            stamp_j += 1
+            indirect = 0.0
+            for b in range(count_j):
+                k = neighbors_j[b]
+                if k != i and k != j and p_row[k] > 0:
+                    indirect += p_row[k] / degree[k]
+                    sums[i, 2] += 1.0
+            c_ij = (p_i + indirect) ** 2
+            sums[i, 0] += c_ij
+            sums[i, 1] += 1.0
+            sums[i, 3] += c_ij * np.log(c_ij)
+
+        for a in range(count_i):
+            p_row[neighbors_i[a]] = 0.0
+    return sums
+
+
+class Hypergraph:
+    """以关联矩阵表示的团投影网络，接口与 ArrayGraph 的 nodes / n_nodes / degree / pagerank / fingerprint 一致
+
+    Attributes:
+        nodes (ndarray): 节点名，顺序即节点编号
+        patent_ptr, members (ndarray): 超边 -> 成员节点（B 的按行CSR）
+        node_ptr, node_patents (ndarray): 节点 -> 所在超边（Bᵀ 的按行CSR）
+        patent_of (ndarray): 与 members 对齐的超边编号（B 的COO行号）
+        self_loop (ndarray): 投影图中是否有自环
+    """
+
+    def __init__(self, nodes, patent_ptr: np.ndarray, members: np.ndarray, self_loop: np.ndarray):
+        self.nodes = np.asarray(nodes, dtype=object)
+        self.patent_ptr = patent_ptr
+        self.members = members
+        self.self_loop = self_loop
+        n = len(self.nodes)
+        # 转置：按成员节点稳定排序即得各节点所在的超边（升序）
+        self.patent_of = np.repeat(np.arange(len(patent_ptr) - 1, dtype=np.int64), np.diff(patent_ptr))
+        order = np.argsort(members, kind='stable')
+        self.node_patents = self.patent_of[order]
+        self.node_ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(members, minlength=n), out=self.node_ptr[1:])
+        self._degree = None
+        self._overcount = None
+        self._fingerprint = None
+
+    def _arrays(self) -> tuple:
+        return self.node_ptr, self.node_patents, self.patent_ptr, self.members, self.self_loop
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def n_patents(self) -> int:
+        return len(self.patent_ptr) - 1
+
+    @property
+    def degree(self) -> np.ndarray:
+        """投影图的度数（首次访问时计算并缓存）"""
+        if self._degree is None:
+            self._degree = projection_degree(*self._arrays())
+        return self._degree
+
+    @property
+    def fingerprint(self) -> str:
+        """关联矩阵的内容指纹，用于PageRank缓存"""
+        if self._fingerprint is None:
+            self._fingerprint = csr_fingerprint(self.patent_ptr, self.members, self.self_loop)
+        return self._fingerprint
+
+    def index_of(self, names) -> np.ndarray:
+        """节点名转编号，不存在的节点为-1"""
+        return pd.Index(self.nodes).get_indexer(pd.Series(names, dtype=str))
+
+    def matvec(self, z: np.ndarray) -> np.ndarray:
+        """y = A·z，A 为投影图的0/1邻接矩阵：y = B(Bᵀz) 减去 B·Bᵀ 的多计项"""
+        if self._overcount is None:
+            rows, cols, excess = projection_overcount(self.node_ptr, self.node_patents, self.patent_ptr, self.members)
+            diagonal = np.diff(self.node_ptr) - self.self_loop
+            self._overcount = (rows, cols, excess, diagonal.astype(np.float64))
+        rows, cols, excess, diagonal = self._overcount
+        patent_sums = np.bincount(self.patent_of, weights=z[self.members], minlength=self.n_patents)
+        y = np.bincount(self.members, weights=patent_sums[self.patent_of], minlength=self.n_nodes)
+        y -= diagonal * z
+        y -= np.bincount(rows, weights=excess * z[cols], minlength=self.n_nodes)
+        return y
+
+    def neighbors(self, i: int) -> np.ndarray:
+        """投影图中节点 i 的邻居编号（升序）"""
+        mark = np.full(self.n_nodes, -1, dtype=np.int64)
+        out = np.empty(self.n_nodes, dtype=np.int64)
+        count = _collect_neighbors(i, *self._arrays(), mark, 0, out)
+        return np.sort(out[:count])
+
+    def pagerank(self, alpha: float = 0.85, max_iter: int = 100, tol: float = 1e-6,
+                 nstart: np.ndarray = None) -> np.ndarray:
+        """投影图上的PageRank，迭代格式与 ArrayGraph.pagerank 相同，每次迭代为两次关联矩阵乘积"""
+        n = self.n_nodes
+        if n == 0:
+            return np.array([])
+        out_weight = self.degree.astype(np.float64)
+        dangling = out_weight == 0
+        inv_out = np.divide(1.0, out_weight, where=~dangling, out=np.zeros(n))
+
+        if nstart is not None and len(nstart) == n and np.sum(nstart) > 0:
+            x = np.asarray(nstart, dtype=np.float64) / np.sum(nstart)
+        else:
+            x = np.full(n, 1.0 / n)
+        for _ in range(max_iter):
+            x_last = x
+            x = alpha * self.matvec(x_last * inv_out)
+            x += (alpha * x_last[dangling].sum() + 1 - alpha) / n
+            if np.abs(x - x_last).sum() < n * tol:
+                return x
+        raise PowerIterationFailedConvergence(f"PageRank在{max_iter}次迭代内未收敛")
+
+    def ego_sums(self) -> np.ndarray:
+        """每个节点的自我中心网络累计量 [限制度之和, 联系人数, 联系人之间的有序连边数, sum c·ln c]"""
+        return projection_ego_sums(*self._arrays(), self.degree)
+
+    def constraint(self) -> np.ndarray:
+        """每个节点的限制度之和（结构洞耦合 = 1 - 限制度）"""
+        return self.ego_sums()[:, 0]
+
+
+def load_hypergraph(input_dir, name: str, mmap: bool = True):
+    """打开超图模式写出的关联矩阵，不存在或节点CSV已变化时返回 None"""
+    input_dir = Path(input_dir)
+    store_dir = incidence_store_dir(input_dir, name)
+    meta_path = store_dir / 'meta.json'
+    nodes_path = input_dir / f"{name}_network_nodes.csv"
+    if not meta_path.exists() or not nodes_path.exists():
+        return None
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('version') != INCIDENCE_VERSION or meta.get('nodes_csv') != file_signature(nodes_path):
+        return None
+
+    mode = 'r' if mmap else None
+    arrays = [np.asarray(np.load(store_dir / f'{key}.npy', mmap_mode=mode))
+              for key in ('patent_ptr', 'members', 'self_loop')]
+    nodes = pd.read_csv(nodes_path, encoding='utf-8')['节点'].astype(str).unique()
+    if len(nodes) != meta['n_nodes']:
+        return None
+    return Hypergraph(nodes, *arrays)
+
+
+def load_layer_graph(input_dir, name: str):
+    """加载网络层：超图模式的关联矩阵优先，否则为 load_array_graph 的CSR数组图"""
+    hypergraph = load_hypergraph(input_dir, name)
+    return hypergraph if hypergraph is not None else load_array_graph(input_dir, name)
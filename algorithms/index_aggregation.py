@@ -0,0 +1,356 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+step 4.3/5.3 指数聚合
+节点指数 = 自身值 + 层间邻居（两个跨层耦合网络中与之相连的节点，去重、不含自身）的值之和，
+其中节点值为数据库中同名行的值之和。
+
+关键性指数（structural_hole_coupling*weights）和中心性指数（centrality_coupling*weights）只是聚合的值列不同：
+每个网络层的层间邻居算子只构建一次，对所有指标的值矩阵一次聚合。
+层间邻居取自step 2保存的层间邻居索引（inter_layer_index，按节点编号的CSR），不再按节点名展开耦合边；
+两者仅在不同网络层存在同名节点时有差别。
+
+增量更新：节点值或耦合边变化只影响一跳范围内的指数——值变化的节点及其层间邻居、
+增删耦合边的两个端点，以及上次结果中没有的新节点；其余节点沿用上次的指数。
+节点值的变化通过与上次运行保存的节点值快照比较得到，耦合边变化来自step 2输出的 delta 目录。
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from incremental_pagerank import load_edge_delta
+from inter_layer_index import layer_nodes, load_inter_layer_index
+
+# 每个网络层的层间耦合边文件
+INTER_LAYER_EDGE_FILES = {
+    "knowledge": ['knowledge-technology_network_edges.csv', 'knowledge-collaborative_R&D_network_edges.csv'],
+    "technology": ['knowledge-technology_network_edges.csv', 'technology-collaborative_R&D_network_edges.csv'],
+    "collaborative_R&D": ['knowledge-collaborative_R&D_network_edges.csv',
+                          'technology-collaborative_R&D_network_edges.csv'],
+}
+
+
+def criticality_metric(step4_dir) -> dict:
+    """关键性指数（4.3）的指标配置"""
+    step4_dir = Path(step4_dir)
+    return {
+        "database": step4_dir / 'structural_hole_coupling_database.csv',
+        "value_column": 'structural_hole_coupling*weights',
+        "index_column": 'criticality_index',
+        "output_dir": step4_dir,
+    }
+
+
+def centrality_metric(step5_dir) -> dict:
+    """中心性指数（5.3）的指标配置"""
+    step5_dir = Path(step5_dir)
+    return {
+        "database": step5_dir / 'centrality_coupling_database.csv',
+        "value_column": 'centrality_coupling*weights',
+        "index_column": 'centrality_index',
+        "output_dir": step5_dir,
+    }
+
+
+def coupling_layer_name(edge_file: str) -> str:
+    """由耦合网络边文件名得到网络名，如 knowledge-technology_network_edges.csv -> knowledge-technology"""
+    return edge_file[:-len("_network_edges.csv")]
+
+
+def inter_layer_pairs(edge_dfs: list) -> pd.DataFrame:
+    """把耦合边展开为 (节点, 关联节点) 对：两个方向、去重、去掉自身"""
+    frames = []
+    for edge_df in edge_dfs:
+        src, dst = edge_df['节点1'].astype(str), edge_df['节点2'].astype(str)
+        frames.append(pd.DataFrame({'节点': src, '关联节点': dst}))
+        frames.append(pd.DataFrame({'节点': dst, '关联节点': src}))
+    if not frames:
+        return pd.DataFrame(columns=['节点', '关联节点'])
+    pairs = pd.concat(frames, ignore_index=True)
+    pairs = pairs[pairs['节点'] != pairs['关联节点']]
+    return pairs.drop_duplicates(ignore_index=True)
+
+
+class InterLayerOperator:
+    """一个网络层的层间邻居算子：index = 自身值 + Σ 层间邻居值，可一次作用于多列值
+
+    算子由若干块组成，每块为 (本层节点编号, 邻居编号, 邻居节点名)：
+    from_indices 每个耦合网络一块，直接取自step 2保存的层间邻居索引；
+    from_edges 由耦合边按节点名展开为一块。
+
+    Attributes:
+        nodes (Index): 网络层节点名（str）
+        blocks (list): [(rows, cols, neighbor_names)]
+    """
+
+    def __init__(self, nodes, blocks: list):
+        self.nodes = pd.Index(pd.Series(nodes).astype(str))
+        self.blocks = blocks
+
+    @classmethod
+    def from_edges(cls, nodes, edge_dfs: list) -> "InterLayerOperator":
+        """由耦合边表构建（按节点名匹配，层间邻居去重、不含自身）"""
+        nodes = pd.Index(pd.Series(nodes).astype(str))
+        pairs = inter_layer_pairs(edge_dfs)
+        rows = nodes.get_indexer(pairs['节点'])
+        cols, names = pd.factorize(pairs['关联节点'][rows >= 0])
+        return cls(nodes, [(rows[rows >= 0], cols, pd.Index(names))])
+
+    @classmethod
+    def from_indices(cls, nodes, indices: list) -> "InterLayerOperator":
+        """由层间邻居索引构建
+
+        Args:
+            nodes: 本层节点名，顺序与索引的源层节点编号一致
+            indices (list): [(InterLayerIndex, 目标层节点名)]
+        """
+        return cls(nodes, [(index.rows, index.indices, pd.Index(dst_nodes)) for index, dst_nodes in indices])
+
+    def neighbors_of(self, names) -> set:
+        """以给定节点为层间邻居的本层节点名"""
+        names = list(names)
+        result = set()
+        for rows, cols, neighbor_names in self.blocks:
+            ids = neighbor_names.get_indexer(names)
+            result.update(self.nodes[np.unique(rows[np.isin(cols, ids[ids >= 0])])])
+        return result
+
+    def apply(self, values: pd.DataFrame, mask: np.ndarray = None) -> np.ndarray:
+        """计算指数
+
+        Args:
+            values (DataFrame): 节点值，索引为节点名，每列一个指标
+            mask (ndarray): 只计算这些节点（布尔数组），默认全部
+
+        Returns:
+            ndarray: 形状为 (节点数, 指标数) 的指数矩阵；给定 mask 时只含被选中的行
+        """
+        n = len(self.nodes)
+        result = values.reindex(self.nodes, fill_value=0).to_numpy(dtype=np.float64)
+        for rows, cols, neighbor_names in self.blocks:
+            if mask is not None:
+                keep = mask[rows]
+                rows, cols = rows[keep], cols[keep]
+            related = values.reindex(neighbor_names, fill_value=0).to_numpy(dtype=np.float64)[cols]
+            for c in range(result.shape[1]):
+                result[:, c] += np.bincount(rows, weights=related[:, c], minlength=n)
+        return result if mask is None else result[mask]
+
+
+def node_values(database: pd.DataFrame, value_column: str) -> pd.Series:
+    """每个节点名的值（同名行求和，缺失值按0计）"""
+    return database[value_column].groupby(database['节点'].astype(str)).sum()
+
+
+def load_value_snapshot(path: Path) -> pd.Series:
+    """读取上次运行保存的节点值快照，不存在时返回 None"""
+    if not path.exists():
+        return None
+    snapshot = pd.read_csv(path, encoding='utf-8', dtype={'节点': str}, keep_default_na=False)
+    return pd.Series(pd.to_numeric(snapshot['value']).to_numpy(), index=pd.Index(snapshot['节点']))
+
+
+def save_value_snapshot(path: Path, values: pd.Series):
+    """保存节点值快照，供下次增量更新比较"""
+    pd.DataFrame({'节点': values.index, 'value': values.to_numpy()}).to_csv(
+        path, index=False, encoding='utf-8-sig')
+
+
+def load_previous_index(path: Path, value_column: str) -> pd.Series:
+    """读取上次的指数结果，不存在时返回 None"""
+    if not path.exists():
+        return None
+    previous = pd.read_csv(path, encoding='utf-8', dtype={'节点': str}, keep_default_na=False)
+    if value_column not in previous.columns:
+        return None
+    values = pd.Series(pd.to_numeric(previous[value_column]).to_numpy(), index=pd.Index(previous['节点']))
+    return values[~values.index.duplicated()]
+
+
+def load_coupling_deltas(delta_dir: Path, edge_files: list) -> list:
+    """读取各耦合网络的边增量，任一缺失时返回 None（无法确定耦合边变化）"""
+    deltas = [load_edge_delta(delta_dir, coupling_layer_name(edge_file)) for edge_file in edge_files]
+    return None if any(delta is None for delta in deltas) else deltas
+
+
+def changed_names(values: pd.DataFrame, previous_values: pd.DataFrame) -> set:
+    """任一指标的值与快照不同的节点名（含新增和消失的节点）"""
+    union = values.index.union(previous_values.index)
+    current = values.reindex(union, fill_value=0).to_numpy()
+    before = previous_values.reindex(union, fill_value=0).to_numpy()
+    return set(union[(current != before).any(axis=1)])
+
+
+def affected_nodes(operator: InterLayerOperator, changed: set, edge_deltas: list) -> set:
+    """值或耦合边变化后需要重算指数的节点名"""
+    # 值变化的节点自身及其层间邻居
+    affected = set(changed)
+    affected.update(operator.neighbors_of(changed))
+    # 增删耦合边的端点
+    for delta in edge_deltas:
+        for kind in ('added', 'removed'):
+            for column in ('节点1', '节点2'):
+                affected.update(delta[kind][column].astype(str))
+    return affected
+
+
+def update_index(operator: InterLayerOperator, values: pd.DataFrame, previous_index: pd.DataFrame = None,
+                 changed: set = None, edge_deltas: list = None) -> tuple:
+    """计算或增量更新一个网络层的各指标指数
+
+    Args:
+        operator (InterLayerOperator): 本层的层间邻居算子
+        values (DataFrame): 当前节点值，每列一个指标
+        previous_index (DataFrame): 上次的指数（按节点名索引，列同 values），为 None 时全量计算
+        changed (set): 值与上次快照不同的节点名
+        edge_deltas (list): 各耦合网络的边增量
+
+    Returns:
+        tuple: (指数矩阵, 重算的节点数)
+    """
+    if previous_index is None or changed is None or edge_deltas is None:
+        return operator.apply(values), len(operator.nodes)
+
+    aligned = previous_index.reindex(operator.nodes).to_numpy(dtype=np.float64)
+    affected = operator.nodes.isin(affected_nodes(operator, changed, edge_deltas))
+    targets = affected | np.isnan(aligned).any(axis=1)
+    aligned[targets] = operator.apply(values, targets)
+    return aligned, int(targets.sum())
+
+
+def calculate_layer_indices(step2_dir, metrics: list, incremental: bool = False, delta_dir=None) -> dict:
+    """对所有网络层一次计算多个指标的指数并保存
+
+    每个网络层只读取一次节点文件、构建一次层间邻居算子（基于step 2保存的层间邻居索引）。
+
+    Args:
+        step2_dir (str/Path): step2输出目录
+        metrics (list): 指标配置列表（见 criticality_metric / centrality_metric），
+            每项含 database、value_column、index_column、output_dir
+        incremental (bool): 只重算节点值或耦合边有变化的节点，其余沿用上次结果；
+            缺少上次结果、节点值快照或耦合边增量时该层退回全量计算
+        delta_dir (str/Path): 耦合边增量目录，默认'{step2_dir}/delta'
+
+    Returns:
+        dict: {网络层: {"nodes": 节点数, "recomputed": 重算节点数, "indices": 指数矩阵, "outputs": [输出文件]}}
+    """
+    step2_dir = Path(step2_dir)
+    delta_dir = Path(delta_dir) if delta_dir else step2_dir / 'delta'
+    columns = [metric["index_column"] for metric in metrics]
+
+    # 各指标的节点值合并为一个值矩阵
+    series = []
+    for metric in metrics:
+        if not metric["database"].exists():
+            raise FileNotFoundError(f"数据库文件不存在：{metric['database']}")
+        database = pd.read_csv(metric["database"], encoding='utf-8')
+        missing_cols = [col for col in ['节点', metric["value_column"]] if col not in database.columns]
+        if missing_cols:
+            raise ValueError(f"{metric['database'].name}缺少必要列：{missing_cols}")
+        series.append(node_values(database, metric["value_column"]).rename(metric["index_column"]))
+    values = pd.concat(series, axis=1).fillna(0)
+
+    snapshot_paths = [metric["output_dir"] / f"{metric['index_column']}_values.csv" for metric in metrics]
+    changed = None
+    if incremental:
+        snapshots = [load_value_snapshot(path) for path in snapshot_paths]
+        if all(snapshot is not None for snapshot in snapshots):
+            previous_values = pd.concat(
+                [s.rename(c) for s, c in zip(snapshots, columns)], axis=1).fillna(0)
+            changed = changed_names(values, previous_values)
+
+    # 层间邻居直接取自step 2的层间邻居索引（按节点编号），各层节点名只读取一次
+    layer_names = {layer: layer_nodes(step2_dir, layer) for layer in INTER_LAYER_EDGE_FILES}
+    results = {}
+    for layer, edge_files in INTER_LAYER_EDGE_FILES.items():
+        operator = InterLayerOperator.from_indices(layer_names[layer], [
+            (load_inter_layer_index(step2_dir, layer, other), layer_names[other])
+            for other in INTER_LAYER_EDGE_FILES if other != layer
+        ])
+        nodes = operator.nodes
+
+        output_paths = [metric["output_dir"] / f"{layer}_network_{metric['index_column']}.csv"
+                        for metric in metrics]
+        previous_index = edge_deltas = None
+        if changed is not None:
+            edge_deltas = load_coupling_deltas(delta_dir, edge_files)
+            previous = [load_previous_index(path, column) for path, column in zip(output_paths, columns)]
+            if all(p is not None for p in previous):
+                previous_index = pd.concat(previous, axis=1, keys=columns)
+        indices, recomputed = update_index(operator, values, previous_index, changed, edge_deltas)
+
+        for c, (metric, output_path) in enumerate(zip(metrics, output_paths)):
+            metric["output_dir"].mkdir(parents=True, exist_ok=True)
+            pd.DataFrame({
+                '节点': nodes,
+                metric["index_column"]: indices[:, c]
+            }).to_csv(output_path, index=False, encoding='utf-8-sig')
+        results[layer] = {"nodes": len(nodes), "recomputed": recomputed, "indices": indices,
+                          "outputs": output_paths}
+
+    for path, column in zip(snapshot_paths, columns):
+        save_value_snapshot(path, values[column])
+    return results
+
+
+def calculate_criticality_and_centrality(step2_dir=None, step4_dir=None, step5_dir=None,
+                                         incremental=False, delta_dir=None):
+    """一次计算关键性指数（4.3）和中心性指数（5.3）
+
+    Args:
+        step2_dir (str/Path): step2输出目录路径，默认'../data/step2_output'
+        step4_dir (str/Path): step4输出目录路径，默认'../data/step4_output'
+        step5_dir (str/Path): step5输出目录路径，默认'../data/step5_output'
+        incremental (bool): 只重算节点值或耦合边有变化的节点
+        delta_dir (str/Path): 耦合边增量目录，默认'{step2_dir}/delta'
+
+    Returns:
+        str: 处理结果报告
+    """
+    step2_dir = Path(step2_dir) if step2_dir else Path('../data/step2_output')
+    step4_dir = Path(step4_dir) if step4_dir else Path('../data/step4_output')
+    step5_dir = Path(step5_dir) if step5_dir else Path('../data/step5_output')
+
+    try:
+        results = calculate_layer_indices(
+            step2_dir, [criticality_metric(step4_dir), centrality_metric(step5_dir)], incremental, delta_dir
+        )
+        lines = ["关键性指数和中心性指数计算完成！"]
+        for layer, info in results.items():
+            lines.append(f"{layer}: 节点{info['nodes']}个，重算{info['recomputed']}个")
+        lines.append(f"结果文件已保存至：{step4_dir} 和 {step5_dir}")
+        result_msg = "\n".join(lines)
+        print(result_msg)
+        return result_msg
+
+    except FileNotFoundError as e:
+        error_msg = f"文件错误：{str(e)}"
+        print(error_msg)
+        return error_msg
+    except ValueError as ve:
+        error_msg = f"数据验证错误：{str(ve)}"
+        print(error_msg)
+        return error_msg
+    except Exception as e:
+        error_msg = f"处理过程中发生错误：{str(e)}"
+        print(error_msg)
+        return error_msg
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='一次计算关键性指数和中心性指数')
+    parser.add_argument('--step2_dir', type=str, help='step2输出目录路径')
+    parser.add_argument('--step4_dir', type=str, help='step4输出目录路径')
+    parser.add_argument('--step5_dir', type=str, help='step5输出目录路径')
+    parser.add_argument('--incremental', action='store_true',
+                        help='只重算节点值或耦合边有变化的节点，修补已保存的结果')
+    parser.add_argument('--delta_dir', type=str, help='耦合边增量目录，默认为step2输出目录下的delta')
+
+    args = parser.parse_args()
+    calculate_criticality_and_centrality(args.step2_dir, args.step4_dir, args.step5_dir,
+                                         args.incremental, args.delta_dir)
@@ -0,0 +1,262 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+层间邻居索引
+step 2 构建耦合网络时，把耦合边按两个网络层的节点编号保存为有向CSR，两个方向各一份：
+
+    {output_dir}/inter_layer/{源网络层}_to_{目标网络层}/
+        indptr.npy    int64，长度 n_源+1
+        indices.npy   int32/int64，目标网络层节点编号（即目标层节点CSV的行号）
+        meta.json     规模信息及两个节点CSV、耦合边CSV的签名（用于判断是否过期）
+
+源层节点 i 的层间邻居为 indices[indptr[i]:indptr[i+1]]，查询代价与度数成正比；
+rows/indices 两个数组即稀疏算子的 COO 形式，可直接用 np.bincount 做向量化聚合。
+耦合边中不在对应网络层节点表中的端点被忽略。
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from graph_store import file_signature
+
+INDEX_VERSION = 1
+
+# 耦合网络连接的两个网络层
+COUPLING_LAYERS = {
+    "knowledge-technology": ("knowledge", "technology"),
+    "technology-collaborative_R&D": ("technology", "collaborative_R&D"),
+    "knowledge-collaborative_R&D": ("knowledge", "collaborative_R&D"),
+}
+
+
+def coupling_between(src_layer: str, dst_layer: str) -> str:
+    """连接两个网络层的耦合网络名"""
+    for coupling, layers in COUPLING_LAYERS.items():
+        if set(layers) == {src_layer, dst_layer}:
+            return coupling
+    raise ValueError(f"不存在连接{src_layer}与{dst_layer}的耦合网络")
+
+
+def inter_layer_index_dir(base_dir, src_layer: str, dst_layer: str) -> Path:
+    """索引目录：{base_dir}/inter_layer/{src_layer}_to_{dst_layer}"""
+    return Path(base_dir) / 'inter_layer' / f'{src_layer}_to_{dst_layer}'
+
+
+def layer_nodes(step2_dir, layer: str) -> np.ndarray:
+    """网络层节点名（str），顺序即节点编号"""
+    nodes_path = Path(step2_dir) / f"{layer}_network_nodes.csv"
+    if not nodes_path.exists():
+        raise FileNotFoundError(f"节点文件不存在：{nodes_path}")
+    return pd.read_csv(nodes_path, encoding='utf-8')['节点'].astype(str).unique()
+
+
+def _source_paths(step2_dir: Path, src_layer: str, dst_layer: str) -> dict:
+    return {
+        "src_nodes": step2_dir / f"{src_layer}_network_nodes.csv",
+        "dst_nodes": step2_dir / f"{dst_layer}_network_nodes.csv",
+        "edges": step2_dir / f"{coupling_between(src_layer, dst_layer)}_network_edges.csv",
+    }
+
+
+def directed_csr(n_rows: int, n_cols: int, rows: np.ndarray, cols: np.ndarray) -> tuple:
+    """由 (行, 列) 编号构建去重的有向CSR"""
+    keys = np.unique(rows.astype(np.int64) * n_cols + cols)
+    rows, cols = keys // max(n_cols, 1), keys % max(n_cols, 1)
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+    index_dtype = np.int32 if n_cols < np.iinfo(np.int32).max else np.int64
+    return indptr, cols.astype(index_dtype)
+
+
+class InterLayerIndex:
+    """一个方向的层间邻居索引（源网络层节点 -> 目标网络层节点）
+
+    Attributes:
+        src_layer (str): 源网络层
+        dst_layer (str): 目标网络层
+        indptr (ndarray): 行指针，长度 n_src+1
+        indices (ndarray): 目标网络层节点编号
+        n_dst (int): 目标网络层节点数
+    """
+
+    def __init__(self, src_layer: str, dst_layer: str, indptr: np.ndarray, indices: np.ndarray, n_dst: int):
+        self.src_layer = src_layer
+        self.dst_layer = dst_layer
+        self.indptr = indptr
+        self.indices = indices
+        self.n_dst = n_dst
+        self._rows = None
+
+    @classmethod
+    def from_edges(cls, src_layer: str, dst_layer: str, src_nodes, dst_nodes,
+                   edges_df: pd.DataFrame) -> tuple:
+        """由两个网络层的节点名和耦合边表构建两个方向的索引
+
+        Returns:
+            tuple: (源->目标索引, 目标->源索引)
+        """
+        src_ids, dst_ids = pd.Index(src_nodes), pd.Index(dst_nodes)
+        a, b = edges_df['节点1'].astype(str), edges_df['节点2'].astype(str)
+        # 耦合边无向，两种朝向都可能连接源层与目标层
+        rows = np.concatenate([src_ids.get_indexer(a), src_ids.get_indexer(b)])
+        cols = np.concatenate([dst_ids.get_indexer(b), dst_ids.get_indexer(a)])
+        valid = (rows >= 0) & (cols >= 0)
+        rows, cols = rows[valid], cols[valid]
+        forward = cls(src_layer, dst_layer, *directed_csr(len(src_ids), len(dst_ids), rows, cols), len(dst_ids))
+        backward = cls(dst_layer, src_layer, *directed_csr(len(dst_ids), len(src_ids), cols, rows), len(src_ids))
+        return forward, backward
+
+    @property
+    def n_src(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def n_entries(self) -> int:
+        return len(self.indices)
+
+    @property
+    def rows(self) -> np.ndarray:
+        """每个条目所在的源层节点编号（按需生成并缓存）"""
+        if self._rows is None:
+            self._rows = np.repeat(np.arange(self.n_src, dtype=self.indices.dtype), np.diff(self.indptr))
+        return self._rows
+
+    @property
+    def degree(self) -> np.ndarray:
+        """每个源层节点的层间邻居数"""
+        return np.diff(self.indptr)
+
+    def neighbors(self, i: int) -> np.ndarray:
+        """源层节点 i 的层间邻居（目标层节点编号）"""
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def aggregate(self, values: np.ndarray) -> np.ndarray:
+        """对每个源层节点求层间邻居值之和
+
+        Args:
+            values (ndarray): 目标层节点值，形状 (n_dst,) 或 (n_dst, 指标数)
+
+        Returns:
+            ndarray: 形状 (n_src,) 或 (n_src, 指标数)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 1:
+            return np.bincount(self.rows, weights=values[self.indices], minlength=self.n_src)
+        return np.column_stack([
+            np.bincount(self.rows, weights=values[self.indices, c], minlength=self.n_src)
+            for c in range(values.shape[1])
+        ]) if values.shape[1] else np.zeros((self.n_src, 0))
+
+
+def _write_direction(index: InterLayerIndex, output_dir: Path, coupling: str, signatures: dict):
+    index_dir = inter_layer_index_dir(output_dir, index.src_layer, index.dst_layer)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    # 先删除元数据，写入中断时索引被视为不存在
+    (index_dir / 'meta.json').unlink(missing_ok=True)
+    np.save(index_dir / 'indptr.npy', index.indptr)
+    np.save(index_dir / 'indices.npy', index.indices)
+    meta = {
+        "version": INDEX_VERSION,
+        "coupling": coupling,
+        "src_layer": index.src_layer,
+        "dst_layer": index.dst_layer,
+        "n_src": index.n_src,
+        "n_dst": index.n_dst,
+        "n_entries": index.n_entries,
+        "sources": signatures,
+    }
+    with open(index_dir / 'meta.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+def write_inter_layer_index(output_dir, coupling: str) -> bool:
+    """为一个耦合网络写出两个方向的层间邻居索引
+
+    需要两个网络层的节点文件已存在（step 2.1-2.3 先于耦合网络构建）；不存在时跳过，
+    使用方会在加载时由CSV临时构建。
+
+    Returns:
+        bool: 是否写出
+    """
+    output_dir = Path(output_dir)
+    src_layer, dst_layer = COUPLING_LAYERS[coupling]
+    paths = _source_paths(output_dir, src_layer, dst_layer)
+    if not all(path.exists() for path in paths.values()):
+        return False
+
+    edges_df = pd.read_csv(paths["edges"], encoding='utf-8')
+    forward, backward = InterLayerIndex.from_edges(
+        src_layer, dst_layer, layer_nodes(output_dir, src_layer), layer_nodes(output_dir, dst_layer), edges_df
+    )
+    _write_both_directions(forward, backward, output_dir, coupling)
+    return True
+
+
+def write_inter_layer_pairs(output_dir, coupling: str, rows: np.ndarray, cols: np.ndarray,
+                            n_src: int, n_dst: int) -> None:
+    """由 (源层节点编号, 目标层节点编号) 对写出一个耦合网络两个方向的索引
+
+    增量导入在已有索引的编号对上增删后使用，不重新读取耦合边CSV；签名取当前的节点和耦合边文件，
+    因此须在这些文件写完之后调用。
+    """
+    output_dir = Path(output_dir)
+    src_layer, dst_layer = COUPLING_LAYERS[coupling]
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    forward = InterLayerIndex(src_layer, dst_layer, *directed_csr(n_src, n_dst, rows, cols), n_dst)
+    backward = InterLayerIndex(dst_layer, src_layer, *directed_csr(n_dst, n_src, cols, rows), n_src)
+    _write_both_directions(forward, backward, output_dir, coupling)
+
+
+def _write_both_directions(forward: InterLayerIndex, backward: InterLayerIndex, output_dir: Path, coupling: str):
+    paths = _source_paths(output_dir, forward.src_layer, forward.dst_layer)
+    signatures = {key: file_signature(path) for key, path in paths.items()}
+    _write_direction(forward, output_dir, coupling, signatures)
+    # 反方向的源/目标节点文件互换
+    _write_direction(backward, output_dir, coupling, {
+        "src_nodes": signatures["dst_nodes"], "dst_nodes": signatures["src_nodes"], "edges": signatures["edges"]
+    })
+
+
+def load_inter_layer_index(step2_dir, src_layer: str, dst_layer: str, mmap: bool = True) -> InterLayerIndex:
+    """加载层间邻居索引：优先内存映射step 2写出的索引，不存在或已过期时由CSV构建
+
+    Args:
+        step2_dir (str/Path): step2输出目录
+        src_layer (str): 源网络层
+        dst_layer (str): 目标网络层
+        mmap (bool): 是否以内存映射方式打开
+
+    Returns:
+        InterLayerIndex: 源层 -> 目标层的索引
+    """
+    step2_dir = Path(step2_dir)
+    paths = _source_paths(step2_dir, src_layer, dst_layer)
+    index_dir = inter_layer_index_dir(step2_dir, src_layer, dst_layer)
+    meta_path = index_dir / 'meta.json'
+    if meta_path.exists() and all(path.exists() for path in paths.values()):
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        fresh = meta.get('version') == INDEX_VERSION and meta.get('sources') == {
+            key: file_signature(path) for key, path in paths.items()
+        }
+        if fresh:
+            mode = 'r' if mmap else None
+            # np.asarray 去掉memmap子类（不复制）
+            indptr = np.asarray(np.load(index_dir / 'indptr.npy', mmap_mode=mode))
+            indices = np.asarray(np.load(index_dir / 'indices.npy', mmap_mode=mode))
+            return InterLayerIndex(src_layer, dst_layer, indptr, indices, meta['n_dst'])
+
+    if not paths["edges"].exists():
+        raise FileNotFoundError(f"边文件不存在：{paths['edges']}")
+    edges_df = pd.read_csv(paths["edges"], encoding='utf-8')
+    if not {'节点1', '节点2'}.issubset(edges_df.columns):
+        raise ValueError(f"{paths['edges'].name}缺少必要列('节点1'或'节点2')")
+    forward, _ = InterLayerIndex.from_edges(
+        src_layer, dst_layer, layer_nodes(step2_dir, src_layer), layer_nodes(step2_dir, dst_layer), edges_df
+    )
+    return forward
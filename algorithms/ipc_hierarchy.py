@@ -0,0 +1,97 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+IPC分类层级解析与粒度归并
+IPC编码由 部（A-H）/ 大类（2位数字）/ 小类（字母）/ 大组 / 小组 组成，如 H01L21/336：
+
+    section     部      H
+    class       大类    H01
+    subclass    小类    H01L
+    main_group  大组    H01L21/00
+    full        小组    原始编码（不归并）
+
+每个不同的编码只解析一次（先取唯一值再按列向量化提取），归并后同一专利内重复的编码只保留第一次出现，
+避免团展开产生自环。解析不区分大小写（如 h01l21/336 与 H01L21/336 归并到同一节点），无法解析的编码（非标准写法）保持原样；缺少下级层次的编码归并到其最细的已有层次。
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+IPC_COLUMN = 'IPC分类'
+IPC_LEVELS = ("section", "class", "subclass", "main_group", "full")
+LEVEL_NAMES = {"section": "部", "class": "大类", "subclass": "小类", "main_group": "大组", "full": "小组"}
+
+# 部、大类、小类、大组、小组，允许各部分之间有空白（如"H01L 21/336"）及末尾的版本等附注
+IPC_PATTERN = r'^\s*([A-H])\s*(\d{2})\s*([A-Z])\s*(?:(\d{1,4})\s*(?:/\s*(\d{1,6}))?)?'
+
+
+def parse_ipc(codes) -> pd.DataFrame:
+    """解析IPC编码的各层次
+
+    Args:
+        codes: IPC编码（可迭代，重复值只解析一次）
+
+    Returns:
+        DataFrame: 以原始编码为索引，列为 section、class、subclass、main_group（各层次的规范写法，
+            无法解析或缺少该层次时为缺失值）
+    """
+    unique = pd.Index(pd.unique(pd.Series(list(codes), dtype=object).astype(str)))
+    parts = unique.to_series().str.upper().str.extract(IPC_PATTERN)
+    parts.columns = ["section", "class_digits", "subclass_letter", "main", "sub"]
+    parsed = pd.DataFrame(index=unique)
+    parsed["section"] = parts["section"]
+    parsed["class"] = parts["section"] + parts["class_digits"]
+    parsed["subclass"] = parsed["class"] + parts["subclass_letter"]
+    main = pd.to_numeric(parts["main"], errors='coerce').astype('Int64').astype(str)
+    parsed["main_group"] = (parsed["subclass"] + main + "/00").where(parts["main"].notna())
+    return parsed
+
+
+def rollup_codes(codes, level: str) -> pd.Series:
+    """把IPC编码归并到指定层次，返回以原始编码为索引的归并结果"""
+    if level not in IPC_LEVELS:
+        raise ValueError(f"未知的IPC层次：{level}，可选：{', '.join(IPC_LEVELS)}")
+    parsed = parse_ipc(codes)
+    rolled = parsed.index.to_series().str.strip()
+    if level == "full":
+        return rolled
+    # 从粗到细依次覆盖，缺少下级层次的编码停在已有的最细层次
+    for name in IPC_LEVELS[:IPC_LEVELS.index(level) + 1]:
+        rolled = parsed[name].where(parsed[name].notna(), rolled)
+    return rolled
+
+
+def rollup_ipc_column(series: pd.Series, level: str) -> tuple:
+    """归并'|'分隔的IPC分类列
+
+    拆分方式与 step 2 构建一致（按'|'拆分、去空白、去空项），缺失值和没有有效编码的记录保持原值。
+
+    Returns:
+        tuple: (归并后的列, 映射表 DataFrame[原始IPC, 归并IPC, 专利数])
+    """
+    items = series.dropna().astype(str).str.split('|').explode().str.strip()
+    items = items[items != '']
+    mapping = rollup_codes(items.unique(), level)
+
+    rolled = pd.DataFrame({"row": items.index, "code": items.map(mapping).to_numpy()})
+    rolled = rolled.drop_duplicates(ignore_index=True)
+    joined = rolled.groupby("row", sort=False)["code"].agg('|'.join)
+
+    result = series.copy()
+    if len(joined):
+        result = result.astype(object)
+        result.loc[joined.index] = joined
+    mapping_df = pd.DataFrame({
+        "原始IPC": items.to_numpy(),
+        "归并IPC": items.map(mapping).to_numpy(),
+        "row": items.index,
+    }).drop_duplicates().groupby(["归并IPC", "原始IPC"]).size().rename("专利数").reset_index()
+    return result, mapping_df[["原始IPC", "归并IPC", "专利数"]]
+
+
+def load_ipc_mapping(mapping_path) -> dict:
+    """读取映射表，返回 {归并IPC: [原始IPC, ...]}，用于把粗粒度的分析结果对应回原始编码"""
+    mapping_df = pd.read_csv(Path(mapping_path), encoding='utf-8', dtype=str, keep_default_na=False)
+    return mapping_df.groupby("归并IPC", sort=True)["原始IPC"].agg(list).to_dict()
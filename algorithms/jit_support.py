@@ -0,0 +1,29 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+Numba 可选依赖
+所有内核通过本模块的 jit 装饰器编译，默认开启磁盘缓存（cache=True）：编译结果按函数签名保存在源码旁的
+__pycache__（不可写时为用户缓存目录，可用 NUMBA_CACHE_DIR 指定），新进程和进程池的工作进程直接加载，
+不再重复编译。numba_warmup.warm_up_kernels 按流程实际使用的数据类型预先编译并写入缓存。
+
+未安装 numba 时装饰器原样返回Python函数，NUMBA_AVAILABLE 为 False；流程主路径上的内核
+（step 4.1 限制度）改用向量化的NumPy实现，其余可选模式的内核以纯Python循环执行，结果相同但较慢。
+"""
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+
+
+def jit(*args, **kwargs):
+    """numba.jit，默认 cache=True；未安装 numba 时不做任何处理"""
+    if numba is None:
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+    kwargs.setdefault("cache", True)
+    return numba.jit(*args, **kwargs)
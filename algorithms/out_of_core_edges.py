@@ -0,0 +1,199 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+外存团边生成
+一条专利的IPC分类或专利权人两两连边（团）：60个IPC分类即约1.8k条边，几千条这样的记录会让
+step 2 内存中的 edges 集合超出内存。外存模式下：
+
+    1. 分块读取输入，收集节点并排序，节点编号即排序后的位置；
+    2. 分块生成团边，边键为 小编号*n + 大编号（int64），缓冲区满时排序去重后溢写为一个有序段；
+    3. 对所有有序段分块做多路归并并去重，顺序写出边CSV和CSR图存储。
+
+节点按字符串排序编号，因此边键的大小顺序与 (节点1, 节点2) 字符串元组的排序一致，输出与内存模式逐字节相同。
+峰值内存由溢写段大小决定，与团的大小无关（超大的团按行分片生成）。
+"""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from graph_store import write_graph_store_from_blocks
+
+DEFAULT_RUN_EDGES = 4_000_000   # 每个溢写段的边键数上限（int64，约32MB）
+DEFAULT_CHUNKSIZE = 100_000     # 每次读取的记录数
+
+
+def iter_item_chunks(input_path, column: str, chunksize: int = DEFAULT_CHUNKSIZE):
+    """分块读取'|'分隔的列，逐块返回 (去空白、去空项后的元素（索引为记录行号）, 本块记录数)"""
+    for chunk in pd.read_csv(input_path, encoding='utf-8', usecols=[column], dtype=str, chunksize=chunksize):
+        # 与内存模式的 str(value) 一致：缺失值为'nan'
+        items = chunk[column].astype(str).str.split('|').explode().str.strip()
+        yield items[items != ''], len(chunk)
+
+
+def collect_nodes(input_path, column: str, chunksize: int = DEFAULT_CHUNKSIZE) -> tuple:
+    """所有节点名（排序、去重）
+
+    Returns:
+        tuple: (节点名数组, 记录数)
+    """
+    names, records = set(), 0
+    for items, rows in iter_item_chunks(input_path, column, chunksize):
+        names.update(items.unique())
+        records += rows
+    return np.array(sorted(names), dtype=object), records
+
+
+def clique_keys(ids: np.ndarray, lengths: np.ndarray, n: int, max_pairs: int):
+    """按记录生成团边键，每次产出不超过约 max_pairs 个
+
+    Args:
+        ids (ndarray): 各记录元素的节点编号依次拼接
+        lengths (ndarray): 各记录的元素数
+        n (int): 节点总数
+        max_pairs (int): 单个分块的边数上限
+    """
+    offsets = np.concatenate([[0], np.cumsum(lengths)])[:-1]
+    for k in np.unique(lengths):
+        k = int(k)
+        if k < 2:
+            continue
+        starts = offsets[lengths == k]
+        pairs_per_row = k * (k - 1) // 2
+        if pairs_per_row <= max_pairs:
+            # 同样长度的记录成批展开
+            iu, ju = np.triu_indices(k, 1)
+            rows_per_block = max(max_pairs // pairs_per_row, 1)
+            for s in range(0, len(starts), rows_per_block):
+                block = ids[starts[s:s + rows_per_block, None] + np.arange(k)]
+                a, b = block[:, iu].ravel(), block[:, ju].ravel()
+                yield np.minimum(a, b) * n + np.maximum(a, b)
+            continue
+        # 超大的团按行 i 分片：每片包含若干个 i 的 (i, j>i) 组合
+        step = max(max_pairs // k, 1)
+        for start in starts:
+            row = ids[start:start + k]
+            for i0 in range(0, k - 1, step):
+                i = np.arange(i0, min(i0 + step, k - 1))
+                counts = k - 1 - i
+                first = np.repeat(np.cumsum(counts) - counts, counts)
+                ii = np.repeat(i, counts)
+                jj = np.arange(len(ii)) - first + ii + 1
+                a, b = row[ii], row[jj]
+                yield np.minimum(a, b) * n + np.maximum(a, b)
+
+
+def spill_runs(input_path, column: str, node_index: pd.Index, run_dir: Path,
+               run_edges: int = DEFAULT_RUN_EDGES, chunksize: int = DEFAULT_CHUNKSIZE) -> list:
+    """生成团边并溢写为有序去重的段文件
+
+    Returns:
+        list: 段文件路径
+    """
+    n = len(node_index)
+    runs, buffer, buffered = [], [], 0
+
+    def flush():
+        nonlocal buffer, buffered
+        if buffered:
+            path = run_dir / f'run_{len(runs):05d}.npy'
+            np.save(path, np.unique(np.concatenate(buffer)))
+            runs.append(path)
+        buffer, buffered = [], 0
+
+    for items, _ in iter_item_chunks(input_path, column, chunksize):
+        ids = node_index.get_indexer(items.to_numpy()).astype(np.int64)
+        # explode 保持记录顺序，行号升序
+        _, lengths = np.unique(items.index.to_numpy(), return_counts=True)
+        for keys in clique_keys(ids, lengths, n, run_edges):
+            buffer.append(keys)
+            buffered += len(keys)
+            if buffered >= run_edges:
+                flush()
+    flush()
+    return runs
+
+
+def merge_runs(run_paths: list, block_edges: int = DEFAULT_RUN_EDGES):
+    """多路归并有序段并去重，逐块产出严格递增的边键
+
+    每轮从各段读取一块，以各块末尾的最小值为界，取出所有不超过该界的键合并去重；
+    大于该界的键留到下一轮，因此相邻两块之间不会重复。内存占用约为 block_edges 个键。
+    """
+    runs = [np.load(path, mmap_mode='r') for path in run_paths]
+    per_run = max(block_edges // max(len(runs), 1), 1024)
+    positions = [0] * len(runs)
+    while True:
+        heads = [(r, np.asarray(runs[r][positions[r]:positions[r] + per_run]))
+                 for r in range(len(runs)) if positions[r] < len(runs[r])]
+        if not heads:
+            return
+        bound = min(head[-1] for _, head in heads)
+        parts = []
+        for r, head in heads:
+            count = int(np.searchsorted(head, bound, side='right'))
+            parts.append(head[:count])
+            positions[r] += count
+        yield np.unique(np.concatenate(parts))
+
+
+def write_clique_network(input_path, output_dir, name: str, column: str,
+                         run_edges: int = DEFAULT_RUN_EDGES, chunksize: int = DEFAULT_CHUNKSIZE) -> dict:
+    """外存模式构建团网络（step 2.2 技术网络 / 2.3 合作研发网络），写出节点CSV、边CSV和CSR图存储
+
+    Args:
+        input_path (str/Path): 输入CSV文件路径
+        output_dir (str/Path): 输出目录
+        name (str): 网络名，如 technology
+        column (str): '|'分隔的列，如 IPC分类
+        run_edges (int): 溢写段及归并块的边键数上限
+        chunksize (int): 每次读取的记录数
+
+    Returns:
+        dict: 包含 records、nodes、edges、runs 及输出文件路径
+    """
+    output_dir = Path(output_dir)
+    nodes_path = output_dir / f'{name}_network_nodes.csv'
+    edges_path = output_dir / f'{name}_network_edges.csv'
+
+    nodes, records = collect_nodes(input_path, column, chunksize)
+    n = len(nodes)
+    pd.DataFrame({"节点": nodes}).to_csv(nodes_path, index=False, encoding='utf-8-sig')
+
+    with tempfile.TemporaryDirectory(prefix=f'.{name}_runs_', dir=output_dir) as tmp:
+        run_dir = Path(tmp)
+        runs = spill_runs(input_path, column, pd.Index(nodes), run_dir, run_edges, chunksize)
+
+        # 归并结果顺序写入一个键文件，供写CSV和两遍CSR构建顺序读取
+        merged_path = run_dir / 'merged.bin'
+        n_edges = 0
+        with open(merged_path, 'wb') as f:
+            for block in merge_runs(runs, run_edges):
+                f.write(block.astype(np.int64).tobytes())
+                n_edges += len(block)
+        for path in runs:
+            path.unlink()
+
+        def key_blocks():
+            if not n_edges:
+                return
+            merged = np.memmap(merged_path, dtype=np.int64, mode='r', shape=(n_edges,))
+            for start in range(0, n_edges, run_edges):
+                yield np.asarray(merged[start:start + run_edges])
+
+        with open(edges_path, 'w', encoding='utf-8-sig', newline='') as f:
+            header = True
+            for keys in key_blocks():
+                lo, hi = np.divmod(keys, n)
+                pd.DataFrame({"节点1": nodes[lo], "节点2": nodes[hi]}).to_csv(f, index=False, header=header)
+                header = False
+            if header:
+                pd.DataFrame(columns=["节点1", "节点2"]).to_csv(f, index=False)
+
+        write_graph_store_from_blocks(output_dir, name, nodes, key_blocks, edges_path=edges_path)
+
+    return {"records": records, "nodes": n, "edges": n_edges, "runs": len(runs),
+            "nodes_path": nodes_path, "edges_path": edges_path}
@@ -0,0 +1,98 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+PageRank结果缓存
+以图的CSR内容指纹和PageRank参数为键，把PageRank向量保存为磁盘上的 .npy 文件。
+缓存目录有总大小上限，超出时按最近使用时间（LRU）淘汰；命中时更新文件修改时间。
+图结构不变时，重复运行、参数扫描和notebook重复执行都可直接复用已算出的向量。
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+
+CACHE_VERSION = "v1"
+DEFAULT_CACHE_SIZE_MB = 1024
+
+
+def pagerank_cache_key(fingerprint: str, alpha: float, max_iter: int, tol: float) -> str:
+    """缓存键：图指纹 + PageRank参数"""
+    raw = f"{CACHE_VERSION}|{fingerprint}|{alpha!r}|{max_iter}|{tol!r}"
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def _evict(cache_dir: Path, max_size_bytes: int) -> int:
+    """按修改时间从旧到新删除缓存文件，直到总大小不超过上限
+
+    Returns:
+        int: 删除的文件数
+    """
+    entries = []
+    for path in cache_dir.glob('*.npy'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime_ns, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_size_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    return removed
+
+
+def load_cached_pagerank(graph, alpha: float, max_iter: int, tol: float, cache_dir):
+    """只查询缓存：命中时返回PageRank向量并刷新其使用时间，未命中返回 None"""
+    cache_path = Path(cache_dir) / f"{pagerank_cache_key(graph.fingerprint, alpha, max_iter, tol)}.npy"
+    try:
+        values = np.load(cache_path)
+    except (FileNotFoundError, ValueError, OSError):
+        return None
+    if len(values) != graph.n_nodes:
+        return None
+    os.utime(cache_path)
+    return values
+
+
+def cached_pagerank(graph, alpha: float = 0.85, max_iter: int = 100, tol: float = 1e-6,
+                    cache_dir=None, max_size_mb: float = DEFAULT_CACHE_SIZE_MB, nstart=None) -> tuple:
+    """带磁盘缓存的PageRank
+
+    Args:
+        graph (ArrayGraph): 图
+        alpha (float): 阻尼系数
+        max_iter (int): 最大迭代次数
+        tol (float): 收敛容差
+        cache_dir (str/Path): 缓存目录，为 None 时不使用缓存
+        max_size_mb (float): 缓存目录总大小上限（MB）
+        nstart (ndarray): 未命中缓存时幂迭代的初始向量
+
+    Returns:
+        tuple: (PageRank向量, 是否命中缓存)
+    """
+    if cache_dir is None:
+        return graph.pagerank(alpha=alpha, max_iter=max_iter, tol=tol, nstart=nstart), False
+
+    values = load_cached_pagerank(graph, alpha, max_iter, tol, cache_dir)
+    if values is not None:
+        return values, True
+
+    cache_dir = Path(cache_dir)
+    cache_path = cache_dir / f"{pagerank_cache_key(graph.fingerprint, alpha, max_iter, tol)}.npy"
+    values = graph.pagerank(alpha=alpha, max_iter=max_iter, tol=tol, nstart=nstart)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # 先写临时文件再替换，多个进程同时写同一个键时不会读到半截文件
+    tmp_path = cache_path.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp_path, 'wb') as f:
+        np.save(f, values)
+    os.replace(tmp_path, cache_path)
+    _evict(cache_dir, int(max_size_mb * 1024 ** 2))
+    return values, False
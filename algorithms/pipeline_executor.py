@@ -3,49 +3,159 @@
 此模块提供了一个统一的接口来执行完整的网络分析流程。
 """
 
+import os
+import sys
 import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 import pandas as pd
 
 # 导入所有步骤函数
 from step_1_clean_patent_data import clean_patent_data
+from step_1_applicant_resolution import MAPPING_FILENAME, resolve_applicant_entities
 from step_1_remove_personal_application import remove_personal_applications
+from step_1_ipc_rollup import rollup_ipc_classification
 from step_2_knowledge_network_construction import construct_knowledge_network
 from step_2_technology_network_construction import construct_technology_network
 from step_2_collaborative_RD_network_construction import construct_collaborative_RD_network
 from step_2_knowledge_technology_network_construction import construct_knowledge_technology_network
 from step_2_technology_collaborative_RD_network_construction import construct_technology_collaborative_RD_network
 from step_2_knowledge_collaborative_RD_network_construction import construct_knowledge_collaborative_RD_network
+from step_2_node_reordering import reorder_networks
 from step_3_network_layer_weights import calculate_network_weights
 from step_4_structural_hole_coupling_calculation import calculate_structural_hole
 from step_4_structural_hole_coupling_database_construction import build_structural_hole_database
-from step_4_criticality_index_calculation import calculate_criticality
 from step_5_centrality_coupling_calculation import calculate_centrality_coupling
 from step_5_centrality_coupling_database_construction import build_centrality_coupling_database
-from step_5_centrality_index_calculation import calculate_centrality_index
+from index_aggregation import calculate_criticality_and_centrality
+from numba_warmup import warm_up_kernels
 from step_6_criticality_and_centrality_database_construction import build_criticality_centrality_database
+from pipeline_planner import build_pipeline_plan, format_plan_report, plan_pipeline
 
 
-def run_full_pipeline(project_root=None):
+# 各数值计算库的线程数环境变量
+THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "NUMBA_NUM_THREADS",
+]
+
+
+def _normalize_params(params: dict) -> dict:
+    """将路径类参数统一转换为Path对象"""
+    return {
+        key: Path(value) if isinstance(value, str) and ('dir' in key or 'path' in key) else value
+        for key, value in params.items()
+    }
+
+
+def _variant_thread_budget(n_variants: int) -> int:
+    """按并行变体数均分CPU核数，得到每个变体的线程预算"""
+    return max(1, (os.cpu_count() or 1) // max(1, n_variants))
+
+
+@contextmanager
+def _thread_budget_env(threads: int):
+    """临时设置线程数环境变量，使子进程在导入Numba/BLAS前即受限"""
+    saved = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+    try:
+        for var in THREAD_ENV_VARS:
+            os.environ[var] = str(threads)
+        yield
+    finally:
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def _peak_memory_mb() -> float:
+    """当前进程的峰值常驻内存（MB），不支持的平台返回NaN"""
+    try:
+        import resource
+    except ImportError:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux下单位为KB，macOS下单位为字节
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _run_variant(func, params: dict) -> dict:
+    """在工作进程中执行单个变体，并记录耗时与峰值内存"""
+    start = time.perf_counter()
+    result = func(**params)
+    return {
+        "result": result,
+        "time": time.perf_counter() - start,
+        "peak_memory_mb": _peak_memory_mb()
+    }
+
+
+def run_multi_variants(func, base_params: dict, variants: list, max_workers=None) -> list:
+    """在进程池中并行执行multi_run的各个变体
+
+    Args:
+        func (callable): 步骤函数，需可被子进程按模块路径导入
+        base_params (dict): 各变体共享的参数
+        variants (list): 各变体的专有参数
+        max_workers (int, optional): 最大进程数，默认与变体数相同（不超过CPU核数）
+
+    Returns:
+        list: 与variants顺序一致的执行记录，包含参数、结果、耗时和峰值内存
     """
-    执行完整的网络分析流程
-    
+    max_workers = max_workers or min(len(variants), os.cpu_count() or 1)
+    threads = _variant_thread_budget(max_workers)
+    runs = [_normalize_params({**base_params, **run_params}) for run_params in variants]
+
+    # 使用spawn并限制每个进程只执行一个变体，保证峰值内存按变体独立统计
+    context = multiprocessing.get_context('spawn')
+    with _thread_budget_env(threads):
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                                 max_tasks_per_child=1) as executor:
+            futures = [executor.submit(_run_variant, func, params) for params in runs]
+            records = []
+            for run_params, future in zip(variants, futures):
+                record = future.result()
+                record["params"] = run_params
+                record["threads"] = threads
+                records.append(record)
+    return records
+
+
+def _apply_plan(plan: dict, steps: list) -> None:
+    """按预检结果调整后续步骤参数，超出内存预算时拒绝执行"""
+    if plan['refused']:
+        raise MemoryError(f"以下步骤超出内存预算，拒绝执行：{', '.join(plan['refused'])}")
+    clique_layers = {construct_technology_network: "technology",
+                     construct_collaborative_RD_network: "collaborative_R&D"}
+    for step in steps:
+        if step['func'] is calculate_structural_hole:
+            for run_params in step['multi_run']:
+                run_params['method'] = plan['structural_hole_methods'][run_params['network_type']]
+        if clique_layers.get(step['func']) in plan['out_of_core_layers']:
+            step['params']['out_of_core'] = True
+
+
+def build_pipeline_steps(data_root, ipc_level=None, node_order=None, resolve_applicants=False) -> list:
+    """构建完整流程的步骤配置
+
     Args:
-        project_root (Path, optional): 项目根目录。如果未指定，使用当前工作目录。
-    
+        data_root (str/Path): 数据根目录，其下为 input/ 和 stepN_output/
+        ipc_level (str): IPC分类归并层次（section/class/subclass/main_group），指定后在去除个人申请之后
+            增加归并步骤，step 2 各网络改用归并后的数据构建
+        node_order (str): 节点重排方式（degree/rcm/community），指定后在网络构建之后为各网络层的图存储计算重排
+        resolve_applicants (bool): 在数据清洗之后增加专利权人实体消解，1.2 改读消解后的数据并按实体共用分类结果
+
     Returns:
-        dict: 包含每个步骤执行结果的字典
+        list: 步骤配置列表，每项包含 name、func、params，需多次运行的步骤另含 multi_run
     """
-    # 设置路径
-    PROJECT_ROOT = Path(project_root) if project_root else Path.cwd()
-    DATA_ROOT = PROJECT_ROOT / 'data'
-    
-    # 确保所有必要的目录存在
-    for step in range(1, 8):
-        (DATA_ROOT / f'step{step}_output').mkdir(parents=True, exist_ok=True)
-    
-    # 定义步骤配置
+    DATA_ROOT = Path(data_root)
     steps = [
         {
             "name": "1.1 数据清洗",
@@ -140,14 +250,6 @@ def run_full_pipeline(project_root=None):
                 "step4_dir": str(DATA_ROOT / 'step4_output')
             }
         },
-        {
-            "name": "4.3 关键性指数计算",
-            "func": calculate_criticality,
-            "params": {
-                "step2_dir": str(DATA_ROOT / 'step2_output'),
-                "step4_dir": str(DATA_ROOT / 'step4_output')
-            }
-        },
         {
             "name": "5.1 中心性耦合计算",
             "func": calculate_centrality_coupling,
@@ -165,10 +267,12 @@ def run_full_pipeline(project_root=None):
             }
         },
         {
-            "name": "5.3 中心性指数计算",
-            "func": calculate_centrality_index,
+            # 4.3 与 5.3 共用层间邻居算子，在5.2之后一次计算
+            "name": "4.3/5.3 关键性与中心性指数计算",
+            "func": calculate_criticality_and_centrality,
             "params": {
                 "step2_dir": str(DATA_ROOT / 'step2_output'),
+                "step4_dir": str(DATA_ROOT / 'step4_output'),
                 "step5_dir": str(DATA_ROOT / 'step5_output')
             }
         },
@@ -182,12 +286,88 @@ def run_full_pipeline(project_root=None):
             }
         }
     ]
+
+    if resolve_applicants:
+        # 同一机构的不同写法合并为规范名称：减少 1.2 的API调用和合作研发网络的节点数
+        resolved_path = str(DATA_ROOT / 'step1_output' / 'patent_data_resolved.csv')
+        mapping_path = str(DATA_ROOT / 'step1_output' / MAPPING_FILENAME)
+        position = next(k for k, step in enumerate(steps) if step['name'].startswith('1.2'))
+        steps.insert(position, {
+            "name": "1.1.1 专利权人实体消解",
+            "func": resolve_applicant_entities,
+            "params": {
+                "input_path": str(DATA_ROOT / 'step1_output' / 'patent_data_cleaned.csv'),
+                "output_path": resolved_path,
+                "mapping_path": mapping_path
+            }
+        })
+        steps[position + 1]['params']['input_path'] = resolved_path
+        steps[position + 1]['params']['mapping_path'] = mapping_path
+
+    if ipc_level:
+        # 在较粗的IPC层次上构建技术网络及其耦合网络：step 2 全部改读归并后的数据
+        rolled_path = str(DATA_ROOT / 'step1_output' / f'patent_data_ipc_{ipc_level}.csv')
+        position = next(k for k, step in enumerate(steps) if step['name'].startswith('1.2')) + 1
+        steps.insert(position, {
+            "name": "1.3 IPC分类粒度归并",
+            "func": rollup_ipc_classification,
+            "params": {
+                "input_path": str(DATA_ROOT / 'step1_output' / 'patent_data_selected_columns.csv'),
+                "output_path": rolled_path,
+                "level": ipc_level
+            }
+        })
+        for step in steps:
+            if step['name'].startswith('2.'):
+                step['params']['input_path'] = rolled_path
+
+    if node_order:
+        position = next(k for k, step in enumerate(steps) if step['name'].startswith('3.'))
+        steps.insert(position, {
+            "name": "2.7 节点重排",
+            "func": reorder_networks,
+            "params": {
+                "input_dir": str(DATA_ROOT / 'step2_output'),
+                "method": node_order
+            }
+        })
+    return steps
+
+
+def run_full_pipeline(project_root=None, memory_budget_gb=None, ipc_level=None, node_order=None,
+                      resolve_applicants=False):
+    """
+    执行完整的网络分析流程
     
+    Args:
+        project_root (Path, optional): 项目根目录。如果未指定，使用当前工作目录。
+        memory_budget_gb (float, optional): 内存预算（GB）。指定后在数据清洗完成后执行预检，
+            结构洞计算按预算自动选择稠密或稀疏方式，超出预算的步骤拒绝执行。
+        ipc_level (str, optional): IPC分类归并层次，指定后技术网络及其耦合网络在该层次上构建。
+        node_order (str, optional): 节点重排方式，指定后PageRank和结构洞计算在重排后的编号上进行，输出顺序不变。
+        resolve_applicants (bool, optional): 是否在数据清洗之后执行专利权人实体消解，默认不执行。
+    
+    Returns:
+        dict: 包含每个步骤执行结果的字典
+    """
+    # 设置路径
+    PROJECT_ROOT = Path(project_root) if project_root else Path.cwd()
+    DATA_ROOT = PROJECT_ROOT / 'data'
+    
+    # 确保所有必要的目录存在
+    for step in range(1, 8):
+        (DATA_ROOT / f'step{step}_output').mkdir(parents=True, exist_ok=True)
+    
+    # 定义步骤配置
+    steps = build_pipeline_steps(DATA_ROOT, ipc_level, node_order, resolve_applicants)
+
     results = {}
     start_time = time.time()
     
     print(f"\n开始执行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"项目根目录: {PROJECT_ROOT}")
+    # 预编译Numba内核并写入磁盘缓存，各步骤及其工作进程直接加载
+    warm_up_kernels()
     print("\n" + "="*80 + "\n")
     
     for step in steps:
@@ -197,6 +377,8 @@ def run_full_pipeline(project_root=None):
         try:
             # 验证输入文件/目录是否存在
             for param_name, param_value in step['params'].items():
+                if not isinstance(param_value, str):  # 预检设置的开关等非路径参数
+                    continue
                 if 'dir' not in param_name and Path(param_value).suffix:  # 如果是文件路径
                     input_path = Path(param_value)
                     if 'input' in param_name and not input_path.exists():
@@ -205,16 +387,30 @@ def run_full_pipeline(project_root=None):
                     Path(param_value).mkdir(parents=True, exist_ok=True)
             
             # 执行函数
+            variants = None
             if 'multi_run' in step:
-                # 需要多次运行的步骤（如结构洞计算）
-                for run_params in step['multi_run']:
-                    params = {**step['params'], **run_params}
-                    result = step['func'](**params)
-                    print(f"✓ {step['name']} ({run_params}) 执行成功")
+                # 需要多次运行的步骤（如结构洞计算），各变体在进程池中并行执行
+                variants = run_multi_variants(step['func'], step['params'], step['multi_run'])
+                for variant in variants:
+                    print(f"✓ {step['name']} ({variant['params']}) 执行完成 | "
+                          f"耗时: {variant['time']:.2f}秒 | 峰值内存: {variant['peak_memory_mb']:.1f}MB | "
+                          f"线程数: {variant['threads']}")
+                    print(f"  结果: {variant['result']}")
+                result = [variant['result'] for variant in variants]
             else:
                 # 普通步骤
-                result = step['func'](**step['params'])
+                result = step['func'](**_normalize_params(step['params']))
             
+            # 数据清洗完成后按内存预算预检
+            if step['func'] is clean_patent_data and memory_budget_gb is not None:
+                plan = build_pipeline_plan(
+                    input_path=step['params']['output_path'],
+                    cache_path=DATA_ROOT / 'step1_output' / 'org_classification_cache.json',
+                    memory_budget_gb=memory_budget_gb
+                )
+                print(format_plan_report(plan))
+                _apply_plan(plan, steps)
+
             # 验证输出
             if isinstance(result, str):
                 print(f"结果: {result}")
@@ -224,6 +420,8 @@ def run_full_pipeline(project_root=None):
                 "time": time.time() - step_start,
                 "result": result
             }
+            if variants is not None:
+                results[step['name']]["variants"] = variants
             
         except Exception as e:
             error_msg = f"执行失败: {str(e)}"
@@ -260,5 +458,45 @@ def run_full_pipeline(project_root=None):
 
 
 if __name__ == '__main__':
-    # 如果直接运行此文件，执行完整流程
-    pipeline_results = run_full_pipeline() 
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description='网络分析流程执行器')
+    subparsers = parser.add_subparsers(dest='command')
+
+    run_parser = subparsers.add_parser('run', help='执行完整流程（默认）')
+    run_parser.add_argument('--project_root', type=str, help='项目根目录')
+    run_parser.add_argument('--memory_budget_gb', type=float, help='内存预算（GB）')
+    run_parser.add_argument('--ipc_level', type=str, choices=['section', 'class', 'subclass', 'main_group'],
+                            help='IPC分类归并层次，默认使用原始编码')
+    run_parser.add_argument('--node_order', type=str, choices=['degree', 'rcm', 'community'],
+                            help='网络层节点重排方式，默认不重排')
+    run_parser.add_argument('--resolve_applicants', action='store_true',
+                            help='数据清洗之后执行专利权人实体消解，默认不执行')
+
+    plan_parser = subparsers.add_parser('plan', help='流程预检：估算规模、内存、API调用和耗时')
+    plan_parser.add_argument('--project_root', type=str, help='项目根目录')
+    plan_parser.add_argument('--input', type=str, help='清洗后的专利数据CSV路径')
+    plan_parser.add_argument('--memory_budget_gb', type=float, help='内存预算（GB）')
+    plan_parser.add_argument('--costs', type=str, help='标定的操作耗时JSON路径')
+    plan_parser.add_argument('--resolve_applicants', action='store_true',
+                             help='按上次专利权人实体消解的映射表估算API调用数')
+
+    args = parser.parse_args()
+    if args.command == 'plan':
+        data_root = (Path(args.project_root) if args.project_root else Path.cwd()) / 'data'
+        plan_pipeline(
+            input_path=args.input or data_root / 'step1_output' / 'patent_data_cleaned.csv',
+            cache_path=data_root / 'step1_output' / 'org_classification_cache.json',
+            memory_budget_gb=args.memory_budget_gb,
+            costs_path=args.costs,
+            mapping_path=data_root / 'step1_output' / MAPPING_FILENAME if args.resolve_applicants else None
+        )
+    else:
+        # 如果直接运行此文件，执行完整流程
+        pipeline_results = run_full_pipeline(
+            project_root=getattr(args, 'project_root', None),
+            memory_budget_gb=getattr(args, 'memory_budget_gb', None),
+            ipc_level=getattr(args, 'ipc_level', None),
+            node_order=getattr(args, 'node_order', None),
+            resolve_applicants=getattr(args, 'resolve_applicants', False)
+        ) 
\ No newline at end of file
@@ -0,0 +1,460 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+流程预检与容量规划
+在执行完整流程前低成本扫描清洗后的专利数据，估算各网络层规模、稠密矩阵内存、
+待调用的API次数以及各步骤耗时，并在超出内存预算时切换到稀疏计算/外存构建或拒绝执行。
+"""
+
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from applicant_resolution import load_entity_ids
+from out_of_core_edges import DEFAULT_RUN_EDGES
+
+# 各类基本操作的单位耗时（秒/次），在开发机上标定，可通过 calibrate_operation_costs 重新标定
+OPERATION_COSTS = {
+    "api_call": 1.5,            # 单次DeepSeek分类请求
+    "row_iter": 2.0e-5,         # DataFrame.iterrows 单行
+    "pair_insert": 6.0e-7,      # 生成并插入一条排序元组边
+    "pair_spill": 1.7e-6,       # 外存模式一条团边的生成、溢写、归并及写出（含CSV与CSR）
+    "pagerank_edge": 1.0e-8,    # 数组图 PageRank 单个CSR条目单次迭代
+    "dense_cell": 2.0e-9,       # 稠密矩阵单元素（初始化/遍历）
+    "dense_inner": 1.0e-9,      # 稠密限制度内层循环单次乘加
+    "sparse_inner": 3.0e-9,     # 稀疏限制度内层循环单次访问
+    "mask_cell": 1.5e-9,        # pandas 布尔掩码单元素比较
+    "store_node": 5.0e-7,       # 由图存储读取单个节点的度数（节点CSV读入、indptr差分及结果写出）
+    "pair_aggregate": 4.0e-7,   # 层间邻居算子单个 (节点, 邻居) 对的构建与聚合
+}
+
+# 估算所用的经验常数
+API_WORKERS = 2                 # step 1.2 线程池并发数
+PAGERANK_ITERATIONS = 50        # PageRank 典型迭代次数
+STEP3_OUTER_ITERATIONS = 20     # step 3 外层不动点迭代的典型次数
+DENSE_BYTES_PER_CELL = 20       # 邻接(4) + 概率(4) + 临时(4) + 限制度(8)
+SPARSE_BYTES_PER_EDGE = 16      # 双向CSR列索引（int64）
+SPARSE_BYTES_PER_NODE = 32      # indptr + 行缓存 + 结果
+CSR_BYTES_PER_EDGE = 32         # 双向条目：列索引(4) + 行号(4) + 迭代中间量(8)
+CSR_BYTES_PER_NODE = 150        # 节点名对象 + 各PageRank向量
+PAIR_BYTES = 150                # Python 集合中一条 (str, str) 元组边
+SPILL_BYTES_PER_KEY = 120       # 外存模式每个溢写/归并块键的峰值内存（排序、双向展开等临时数组）
+CLIQUE_LAYERS = ["technology", "collaborative_R&D"]   # 可外存构建的团网络
+
+LAYERS = ["knowledge", "technology", "collaborative_R&D"]
+COUPLINGS = ["knowledge-technology", "technology-collaborative_R&D", "knowledge-collaborative_R&D"]
+
+_BRACKET_PATTERN = re.compile(r"\(.*?\)|（.*?）")
+
+
+def _total_memory_bytes() -> int:
+    """物理内存总量，无法获取时返回0"""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return 0
+
+
+def _split_lists(series: pd.Series, strip_brackets: bool = False) -> pd.Series:
+    """将'|'分隔的列拆分为去空白后的列表"""
+    text = series.fillna('').astype(str)
+    if strip_brackets:
+        text = text.str.replace(_BRACKET_PATTERN, '', regex=True)
+    return text.str.split('|').map(lambda items: [x.strip() for x in items if x.strip()])
+
+
+def _hash_unique(values: list) -> np.ndarray:
+    """将字符串哈希为uint64并去重，避免在内存中保留大量字符串"""
+    if not values:
+        return np.empty(0, dtype=np.uint64)
+    return np.unique(pd.util.hash_array(np.asarray(values, dtype=object)))
+
+
+def scan_patent_data(input_path, chunksize: int = 200_000) -> dict:
+    """分块扫描专利数据，统计各网络层的节点数与边数上界
+
+    节点数为精确去重值（基于64位哈希），边数为未去重的上界。
+    """
+    input_path = Path(input_path)
+    if not input_path.exists():
+        raise FileNotFoundError(f"输入文件不存在：{input_path}")
+
+    columns = ["公开（公告）号", "引文专利公开号", "施引专利公开号", "IPC分类", "专利权人"]
+    knowledge_hashes, ipc_hashes = [], []
+    applicants = set()
+    edges = {name: 0 for name in LAYERS + COUPLINGS}
+    max_clique = {"technology": 0, "collaborative_R&D": 0}
+    patents = 0
+
+    for chunk in pd.read_csv(input_path, encoding='utf-8', usecols=columns, dtype=str, chunksize=chunksize):
+        patents += len(chunk)
+        patent_ids = chunk["公开（公告）号"].fillna('').astype(str).str.replace(_BRACKET_PATTERN, '', regex=True).str.strip()
+        cited = _split_lists(chunk["引文专利公开号"], strip_brackets=True)
+        citing = _split_lists(chunk["施引专利公开号"], strip_brackets=True)
+        ipcs = _split_lists(chunk["IPC分类"])
+        apps = _split_lists(chunk["专利权人"])
+
+        n_cited = cited.map(len).to_numpy()
+        n_citing = citing.map(len).to_numpy()
+        n_ipc = ipcs.map(len).to_numpy()
+        n_app = apps.map(len).to_numpy()
+
+        knowledge_hashes.append(_hash_unique(
+            patent_ids.tolist() + [x for items in cited for x in items] + [x for items in citing for x in items]
+        ))
+        ipc_hashes.append(_hash_unique([x for items in ipcs for x in items]))
+        applicants.update(x for items in apps for x in items)
+
+        edges["knowledge"] += int((n_cited + n_citing).sum())
+        edges["technology"] += int((n_ipc * (n_ipc - 1) // 2).sum())
+        edges["collaborative_R&D"] += int((n_app * (n_app - 1) // 2).sum())
+        edges["knowledge-technology"] += int(n_ipc.sum())
+        edges["technology-collaborative_R&D"] += int((n_ipc * n_app).sum())
+        edges["knowledge-collaborative_R&D"] += int(n_app.sum())
+        max_clique["technology"] = max(max_clique["technology"], int(n_ipc.max(initial=0)))
+        max_clique["collaborative_R&D"] = max(max_clique["collaborative_R&D"], int(n_app.max(initial=0)))
+
+    nodes = {
+        "knowledge": len(np.unique(np.concatenate(knowledge_hashes))) if knowledge_hashes else 0,
+        "technology": len(np.unique(np.concatenate(ipc_hashes))) if ipc_hashes else 0,
+        "collaborative_R&D": len(applicants),
+    }
+    # 无向简单图的边数不超过 n(n-1)/2
+    for layer in LAYERS:
+        edges[layer] = min(edges[layer], nodes[layer] * (nodes[layer] - 1) // 2 + nodes[layer])
+
+    return {
+        "patents": patents,
+        "nodes": nodes,
+        "edges": edges,
+        "max_clique": max_clique,
+        "applicants": applicants,
+    }
+
+
+def count_uncached_names(applicants: set, cache_path, mapping_path=None) -> int:
+    """统计尚未在分类缓存中的申请人名称数（step 1.2 的API调用上界）
+
+    与 step 1.2 一致：默认逐个名称查询缓存；提供实体消解映射表时按实体编号计数，
+    同一实体的名称只调用一次，实体已有缓存结果时不再调用（映射表尚未生成时仍按名称计）。
+    """
+    cache_path = Path(cache_path)
+    cached = {}
+    if cache_path.exists():
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f).get('mapping', {})
+    if mapping_path is None or not Path(mapping_path).exists():
+        return len(set(applicants) - set(cached))
+    entity_ids = load_entity_ids(mapping_path)
+    keys = {entity_ids.get(name, name) for name in applicants}
+    cached_keys = {entity_ids.get(name, name) for name in cached}
+    return len(keys - cached_keys)
+
+
+def load_operation_costs(costs_path=None) -> dict:
+    """加载标定的操作耗时，未提供时使用内置默认值"""
+    costs = dict(OPERATION_COSTS)
+    if costs_path and Path(costs_path).exists():
+        with open(costs_path, 'r', encoding='utf-8') as f:
+            costs.update(json.load(f))
+    return costs
+
+
+def calibrate_operation_costs(output_path=None, size: int = 400) -> dict:
+    """在当前机器上测量各类基本操作的单位耗时
+
+    Args:
+        output_path (str/Path, optional): 标定结果JSON的保存路径
+        size (int): 标定用的数据规模
+
+    Returns:
+        dict: 操作名到单位耗时（秒）的映射，API调用耗时保持默认值
+    """
+    import networkx as nx
+    from array_graph import ArrayGraph, PowerIterationFailedConvergence
+
+    costs = dict(OPERATION_COSTS)
+    rng = np.random.default_rng(0)
+
+    def timed(func):
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+
+    df = pd.DataFrame({"a": np.arange(size * 10).astype(str)})
+    costs["row_iter"] = timed(lambda: [row for _, row in df.iterrows()]) / len(df)
+
+    names = [f"N{i}" for i in range(size)]
+    pairs = size * (size - 1) // 2
+    costs["pair_insert"] = timed(lambda: {
+        tuple(sorted([names[i], names[j]])) for i in range(size) for j in range(i + 1, size)
+    }) / pairs
+
+    graph = ArrayGraph.from_networkx(nx.gnm_random_graph(size * 10, size * 50, seed=0))
+
+    def fixed_pagerank():
+        # tol=0 时恰好迭代 PAGERANK_ITERATIONS 次
+        try:
+            graph.pagerank(max_iter=PAGERANK_ITERATIONS, tol=0)
+        except PowerIterationFailedConvergence:
+            pass
+
+    costs["pagerank_edge"] = timed(fixed_pagerank) / (len(graph.indices) * PAGERANK_ITERATIONS)
+
+    from step_4_structural_hole_coupling_calculation import (
+        constraint_kernel, calculate_constraint_sparse, calculate_probability_matrix
+    )
+    adj = (rng.random((size, size)) < 0.02).astype(np.float32)
+    adj = np.maximum(adj, adj.T)
+    prob = calculate_probability_matrix(adj)
+    nnz = int(np.count_nonzero(adj))
+    costs["dense_cell"] = timed(lambda: np.zeros_like(adj).sum()) / adj.size
+    constraint_kernel(np.zeros((2, 2), dtype=np.float32))  # 预编译
+    costs["dense_inner"] = max(timed(lambda: constraint_kernel(prob)) - adj.size * costs["dense_cell"], 0) \
+        / (nnz * size)
+    rows, cols = np.nonzero(adj)
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+    indices = cols.astype(np.int64)
+    calculate_constraint_sparse(indptr[:1], indices[:0])  # 预编译
+    costs["sparse_inner"] = timed(lambda: calculate_constraint_sparse(indptr, indices)) \
+        / (nnz * nnz / size)
+
+    column = pd.Series(rng.integers(0, size, size * 1000))
+    costs["mask_cell"] = timed(lambda: [(column == k).sum() for k in range(10)]) / (len(column) * 10)
+
+    import io
+    store_nodes = pd.DataFrame({"节点": np.arange(size * 100).astype(str)})
+    store_indptr = np.cumsum(rng.integers(0, 10, len(store_nodes) + 1))
+    costs["store_node"] = timed(lambda: store_nodes.assign(centrality_coupling=np.diff(store_indptr)).to_csv(
+        io.StringIO(), index=False)) / len(store_nodes)
+
+    import tempfile
+    from out_of_core_edges import write_clique_network
+    cliques = pd.DataFrame({"IPC分类": ["|".join(names[j] for j in rng.choice(size, 40, replace=False))
+                                        for _ in range(size)]})
+    with tempfile.TemporaryDirectory() as tmp:
+        cliques.to_csv(Path(tmp) / "cliques.csv", index=False)
+        start = time.perf_counter()
+        spilled = write_clique_network(Path(tmp) / "cliques.csv", tmp, "calibration", "IPC分类",
+                                       run_edges=size * 100)["edges"]
+        costs["pair_spill"] = (time.perf_counter() - start) / max(spilled, 1)
+
+    from index_aggregation import InterLayerOperator
+    coupling = pd.DataFrame({'节点1': rng.integers(0, size, size * 100).astype(str),
+                             '节点2': (rng.integers(0, size, size * 100) + size).astype(str)})
+    values = pd.DataFrame({'a': rng.random(2 * size), 'b': rng.random(2 * size)},
+                          index=np.arange(2 * size).astype(str))
+    costs["pair_aggregate"] = timed(
+        lambda: InterLayerOperator.from_edges(np.arange(size).astype(str), [coupling]).apply(values)
+    ) / (2 * len(coupling))
+
+    if output_path:
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(costs, f, ensure_ascii=False, indent=2)
+    return costs
+
+
+def estimate_pipeline_cost(stats: dict, costs: dict, uncached_names: int, memory_budget: int,
+                           graph_store: bool = True) -> list:
+    """根据扫描统计估算各步骤的内存与耗时，并决定step 4.1的计算方式
+
+    Args:
+        graph_store (bool): step 5.1 能否从图存储（或超图关联矩阵）读取度数；step 2 总会写出图存储，
+            为 False 时按逐节点布尔掩码估算
+
+    Returns:
+        list: 每个步骤一条记录，包含 step、memory、seconds、mode、action
+    """
+    n, e = stats["nodes"], stats["edges"]
+    rows = stats["patents"]
+    plan = []
+
+    def add(step, memory, seconds, mode="default", action="run"):
+        plan.append({"step": step, "memory": int(memory), "seconds": float(seconds),
+                     "mode": mode, "action": action})
+
+    add("1.2 去除个人申请", 0, uncached_names * costs["api_call"] / API_WORKERS + rows * costs["row_iter"])
+
+    # step 2：团网络的边集合超出预算时切换为外存构建（峰值内存只取决于溢写段大小）
+    for name in LAYERS + COUPLINGS:
+        memory = e[name] * PAIR_BYTES
+        seconds = rows * costs["row_iter"] + e[name] * costs["pair_insert"]
+        if memory <= memory_budget:
+            add(f"2 {name} 网络构建", memory, seconds)
+            continue
+        spill_memory = DEFAULT_RUN_EDGES * SPILL_BYTES_PER_KEY + n.get(name, 0) * CSR_BYTES_PER_NODE
+        if name in CLIQUE_LAYERS and spill_memory <= memory_budget:
+            add(f"2 {name} 网络构建", spill_memory, e[name] * costs["pair_spill"],
+                mode="out_of_core", action="switch")
+        else:
+            add(f"2 {name} 网络构建", memory, seconds, action="refuse")
+
+    # step 3：CSR数组图，PageRank只计算一次，耦合效应为按层间边的向量累加
+    csr_memory = sum(n[l] * CSR_BYTES_PER_NODE + e[l] * CSR_BYTES_PER_EDGE for l in LAYERS)
+    csr_memory += sum(e[c] * CSR_BYTES_PER_EDGE for c in COUPLINGS)
+    step3_seconds = (
+        sum(2 * e[l] for l in LAYERS) * PAGERANK_ITERATIONS * costs["pagerank_edge"]
+        + STEP3_OUTER_ITERATIONS * sum(2 * e[c] for c in COUPLINGS) * costs["pagerank_edge"]
+    )
+    add("3.1 网络权重计算", csr_memory, step3_seconds,
+        action="run" if csr_memory <= memory_budget else "refuse")
+
+    # step 4.1：稠密矩阵超出预算时自动切换为稀疏计算
+    for layer in LAYERS:
+        nodes, edges = n[layer], e[layer]
+        dense_memory = nodes * nodes * DENSE_BYTES_PER_CELL
+        dense_seconds = nodes * nodes * costs["dense_cell"] + 2 * edges * nodes * costs["dense_inner"]
+        sparse_memory = 2 * edges * SPARSE_BYTES_PER_EDGE + nodes * SPARSE_BYTES_PER_NODE
+        avg_degree = 2 * edges / nodes if nodes else 0
+        sparse_seconds = 2 * edges * avg_degree * costs["sparse_inner"]
+        if dense_memory <= memory_budget:
+            add(f"4.1 {layer} 结构洞计算", dense_memory, dense_seconds, mode="dense")
+        elif sparse_memory <= memory_budget:
+            add(f"4.1 {layer} 结构洞计算", sparse_memory, sparse_seconds, mode="sparse", action="switch")
+        else:
+            add(f"4.1 {layer} 结构洞计算", sparse_memory, sparse_seconds, mode="sparse", action="refuse")
+
+    # step 5.1：度数即图存储的CSR行长度，O(n) 读取；没有图存储时逐节点对层内边表做布尔掩码
+    if graph_store:
+        add("5.1 中心性耦合计算", sum(n[l] for l in LAYERS) * CSR_BYTES_PER_NODE,
+            sum(n[l] for l in LAYERS) * costs["store_node"])
+    else:
+        add("5.1 中心性耦合计算", 0, sum(n[l] * e[l] * 2 for l in LAYERS) * costs["mask_cell"])
+
+    # step 4.3 / 5.3：每层由两个耦合网络的边构建一次层间邻居算子（双向展开），两个指标一次聚合
+    layer_couplings = {
+        "knowledge": ["knowledge-technology", "knowledge-collaborative_R&D"],
+        "technology": ["knowledge-technology", "technology-collaborative_R&D"],
+        "collaborative_R&D": ["knowledge-collaborative_R&D", "technology-collaborative_R&D"],
+    }
+    index_pairs = sum(2 * e[c] for l in LAYERS for c in layer_couplings[l])
+    add("4.3/5.3 关键性与中心性指数计算", index_pairs * PAIR_BYTES, index_pairs * costs["pair_aggregate"])
+    return plan
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ["B", "KB", "MB", "GB", "TB"]:
+        if size < 1024 or unit == "TB":
+            return f"{size:.1f}{unit}"
+        size /= 1024
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds < 120:
+        return f"{seconds:.1f}秒"
+    if seconds < 7200:
+        return f"{seconds / 60:.1f}分钟"
+    return f"{seconds / 3600:.1f}小时"
+
+
+def build_pipeline_plan(input_path=None, cache_path=None, memory_budget_gb=None, costs_path=None,
+                        mapping_path=None) -> dict:
+    """扫描输入并生成执行计划
+
+    Args:
+        input_path (str/Path): 清洗后的专利数据，默认'../data/step1_output/patent_data_cleaned.csv'
+        cache_path (str/Path): 机构分类缓存，默认与输入文件同目录下的 org_classification_cache.json
+        memory_budget_gb (float): 内存预算（GB），默认取物理内存的80%
+        costs_path (str/Path): 标定的操作耗时JSON
+        mapping_path (str/Path): 专利权人实体消解映射表，提供时API调用数按实体计
+
+    Returns:
+        dict: 包含扫描统计、API调用数、内存预算和逐步骤计划
+    """
+    input_path = Path(input_path) if input_path else Path('../data/step1_output/patent_data_cleaned.csv')
+    cache_path = Path(cache_path) if cache_path else input_path.parent / 'org_classification_cache.json'
+    if memory_budget_gb:
+        memory_budget = int(memory_budget_gb * 1024 ** 3)
+    else:
+        memory_budget = int(_total_memory_bytes() * 0.8) or 8 * 1024 ** 3
+
+    stats = scan_patent_data(input_path)
+    uncached_names = count_uncached_names(stats["applicants"], cache_path, mapping_path)
+    steps = estimate_pipeline_cost(stats, load_operation_costs(costs_path), uncached_names, memory_budget)
+
+    return {
+        "patents": stats["patents"],
+        "nodes": stats["nodes"],
+        "edges": stats["edges"],
+        "max_clique": stats["max_clique"],
+        "api_calls": uncached_names,
+        "memory_budget": memory_budget,
+        "steps": steps,
+        "structural_hole_methods": dict(zip(LAYERS, [s["mode"] for s in steps if s["step"].startswith("4.1")])),
+        "out_of_core_layers": [name for name in CLIQUE_LAYERS
+                               if any(s["step"] == f"2 {name} 网络构建" and s["mode"] == "out_of_core"
+                                      for s in steps)],
+        "refused": [s["step"] for s in steps if s["action"] == "refuse"],
+    }
+
+
+def format_plan_report(plan: dict) -> str:
+    """将执行计划格式化为文本报告"""
+    lines = [
+        "流程预检报告",
+        f"专利数：{plan['patents']}条 | 内存预算：{_format_bytes(plan['memory_budget'])}",
+        f"待调用API次数（未缓存的申请人名称，上界）：{plan['api_calls']}",
+        "",
+        "网络规模（节点数精确，边数为上界）：",
+    ]
+    for layer in LAYERS:
+        nodes = plan['nodes'][layer]
+        lines.append(f"  {layer}: 节点 {nodes} | 边 ≤{plan['edges'][layer]} | "
+                     f"稠密矩阵 {_format_bytes(nodes * nodes * DENSE_BYTES_PER_CELL)}")
+    for coupling in COUPLINGS:
+        lines.append(f"  {coupling}: 边 ≤{plan['edges'][coupling]}")
+    lines.append(f"  最大团规模：IPC {plan['max_clique']['technology']} | 申请人 {plan['max_clique']['collaborative_R&D']}")
+    lines.append("")
+    lines.append("步骤估算：")
+    action_text = {"run": "执行", "switch": "切换为稀疏计算", "refuse": "拒绝执行（超出内存预算）"}
+    for step in plan['steps']:
+        action = "切换为外存构建" if step['mode'] == "out_of_core" else action_text[step['action']]
+        lines.append(f"  {step['step']}: 内存 {_format_bytes(step['memory'])} | "
+                     f"耗时 {_format_seconds(step['seconds'])} | {action}")
+    total = sum(step['seconds'] for step in plan['steps'])
+    lines.append(f"预计总耗时：{_format_seconds(total)}")
+    return "\n".join(lines)
+
+
+def plan_pipeline(input_path=None, cache_path=None, memory_budget_gb=None, costs_path=None, mapping_path=None):
+    """执行流程预检并输出报告
+
+    Returns:
+        str: 预检报告
+    """
+    try:
+        plan = build_pipeline_plan(input_path, cache_path, memory_budget_gb, costs_path, mapping_path)
+        report = format_plan_report(plan)
+        print(report)
+        return report
+    except Exception as e:
+        error_msg = f"流程预检失败：{str(e)}"
+        print(error_msg)
+        return error_msg
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='流程预检与容量规划')
+    parser.add_argument('--input', type=str, help='清洗后的专利数据CSV路径')
+    parser.add_argument('--cache', type=str, help='机构分类缓存路径')
+    parser.add_argument('--memory_budget_gb', type=float, help='内存预算（GB）')
+    parser.add_argument('--costs', type=str, help='标定的操作耗时JSON路径')
+    parser.add_argument('--mapping', type=str, help='专利权人实体消解映射表路径，提供时API调用数按实体计')
+    parser.add_argument('--calibrate', type=str, help='重新标定操作耗时并保存到该路径')
+
+    args = parser.parse_args()
+    if args.calibrate:
+        calibrate_operation_costs(args.calibrate)
+        args.costs = args.costs or args.calibrate
+    plan_pipeline(args.input, args.cache, args.memory_budget_gb, args.costs, args.mapping)
@@ -0,0 +1,240 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+规模曲线分析
+按若干抽样比例对真实输入运行完整流程或指定步骤，拟合各步骤耗时的经验复杂度指数，
+并外推到目标语料规模，找出届时占主导的步骤。
+"""
+
+import json
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline_executor import build_pipeline_steps, _normalize_params
+
+LAYERS = ["knowledge", "technology", "collaborative_R&D"]
+
+
+def _is_failure(result) -> bool:
+    """步骤函数以返回错误信息字符串的方式报告失败"""
+    results = result if isinstance(result, list) else [result]
+    return any(isinstance(r, str) and ('失败' in r or '错误' in r) for r in results)
+
+
+def _count_rows(path: Path) -> int:
+    """统计CSV数据行数（不含表头）"""
+    if not path.exists():
+        return 0
+    with open(path, 'rb') as f:
+        return max(sum(1 for _ in f) - 1, 0)
+
+
+def sample_patent_data(input_path, output_path, fraction: float, seed: int = 42) -> int:
+    """按比例无放回抽样专利记录
+
+    Returns:
+        int: 抽样后的专利数
+    """
+    df = pd.read_csv(input_path, encoding='utf-8')
+    sample = df.sample(frac=fraction, random_state=seed) if fraction < 1 else df
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    sample.to_csv(output_path, index=False, encoding='utf-8-sig')
+    return len(sample)
+
+
+def fit_power_law(x, t) -> dict:
+    """在对数坐标下拟合 t = c · x^k
+
+    Returns:
+        dict: exponent（k）、coefficient（c）和拟合优度 r2；有效点不足两个时为NaN
+    """
+    x, t = np.asarray(x, dtype=float), np.asarray(t, dtype=float)
+    valid = (x > 0) & (t > 0)
+    if valid.sum() < 2:
+        return {"exponent": float('nan'), "coefficient": float('nan'), "r2": float('nan')}
+    log_x, log_t = np.log(x[valid]), np.log(t[valid])
+    k, log_c = np.polyfit(log_x, log_t, 1)
+    residual = log_t - (k * log_x + log_c)
+    total = ((log_t - log_t.mean()) ** 2).sum()
+    r2 = 1 - (residual ** 2).sum() / total if total > 0 else 1.0
+    return {"exponent": float(k), "coefficient": float(np.exp(log_c)), "r2": float(r2)}
+
+
+def _select_steps(steps: list, step_prefixes) -> list:
+    """按编号前缀筛选步骤，例如 ['4.1', '5']"""
+    if not step_prefixes:
+        return steps
+    return [s for s in steps if any(s['name'].startswith(p) for p in step_prefixes)]
+
+
+def _network_sizes(data_root: Path) -> dict:
+    """读取step 2输出，统计各网络层节点数和边数之和"""
+    step2 = data_root / 'step2_output'
+    return {
+        "nodes": sum(_count_rows(step2 / f'{layer}_network_nodes.csv') for layer in LAYERS),
+        "edges": sum(_count_rows(step2 / f'{layer}_network_edges.csv') for layer in LAYERS),
+    }
+
+
+def measure_scaling(input_path, workdir, fractions, step_prefixes=None, seed=42, warmup=True) -> list:
+    """在各抽样比例下依次运行步骤并计时
+
+    抽样作用于 patent_data_selected_columns.csv，默认从step 2开始运行（step 1.2依赖外部API）。
+    warmup 为 True 时先以最小比例运行一遍且不计入结果，避免numba编译时间扭曲小规模的耗时。
+
+    Returns:
+        list: 每个比例一条记录，包含 fraction、patents、nodes、edges 和各步骤耗时 times
+    """
+    workdir = Path(workdir)
+    measurements = []
+    fractions = sorted(fractions)
+    runs = [(fractions[0], False)] * warmup + [(f, True) for f in fractions]
+    for fraction, record in runs:
+        data_root = workdir / f"fraction_{fraction:g}"
+        shutil.rmtree(data_root, ignore_errors=True)
+        patents = sample_patent_data(
+            input_path, data_root / 'step1_output' / 'patent_data_selected_columns.csv', fraction, seed
+        )
+
+        steps = [s for s in build_pipeline_steps(data_root) if not s['name'].startswith('1.')]
+        selected = {s['name'] for s in _select_steps(steps, step_prefixes)}
+        times = {}
+        for step in steps:
+            # 未选中的前置步骤也需运行以产生输入，但不计入结果
+            start = time.perf_counter()
+            if 'multi_run' in step:
+                result = [step['func'](**_normalize_params({**step['params'], **run}))
+                          for run in step['multi_run']]
+            else:
+                result = step['func'](**_normalize_params(step['params']))
+            elapsed = time.perf_counter() - start
+            if _is_failure(result):
+                raise RuntimeError(f"比例 {fraction:g} 下步骤 {step['name']} 执行失败：{result}")
+            if step['name'] in selected:
+                times[step['name']] = elapsed
+            if selected <= set(times):
+                break
+
+        if not record:
+            continue
+        measurements.append({"fraction": fraction, "patents": patents, **_network_sizes(data_root), "times": times})
+        print(f"比例 {fraction:g}：专利 {patents}条，" + "，".join(f"{k} {v:.2f}秒" for k, v in times.items()))
+    return measurements
+
+
+def analyze_scaling(measurements: list, target_patents: int) -> list:
+    """拟合各步骤相对专利数、节点数、边数的复杂度指数，并外推目标规模下的耗时
+
+    Returns:
+        list: 按外推耗时降序排列的步骤记录
+    """
+    patents = [m['patents'] for m in measurements]
+    nodes = [m['nodes'] for m in measurements]
+    edges = [m['edges'] for m in measurements]
+    node_growth = fit_power_law(patents, nodes)
+
+    analysis = []
+    for name in measurements[-1]['times']:
+        times = [m['times'].get(name, 0) for m in measurements]
+        by_patents = fit_power_law(patents, times)
+        projected = by_patents['coefficient'] * target_patents ** by_patents['exponent']
+        analysis.append({
+            "step": name,
+            "exponent_patents": by_patents['exponent'],
+            "exponent_nodes": fit_power_law(nodes, times)['exponent'],
+            "exponent_edges": fit_power_law(edges, times)['exponent'],
+            "r2": by_patents['r2'],
+            "projected_seconds": float(projected) if np.isfinite(projected) else float('nan'),
+            "node_growth_exponent": node_growth['exponent'],
+        })
+    analysis.sort(key=lambda r: -np.nan_to_num(r['projected_seconds'], nan=-1))
+    return analysis
+
+
+def _format_seconds(seconds: float) -> str:
+    if not np.isfinite(seconds):
+        return "未知"
+    if seconds < 120:
+        return f"{seconds:.1f}秒"
+    if seconds < 7200:
+        return f"{seconds / 60:.1f}分钟"
+    if seconds < 172800:
+        return f"{seconds / 3600:.1f}小时"
+    return f"{seconds / 86400:.1f}天"
+
+
+def run_scaling_analysis(input_path=None, workdir=None, fractions=(0.1, 0.2, 0.4, 0.8),
+                         steps=None, target_patents=10_000_000, seed=42, output_path=None):
+    """规模曲线分析主函数
+
+    Args:
+        input_path (str/Path): 输入CSV，默认'../data/step1_output/patent_data_selected_columns.csv'
+        workdir (str/Path): 各比例的工作目录，默认'../data/scaling'
+        fractions (list): 抽样比例
+        steps (list): 只分析编号以这些前缀开头的步骤，默认全部（step 2起）
+        target_patents (int): 外推的目标专利数
+        seed (int): 抽样随机种子
+        output_path (str/Path): 测量与拟合结果的JSON保存路径
+
+    Returns:
+        str: 处理结果报告
+    """
+    input_path = Path(input_path) if input_path else Path('../data/step1_output/patent_data_selected_columns.csv')
+    workdir = Path(workdir) if workdir else Path('../data/scaling')
+
+    try:
+        if not input_path.exists():
+            raise FileNotFoundError(f"输入文件不存在：{input_path}")
+        if len(fractions) < 2:
+            raise ValueError("至少需要两个抽样比例才能拟合复杂度指数")
+
+        measurements = measure_scaling(input_path, workdir, fractions, steps, seed)
+        analysis = analyze_scaling(measurements, target_patents)
+
+        lines = [
+            "规模曲线分析完成",
+            f"节点数增长：n ∝ N^{analysis[0]['node_growth_exponent']:.2f}" if analysis else "",
+            f"{'步骤':<16}{'k(专利N)':>10}{'k(节点n)':>10}{'k(边E)':>10}{'R²':>7}  目标规模({target_patents})耗时",
+        ]
+        for r in analysis:
+            lines.append(f"{r['step']:<16}{r['exponent_patents']:>10.2f}{r['exponent_nodes']:>10.2f}"
+                         f"{r['exponent_edges']:>10.2f}{r['r2']:>7.2f}  {_format_seconds(r['projected_seconds'])}")
+        if analysis:
+            lines.append(f"目标规模下的主导步骤：{analysis[0]['step']}")
+
+        if output_path:
+            output_path = Path(output_path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump({"measurements": measurements, "analysis": analysis}, f, ensure_ascii=False, indent=2)
+            lines.append(f"结果已保存至：{output_path}")
+
+        report = "\n".join(line for line in lines if line)
+        print(report)
+        return report
+
+    except Exception as e:
+        error_msg = f"规模曲线分析失败：{str(e)}"
+        print(error_msg)
+        return error_msg
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='规模曲线分析：拟合各步骤的经验复杂度')
+    parser.add_argument('--input', type=str, help='输入CSV路径（去除个人申请后的数据）')
+    parser.add_argument('--workdir', type=str, help='工作目录')
+    parser.add_argument('--fractions', type=float, nargs='+', default=[0.1, 0.2, 0.4, 0.8], help='抽样比例')
+    parser.add_argument('--steps', type=str, nargs='+', help='只分析的步骤编号前缀，如 4.1 5')
+    parser.add_argument('--target', type=int, default=10_000_000, help='外推的目标专利数')
+    parser.add_argument('--seed', type=int, default=42, help='抽样随机种子')
+    parser.add_argument('--output', type=str, help='结果JSON保存路径')
+
+    args = parser.parse_args()
+    run_scaling_analysis(args.input, args.workdir, args.fractions, args.steps, args.target, args.seed, args.output)
@@ -0,0 +1,73 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+import pandas as pd
+from pathlib import Path
+
+from applicant_resolution import APPLICANT_COLUMN, DEFAULT_THRESHOLD, resolve_applicant_column
+
+MAPPING_FILENAME = 'applicant_entity_mapping.csv'
+
+
+def resolve_applicant_entities(input_path=None, output_path=None, mapping_path=None, threshold=DEFAULT_THRESHOLD):
+    """专利权人实体消解：同一机构的不同写法替换为同一规范名称
+
+    只改写 专利权人 列，其余列原样保留；同时保存 原始名称 -> 实体编号/规范名称 映射表。
+    step 1.2 按规范名称调用分类API，step 2 的合作研发网络以规范名称为节点。
+
+    Args:
+        input_path (str/Path): 输入CSV文件路径，默认'../data/step1_output/patent_data_cleaned.csv'
+        output_path (str/Path): 输出CSV文件路径，默认'../data/step1_output/patent_data_resolved.csv'
+        mapping_path (str/Path): 映射表路径，默认为输出目录下的 applicant_entity_mapping.csv
+        threshold (float): 模糊匹配的 Dice 相似度阈值，大于1时只做规范键精确匹配
+
+    Returns:
+        str: 处理结果报告
+    """
+    # 设置默认路径
+    input_path = Path(input_path) if input_path else Path('../data/step1_output/patent_data_cleaned.csv')
+    output_path = Path(output_path) if output_path else Path('../data/step1_output/patent_data_resolved.csv')
+    mapping_path = Path(mapping_path) if mapping_path else output_path.parent / MAPPING_FILENAME
+
+    try:
+        if not input_path.exists():
+            raise FileNotFoundError(f"输入文件不存在：{input_path}")
+
+        df = pd.read_csv(input_path, encoding='utf-8')
+        if APPLICANT_COLUMN not in df.columns:
+            raise ValueError(f"输入文件缺少'{APPLICANT_COLUMN}'列")
+
+        df[APPLICANT_COLUMN], mapping_df = resolve_applicant_column(df[APPLICANT_COLUMN], threshold)
+
+        # 保存结果
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(output_path, index=False, encoding='utf-8-sig')
+        mapping_df.to_csv(mapping_path, index=False, encoding='utf-8-sig')
+
+        report = (
+            f"专利权人实体消解完成\n专利数：{len(df)}条\n"
+            f"原始名称数：{len(mapping_df)}个\n规范键数：{mapping_df['规范键'].nunique()}个\n"
+            f"实体数：{mapping_df['实体编号'].nunique()}个\n"
+            f"输出文件：{output_path}\n映射表：{mapping_path}"
+        )
+        print(report)
+        return report
+
+    except Exception as e:
+        error_msg = f"专利权人实体消解失败：{str(e)}"
+        print(error_msg)
+        return error_msg
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='专利权人实体消解')
+    parser.add_argument('--input', type=str, help='输入CSV文件路径')
+    parser.add_argument('--output', type=str, help='输出CSV文件路径')
+    parser.add_argument('--mapping', type=str, help='映射表路径')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='模糊匹配的Dice相似度阈值，大于1时只做精确匹配')
+
+    args = parser.parse_args()
+    resolve_applicant_entities(args.input, args.output, args.mapping, args.threshold)
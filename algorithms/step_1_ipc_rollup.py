@@ -0,0 +1,71 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+import pandas as pd
+from pathlib import Path
+
+from ipc_hierarchy import IPC_COLUMN, IPC_LEVELS, LEVEL_NAMES, rollup_ipc_column
+
+
+def rollup_ipc_classification(input_path=None, output_path=None, level="subclass", mapping_path=None):
+    """把IPC分类归并到较粗的层次，供 step 2 在较小的技术网络上构建
+
+    只改写 IPC分类 列，其余列原样保留；同时保存 原始IPC -> 归并IPC 映射表。
+
+    Args:
+        input_path (str/Path): 输入CSV文件路径，默认'../data/step1_output/patent_data_selected_columns.csv'
+        output_path (str/Path): 输出CSV文件路径，默认为输入目录下的 patent_data_ipc_{level}.csv
+        level (str): 归并层次，section（部）/ class（大类）/ subclass（小类）/ main_group（大组）/ full（不归并）
+        mapping_path (str/Path): 映射表路径，默认为输出目录下的 ipc_mapping_{level}.csv
+
+    Returns:
+        str: 处理结果报告
+    """
+    # 设置默认路径
+    input_path = Path(input_path) if input_path else Path('../data/step1_output/patent_data_selected_columns.csv')
+    output_path = Path(output_path) if output_path else input_path.parent / f'patent_data_ipc_{level}.csv'
+    mapping_path = Path(mapping_path) if mapping_path else output_path.parent / f'ipc_mapping_{level}.csv'
+
+    try:
+        if level not in IPC_LEVELS:
+            raise ValueError(f"未知的IPC层次：{level}，可选：{', '.join(IPC_LEVELS)}")
+        if not input_path.exists():
+            raise FileNotFoundError(f"输入文件不存在：{input_path}")
+
+        df = pd.read_csv(input_path, encoding='utf-8')
+        if IPC_COLUMN not in df.columns:
+            raise ValueError(f"输入文件缺少'{IPC_COLUMN}'列")
+
+        df[IPC_COLUMN], mapping_df = rollup_ipc_column(df[IPC_COLUMN], level)
+
+        # 保存结果
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(output_path, index=False, encoding='utf-8-sig')
+        mapping_df.to_csv(mapping_path, index=False, encoding='utf-8-sig')
+
+        report = (
+            f"IPC分类归并完成（{LEVEL_NAMES[level]}）\n专利数：{len(df)}条\n"
+            f"原始IPC编码数：{mapping_df['原始IPC'].nunique()}个\n"
+            f"归并后IPC编码数：{mapping_df['归并IPC'].nunique()}个\n"
+            f"输出文件：{output_path}\n映射表：{mapping_path}"
+        )
+        print(report)
+        return report
+
+    except Exception as e:
+        error_msg = f"IPC分类归并失败：{str(e)}"
+        print(error_msg)
+        return error_msg
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='IPC分类粒度归并')
+    parser.add_argument('--input', type=str, help='输入CSV文件路径')
+    parser.add_argument('--output', type=str, help='输出CSV文件路径')
+    parser.add_argument('--level', type=str, default='subclass', choices=list(IPC_LEVELS), help='归并层次')
+    parser.add_argument('--mapping', type=str, help='映射表路径')
+
+    args = parser.parse_args()
+    rollup_ipc_classification(args.input, args.output, args.level, args.mapping)
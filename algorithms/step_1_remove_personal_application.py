@@ -16,6 +16,8 @@ from dotenv import load_dotenv
 from openai import OpenAI
 import backoff  # 添加 backoff 库用于重试机制
 
+from applicant_resolution import load_entity_ids
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -126,10 +128,17 @@ def split_names(cell_value: str) -> List[str]:
     return [n.strip() for n in str(cell_value).split("|") if n.strip()]
 
 
-def check_organization(names: List[str], cache: Dict[str, bool]) -> bool:
-    """判断多个名称中是否存在组织机构"""
+def check_organization(names: List[str], cache: Dict[str, bool], key_cache: Optional[Dict[str, bool]] = None,
+                       name_keys: Optional[Dict[str, str]] = None) -> bool:
+    """判断多个名称中是否存在组织机构
+
+    key_cache 为 实体编号 -> 分类结果，name_keys 为 名称 -> 实体编号：实体已有结果的其他写法不再调用API
+    """
     for name in names:
+        key = name_keys.get(name) if name_keys else None
         with cache_lock:
+            if name not in cache and key_cache is not None and key in key_cache:
+                cache[name] = key_cache[key]
             if name in cache:
                 if cache[name]:
                     return True
@@ -141,13 +150,16 @@ def check_organization(names: List[str], cache: Dict[str, bool]) -> bool:
 
         with cache_lock:
             cache[name] = api_result
+            if key_cache is not None and key is not None:
+                key_cache[key] = api_result
 
         if api_result:
             return True
     return False
 
 
-def process_batch(batch: pd.DataFrame, cache: Dict[str, bool]) -> pd.DataFrame:
+def process_batch(batch: pd.DataFrame, cache: Dict[str, bool], key_cache: Optional[Dict[str, bool]] = None,
+                  name_keys: Optional[Dict[str, str]] = None) -> pd.DataFrame:
     """处理数据批次"""
     results = []
     for _, row in batch.iterrows():
@@ -158,7 +170,7 @@ def process_batch(batch: pd.DataFrame, cache: Dict[str, bool]) -> pd.DataFrame:
             if not names:
                 continue
 
-            if check_organization(names, cache):
+            if check_organization(names, cache, key_cache, name_keys):
                 results.append(row)
         except Exception as e:
             logging.error(f"处理行数据时出错: {str(e)}")
@@ -166,8 +178,12 @@ def process_batch(batch: pd.DataFrame, cache: Dict[str, bool]) -> pd.DataFrame:
     return pd.DataFrame(results)
 
 
-def remove_personal_applications(input_path: str = None, output_path: str = None) -> str:
-    """主处理函数"""
+def remove_personal_applications(input_path: str = None, output_path: str = None, mapping_path: str = None) -> str:
+    """主处理函数
+
+    mapping_path 为 1.1.1 专利权人实体消解的映射表：提供时同一实体的不同写法共用分类结果，
+    缓存中已有结果的写法变体不再调用API；默认不提供，逐个名称分类。
+    """
     # 设置默认路径
     if input_path is None:
         input_path = '../data/step1_output/patent_data_cleaned.csv'
@@ -190,6 +206,12 @@ def remove_personal_applications(input_path: str = None, output_path: str = None
         df = pd.read_csv(input_path, encoding='utf-8')
         original_count = len(df)
 
+        # 实体消解后同一实体编号的名称共用分类结果
+        name_keys, key_cache = None, None
+        if mapping_path is not None:
+            name_keys = load_entity_ids(mapping_path)
+            key_cache = {name_keys[name]: result for name, result in cache.items() if name in name_keys}
+
         # 并行处理
         batch_size = 50  # 减小批次大小
         batches = [df[i:i + batch_size] for i in range(0, len(df), batch_size)]
@@ -197,7 +219,7 @@ def remove_personal_applications(input_path: str = None, output_path: str = None
 
         with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:  # 减少并发数
             futures = [
-                executor.submit(process_batch, batch, cache)
+                executor.submit(process_batch, batch, cache, key_cache, name_keys)
                 for batch in batches
             ]
 
@@ -248,7 +270,9 @@ if __name__ == '__main__':
     parser.add_argument('--output_path', '-o',
                         default='../data/step1_output/patent_data_selected_columns.csv',
                         help='输出CSV文件路径')
+    parser.add_argument('--mapping_path', '-m',
+                        help='专利权人实体消解映射表，提供时同一实体的不同写法共用分类结果')
 
     args = parser.parse_args()
-    result = remove_personal_applications(args.input_path, args.output_path)
+    result = remove_personal_applications(args.input_path, args.output_path, args.mapping_path)
     print("\n最终报告:", result)
\ No newline at end of file
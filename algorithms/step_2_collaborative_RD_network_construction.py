@@ -4,12 +4,20 @@
 import pandas as pd
 from pathlib import Path
 
-def construct_collaborative_RD_network(input_path=None, output_dir=None):
+from graph_store import write_graph_store
+from hypergraph import build_incidence, write_incidence_store
+from out_of_core_edges import DEFAULT_RUN_EDGES, write_clique_network
+
+def construct_collaborative_RD_network(input_path=None, output_dir=None, out_of_core=False, run_edges=None, hypergraph=False):
     """构建合作研发网络
     
     Args:
         input_path (str/Path): 输入CSV文件路径，默认'../data/step1_output/patent_data_selected_columns.csv'
         output_dir (str/Path): 输出目录路径，默认'../data/step2_output'
+        out_of_core (bool): 外存模式，团边分块溢写为有序段后归并去重，峰值内存与团大小无关
+        run_edges (int): 外存模式下每个溢写段的边数上限，默认 DEFAULT_RUN_EDGES
+        hypergraph (bool): 超图模式，只保存 专利->节点 关联矩阵，不展开团边（不写边文件），
+            step 3 / 4.1 / 5.1 在关联矩阵上按需计算投影图的指标
     
     Returns:
         str: 处理结果报告
@@ -29,10 +37,33 @@ def construct_collaborative_RD_network(input_path=None, output_dir=None):
         # 读取CSV数据
         if not input_path.exists():
             raise FileNotFoundError(f"输入文件不存在：{input_path}")
+
+        if out_of_core and not hypergraph:
+            stats = write_clique_network(input_path, output_dir, 'collaborative_R&D', '专利权人',
+                                         run_edges=run_edges or DEFAULT_RUN_EDGES)
+            report = (
+                f"网络构建完成（外存模式，溢写段{stats['runs']}个）\n原始专利数：{stats['records']}条\n"
+                f"生成节点数：{stats['nodes']}个\n生成边数：{stats['edges']}条\n"
+                f"节点文件：{nodes_path}\n边文件：{edges_path}"
+            )
+            print(report)
+            return report
             
         df = pd.read_csv(input_path, encoding='utf-8')
         original_records = len(df)
 
+        if hypergraph:
+            nodes, patent_ptr, members, self_loop = build_incidence(df['专利权人'])
+            pd.DataFrame(nodes, columns=["节点"]).to_csv(nodes_path, index=False, encoding='utf-8-sig')
+            store_dir = write_incidence_store(output_dir, 'collaborative_R&D', patent_ptr, members, self_loop, nodes_path)
+            report = (
+                f"网络构建完成（超图模式）\n原始专利数：{original_records}条\n"
+                f"生成节点数：{len(nodes)}个\n超边数：{len(patent_ptr) - 1}条\n隶属关系数：{len(members)}条\n"
+                f"节点文件：{nodes_path}\n关联矩阵：{store_dir}"
+            )
+            print(report)
+            return report
+
         # 初始化数据容器
         nodes = set()
         edges = set()
@@ -57,6 +88,9 @@ def construct_collaborative_RD_network(input_path=None, output_dir=None):
         nodes_df.to_csv(nodes_path, index=False, encoding='utf-8-sig')
         edges_df.to_csv(edges_path, index=False, encoding='utf-8-sig')
 
+        # 保存CSR图存储，供后续步骤内存映射加载
+        write_graph_store(output_dir, 'collaborative_R&D', nodes_df['节点'], edges_df, edges_path=edges_path)
+
         # 生成统计报告
         report = (
             f"网络构建完成\n原始专利数：{original_records}条\n"
@@ -77,6 +111,9 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='构建合作研发网络')
     parser.add_argument('--input', type=str, help='输入CSV文件路径')
     parser.add_argument('--output_dir', type=str, help='输出目录路径')
+    parser.add_argument('--out_of_core', action='store_true', help='外存模式：团边溢写到临时文件后归并，限制峰值内存')
+    parser.add_argument('--run_edges', type=int, help='外存模式下每个溢写段的边数上限')
+    parser.add_argument('--hypergraph', action='store_true', help='超图模式：只保存专利-节点关联矩阵，不展开团边')
     
     args = parser.parse_args()
-    construct_collaborative_RD_network(args.input, args.output_dir)
\ No newline at end of file
+    construct_collaborative_RD_network(args.input, args.output_dir, args.out_of_core, args.run_edges, args.hypergraph)
\ No newline at end of file
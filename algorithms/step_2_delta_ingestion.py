@@ -0,0 +1,652 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+step 2 增量导入
+只读取新增或变更的专利记录（按'公开（公告）号'识别），把它们对各网络层节点和边的贡献合并进已有的网络文件，
+并在 step2_output/delta/ 下生成各层的增量清单，供后续增量步骤（如 step 3 --incremental）使用。
+
+为正确删除变更专利不再产生的边，为每个网络层维护节点和边的支持计数（由多少条专利记录产生），
+以数组形式保存在 step2_output/ingest_state/：节点名的64位哈希（有序）及其编号、按编号对齐的节点支持计数、
+有序的边键（节点1编号 << 32 | 节点2编号）及其支持计数。每次导入只二分查找、更新增量涉及的条目：
+
+    - 只有新增时（新专利的常见情况），新节点和新边追加到网络文件末尾，新节点的编号接在已有节点之后；
+      CSR图存储和层间邻居索引在原有数组中插入新条目，不重新读取边CSV；
+    - 变更专利使某一网络层的节点或边失去全部支持时，只压缩并重写该网络层（由支持计数向量化生成）。
+
+step 1 的输出保持不变：合并后的记录写在单独的文件（默认与全量文件同目录的 patent_data_merged.csv），
+首次导入时由全量文件复制，之后只追加增量记录（同一公开号以最后一条为准）；只有变更专利才需分块扫描该文件取回旧记录。
+首次导入时，或网络文件、全量文件在上次增量导入后被重新生成时，由记录初始化支持计数，并按全量构建的顺序重写网络层。
+合并后的网络与对合并记录重新执行 step 2 的结果节点和边相同，追加的节点和边位于文件末尾。
+"""
+
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from citation_parser import CITED_COLUMN, CITING_COLUMN, clean_column, explode_column
+from graph_store import file_signature, load_graph_store, patch_graph_store, write_graph_store_from_ids
+from inter_layer_index import COUPLING_LAYERS, load_inter_layer_index, write_inter_layer_index, write_inter_layer_pairs
+
+KEY_COLUMN = '公开（公告）号'
+BASE_LAYERS = ["knowledge", "technology", "collaborative_R&D"]
+LAYERS = BASE_LAYERS + list(COUPLING_LAYERS)
+CLIQUE_COLUMNS = {"technology": 'IPC分类', "collaborative_R&D": '专利权人'}
+PRODUCT_COLUMNS = {
+    "knowledge-technology": (KEY_COLUMN, 'IPC分类'),
+    "technology-collaborative_R&D": ('IPC分类', '专利权人'),
+    "knowledge-collaborative_R&D": (KEY_COLUMN, '专利权人'),
+}
+STATE_VERSION = 2
+KEY_SHIFT = np.int64(32)     # 边键：节点1编号 << 32 | 节点2编号，编号在追加节点时保持不变
+KEY_MASK = np.int64((1 << 32) - 1)
+CHUNKSIZE = 100_000          # 分块扫描合并记录时每块的记录数
+
+
+def _split_items(series: pd.Series) -> pd.Series:
+    """与 step 2 构建函数的 str(value).split('|') 一致：缺失值为'nan'，去空白、去空项，索引为记录行号"""
+    items = series.astype(str).str.split('|').explode().str.strip()
+    return items[items != '']
+
+
+def _undirected(rows, left, right) -> pd.DataFrame:
+    """两端按字符串大小排序的无向边，每条记录内去重，列为 row、节点1、节点2"""
+    left = np.asarray(left, dtype=object)
+    right = np.asarray(right, dtype=object)
+    swap = left > right
+    return pd.DataFrame({
+        "row": np.asarray(rows), "节点1": np.where(swap, right, left), "节点2": np.where(swap, left, right)
+    }).drop_duplicates()
+
+
+def record_contributions(df: pd.DataFrame, layer: str) -> tuple:
+    """一批记录对某网络层贡献的节点和边（每条记录内去重），与对应的 step 2 构建函数逐条一致
+
+    Returns:
+        tuple: (节点表，列为 row、节点；边表，列为 row、节点1、节点2)
+    """
+    df = df.reset_index(drop=True)
+    if layer == "knowledge":
+        patents = clean_column(df[KEY_COLUMN])
+        targets = pd.concat([explode_column(df[CITED_COLUMN]), explode_column(df[CITING_COLUMN])])
+        nodes = pd.concat([patents, targets])
+        edges = _undirected(targets.index, patents.loc[targets.index], targets)
+    elif layer in CLIQUE_COLUMNS:
+        nodes = _split_items(df[CLIQUE_COLUMNS[layer]])
+        # 记录内按位置两两组合，重复的元素产生自环，与逐行构建一致
+        items = pd.DataFrame({"row": nodes.index, "position": nodes.groupby(level=0).cumcount().to_numpy(),
+                              "item": nodes.to_numpy()})
+        pairs = items.merge(items, on="row")
+        pairs = pairs[pairs["position_x"] < pairs["position_y"]]
+        edges = _undirected(pairs["row"], pairs["item_x"], pairs["item_y"])
+    else:
+        left_column, right_column = PRODUCT_COLUMNS[layer]
+        if left_column == KEY_COLUMN:
+            left = df[KEY_COLUMN].astype(str).str.strip()
+            left = left[left != '']
+        else:
+            left = _split_items(df[left_column])
+        right = _split_items(df[right_column])
+        # 两侧都非空的记录才有贡献
+        rows = np.intersect1d(left.index.unique(), right.index.unique())
+        left, right = left[left.index.isin(rows)], right[right.index.isin(rows)]
+        nodes = pd.concat([left, right])
+        pairs = pd.DataFrame({"row": left.index, "a": left.to_numpy()}).merge(
+            pd.DataFrame({"row": right.index, "b": right.to_numpy()}), on="row")
+        edges = _undirected(pairs["row"], pairs["a"], pairs["b"])
+    nodes = pd.DataFrame({"row": np.asarray(nodes.index), "节点": nodes.to_numpy()}).drop_duplicates()
+    return nodes, edges
+
+
+def citation_contributions(df: pd.DataFrame) -> pd.DataFrame:
+    """一批记录的有向引用边（每条记录内去重），列为 row、节点1（施引专利）、节点2（被引专利）"""
+    df = df.reset_index(drop=True)
+    patents = clean_column(df[KEY_COLUMN])
+    cited = explode_column(df[CITED_COLUMN])
+    citing = explode_column(df[CITING_COLUMN])
+    return pd.concat([
+        pd.DataFrame({"row": cited.index, "节点1": patents.loc[cited.index].to_numpy(), "节点2": cited.to_numpy()}),
+        pd.DataFrame({"row": citing.index, "节点1": citing.to_numpy(), "节点2": patents.loc[citing.index].to_numpy()}),
+    ], ignore_index=True).drop_duplicates()
+
+
+def _hash(names) -> np.ndarray:
+    return pd.util.hash_array(np.asarray(names, dtype=object))
+
+
+class NodeTable:
+    """一个网络层的节点名哈希索引与节点支持计数，节点编号即节点文件的行号
+
+    Attributes:
+        hashes (ndarray): 节点名的64位哈希（升序）
+        hash_ids (ndarray): 与 hashes 对齐的节点编号
+        support (ndarray): 按编号对齐的支持计数
+    """
+
+    def __init__(self, hashes: np.ndarray, hash_ids: np.ndarray, support: np.ndarray):
+        self.hashes = hashes
+        self.hash_ids = hash_ids
+        self.support = support
+
+    @classmethod
+    def from_names(cls, names, support) -> 'NodeTable':
+        hashes = _hash(names)
+        order = np.argsort(hashes, kind='stable')
+        return cls(hashes[order], order.astype(np.int64), np.asarray(support, dtype=np.int64))
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.support)
+
+    def lookup(self, names) -> np.ndarray:
+        """节点名转编号，不存在的节点为-1"""
+        keys = _hash(names)
+        if len(self.hashes) == 0:
+            return np.full(len(keys), -1, dtype=np.int64)
+        slot = np.minimum(np.searchsorted(self.hashes, keys), len(self.hashes) - 1)
+        return np.where(self.hashes[slot] == keys, self.hash_ids[slot], -1).astype(np.int64)
+
+    def append(self, names) -> np.ndarray:
+        """追加新节点（支持计数为0），返回其编号"""
+        keys = _hash(names)
+        ids = np.arange(self.n_nodes, self.n_nodes + len(keys), dtype=np.int64)
+        order = np.argsort(keys, kind='stable')
+        positions = np.searchsorted(self.hashes, keys[order])
+        self.hashes = np.insert(self.hashes, positions, keys[order])
+        self.hash_ids = np.insert(self.hash_ids, positions, ids[order])
+        self.support = np.concatenate([self.support, np.zeros(len(keys), dtype=np.int64)])
+        return ids
+
+    def compact(self) -> np.ndarray:
+        """去掉支持计数为0的节点并重新连续编号，返回 旧编号 -> 新编号（删除的为-1）"""
+        keep = self.support > 0
+        remap = np.where(keep, np.cumsum(keep) - 1, -1)
+        kept = keep[self.hash_ids]
+        self.hashes = self.hashes[kept]
+        self.hash_ids = remap[self.hash_ids[kept]]
+        self.support = self.support[keep]
+        return remap
+
+
+class EdgeSupport:
+    """一个网络层的边键（升序）与支持计数"""
+
+    def __init__(self, keys: np.ndarray, support: np.ndarray):
+        self.keys = keys
+        self.support = support
+
+    @classmethod
+    def from_ids(cls, src: np.ndarray, dst: np.ndarray, support) -> 'EdgeSupport':
+        keys = (np.asarray(src, dtype=np.int64) << KEY_SHIFT) | np.asarray(dst, dtype=np.int64)
+        order = np.argsort(keys)
+        return cls(keys[order], np.asarray(support, dtype=np.int64)[order])
+
+    @property
+    def endpoints(self) -> tuple:
+        return self.keys >> KEY_SHIFT, self.keys & KEY_MASK
+
+    def update(self, src: np.ndarray, dst: np.ndarray, counts: np.ndarray) -> tuple:
+        """累加支持计数的变化，新边插入有序键中
+
+        Returns:
+            tuple: (新增边的键, 失去全部支持的边的键)
+        """
+        keys = (np.asarray(src, dtype=np.int64) << KEY_SHIFT) | np.asarray(dst, dtype=np.int64)
+        order = np.argsort(keys)
+        keys, counts = keys[order], np.asarray(counts, dtype=np.int64)[order]
+        slot = np.searchsorted(self.keys, keys)
+        exists = slot < len(self.keys)
+        exists[exists] = self.keys[slot[exists]] == keys[exists]
+        if np.any(counts[~exists] < 0):
+            raise ValueError("支持计数与已导入的记录不一致，请删除 ingest_state 目录后重新导入")
+
+        self.support[slot[exists]] += counts[exists]
+        removed = keys[exists][self.support[slot[exists]] <= 0]
+        added = keys[~exists]
+        self.keys = np.insert(self.keys, slot[~exists], added)
+        self.support = np.insert(self.support, slot[~exists], counts[~exists])
+        return added, removed
+
+    def compact(self, remap: np.ndarray) -> None:
+        """去掉支持计数为0的边，按节点编号映射重写边键（映射单调，键序不变）"""
+        keep = self.support > 0
+        src, dst = self.keys[keep] >> KEY_SHIFT, self.keys[keep] & KEY_MASK
+        self.keys = (remap[src] << KEY_SHIFT) | remap[dst]
+        self.support = self.support[keep]
+
+
+def _support_counts(frame: pd.DataFrame, columns: list, sign: int = 1) -> pd.Series:
+    return frame.groupby(columns, sort=False).size() * sign
+
+
+def _delta_counts(new_frame: pd.DataFrame, old_frame: pd.DataFrame, columns: list) -> pd.Series:
+    """新记录的贡献计 +1，被替换旧记录的贡献计 -1，只保留非零的变化"""
+    counts = pd.concat([_support_counts(new_frame, columns), _support_counts(old_frame, columns, -1)])
+    counts = counts.groupby(level=list(range(len(columns))), sort=False).sum()
+    return counts[counts != 0]
+
+
+def _read_str_column(path: Path) -> np.ndarray:
+    return pd.read_csv(path, encoding='utf-8', dtype=str, keep_default_na=False)['节点'].to_numpy(dtype=object)
+
+
+class IngestState:
+    """ingest_state 目录：记录与网络文件的签名（state.json）及各网络层的支持计数数组"""
+
+    def __init__(self, state_dir: Path):
+        self.state_dir = state_dir
+        try:
+            with open(state_dir / 'state.json', 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.meta = {}
+        if self.meta.get("version") != STATE_VERSION:
+            self.meta = {"version": STATE_VERSION, "layers": {}}
+
+    def _path(self, name: str) -> Path:
+        return self.state_dir / f"{name}.npy"
+
+    def _arrays_exist(self, prefix: str, names: tuple) -> bool:
+        return all(self._path(f"{prefix}_{name}").exists() for name in names)
+
+    def layer_valid(self, layer: str, output_dir: Path) -> bool:
+        """支持计数有效：网络文件与上次导入写出的一致，图存储未过期，状态数组齐全"""
+        files = _layer_files(output_dir, layer)
+        signatures = self.meta.get("layers", {}).get(layer)
+        if not signatures or not all(path.exists() for path in files.values()):
+            return False
+        if signatures != {key: file_signature(path) for key, path in files.items()}:
+            return False
+        if load_graph_store(output_dir, layer, edges_path=files["edges_csv"]) is None:
+            return False
+        names = ("node_hashes", "node_hash_ids", "node_support", "edge_keys", "edge_support")
+        if layer == "knowledge":
+            names += ("citation_keys", "citation_support")
+        return self._arrays_exist(layer, names)
+
+    def load_layer(self, layer: str) -> tuple:
+        """读取支持计数：(NodeTable, EdgeSupport, 引用边EdgeSupport或None)"""
+        load = lambda name: np.load(self._path(f"{layer}_{name}"))
+        table = NodeTable(load("node_hashes"), load("node_hash_ids"), load("node_support"))
+        edges = EdgeSupport(load("edge_keys"), load("edge_support"))
+        citations = EdgeSupport(load("citation_keys"), load("citation_support")) if layer == "knowledge" else None
+        return table, edges, citations
+
+    def save_layer(self, layer: str, table: NodeTable, edges: EdgeSupport, citations: EdgeSupport = None) -> None:
+        arrays = {"node_hashes": table.hashes, "node_hash_ids": table.hash_ids, "node_support": table.support,
+                  "edge_keys": edges.keys, "edge_support": edges.support}
+        if citations is not None:
+            arrays.update({"citation_keys": citations.keys, "citation_support": citations.support})
+        for name, array in arrays.items():
+            _save_array(self._path(f"{layer}_{name}"), array)
+
+    def load_record_keys(self):
+        path = self._path("record_keys")
+        return np.load(path) if path.exists() else None
+
+    def save_record_keys(self, keys: np.ndarray) -> None:
+        _save_array(self._path("record_keys"), keys)
+
+    def write(self) -> None:
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.state_dir / 'state.json', 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+
+
+def _save_array(path: Path, array: np.ndarray) -> None:
+    """写回状态数组：长度不变时只改写变化的元素（原文件内存映射修改），否则整体重写"""
+    if path.exists():
+        current = np.load(path, mmap_mode='r+')
+        if current.shape == array.shape and current.dtype == array.dtype:
+            changed = np.flatnonzero(current != array)
+            current[changed] = array[changed]
+            current.flush()
+            return
+        del current
+    np.save(path, array)
+
+
+def _layer_files(output_dir: Path, layer: str) -> dict:
+    files = {
+        "nodes_csv": output_dir / f"{layer}_network_nodes.csv",
+        "edges_csv": output_dir / f"{layer}_network_edges.csv",
+    }
+    if layer == "knowledge":
+        files["citations_csv"] = output_dir / "knowledge_network_citations.csv"
+    return files
+
+
+def _latest_records(df: pd.DataFrame) -> pd.DataFrame:
+    """同一公开号只保留最后一条（合并记录文件中后追加的记录为新版本）"""
+    return df[~df[KEY_COLUMN].astype(str).duplicated(keep='last')].reset_index(drop=True)
+
+
+def _scan_records(path: Path, keys: set) -> pd.DataFrame:
+    """分块扫描合并记录文件，取回给定公开号的最新记录"""
+    parts = [chunk[chunk[KEY_COLUMN].astype(str).isin(keys)]
+             for chunk in pd.read_csv(path, encoding='utf-8', chunksize=CHUNKSIZE)]
+    return _latest_records(pd.concat(parts, ignore_index=True))
+
+
+def _append_csv(frame: pd.DataFrame, path: Path) -> None:
+    # 追加时不再写BOM和表头
+    frame.to_csv(path, mode='a', header=False, index=False, encoding='utf-8')
+
+
+def _initialize_layer(records: pd.DataFrame, layer: str, output_dir: Path) -> tuple:
+    """由记录初始化一个网络层的支持计数，并按全量构建的顺序（节点、边按名称排序）重写网络文件和图存储"""
+    node_frame, edge_frame = record_contributions(records, layer)
+    node_counts = _support_counts(node_frame, ["节点"]).sort_index()
+    names = node_counts.index.to_numpy(dtype=object)
+    table = NodeTable.from_names(names, node_counts.to_numpy())
+    node_index = pd.Index(names)
+
+    edge_counts = _support_counts(edge_frame, ["节点1", "节点2"])
+    src = node_index.get_indexer(edge_counts.index.get_level_values(0))
+    dst = node_index.get_indexer(edge_counts.index.get_level_values(1))
+    edges = EdgeSupport.from_ids(src, dst, edge_counts.to_numpy())
+
+    files = _layer_files(output_dir, layer)
+    pd.DataFrame({"节点": names}).to_csv(files["nodes_csv"], index=False, encoding='utf-8-sig')
+    src, dst = edges.endpoints
+    pd.DataFrame({"节点1": names[src], "节点2": names[dst]}).to_csv(
+        files["edges_csv"], index=False, encoding='utf-8-sig')
+    write_graph_store_from_ids(output_dir, layer, names, src, dst, edges_path=files["edges_csv"])
+
+    citations = None
+    if layer == "knowledge":
+        citation_counts = _support_counts(citation_contributions(records), ["节点1", "节点2"])
+        citations = EdgeSupport.from_ids(node_index.get_indexer(citation_counts.index.get_level_values(0)),
+                                         node_index.get_indexer(citation_counts.index.get_level_values(1)),
+                                         citation_counts.to_numpy())
+        src, dst = citations.endpoints
+        pd.DataFrame({"施引专利": names[src], "被引专利": names[dst]}).to_csv(
+            files["citations_csv"], index=False, encoding='utf-8-sig')
+    return table, edges, citations
+
+
+def _edge_names(table_names, keys: np.ndarray) -> pd.DataFrame:
+    src, dst = keys >> KEY_SHIFT, keys & KEY_MASK
+    return pd.DataFrame({"节点1": table_names(src), "节点2": table_names(dst)})
+
+
+def _apply_layer_delta(layer: str, output_dir: Path, table: NodeTable, edges: EdgeSupport, citations,
+                       new_rows: pd.DataFrame, old_rows: pd.DataFrame) -> dict:
+    """把一批记录的支持计数变化合并进一个网络层，追加或压缩重写网络文件
+
+    Returns:
+        dict: 增量信息，包含新增/删除的节点和边（名称），以及压缩时的节点编号映射 remap 和压缩前的节点表 lookup
+    """
+    files = _layer_files(output_dir, layer)
+    new_nodes, new_edges = record_contributions(new_rows, layer)
+    old_nodes, old_edges = record_contributions(old_rows, layer)
+
+    # 节点：新名称追加编号，再累加支持计数
+    node_delta = _delta_counts(new_nodes, old_nodes, ["节点"])
+    delta_names = node_delta.index.to_numpy(dtype=object)
+    ids = table.lookup(delta_names)
+    unknown = ids < 0
+    if np.any(node_delta.to_numpy()[unknown] < 0):
+        raise ValueError("支持计数与已导入的记录不一致，请删除 ingest_state 目录后重新导入")
+    n_before = table.n_nodes
+    appended_names = delta_names[unknown]
+    ids[unknown] = table.append(appended_names)
+    np.add.at(table.support, ids, node_delta.to_numpy())
+    removed_ids = ids[(table.support[ids] <= 0) & (ids < n_before)]
+    names_of = {int(i): name for i, name in zip(ids, delta_names)}
+
+    def delta_edge_ids(frame_new, frame_old, edge_set):
+        counts = _delta_counts(frame_new, frame_old, ["节点1", "节点2"])
+        first = counts.index.get_level_values(0).to_numpy(dtype=object)
+        second = counts.index.get_level_values(1).to_numpy(dtype=object)
+        added, removed = edge_set.update(table.lookup(first), table.lookup(second), counts.to_numpy())
+        name_map = dict(zip(zip(table.lookup(first), table.lookup(second)), zip(first, second)))
+        to_names = lambda keys: [name_map[(int(k >> KEY_SHIFT), int(k & KEY_MASK))] for k in keys]
+        return added, removed, to_names
+
+    added_keys, removed_keys, edge_to_names = delta_edge_ids(new_edges, old_edges, edges)
+    added_edges, removed_edges = edge_to_names(added_keys), edge_to_names(removed_keys)
+    if citations is not None:
+        added_citations, removed_citations, citation_to_names = delta_edge_ids(
+            citation_contributions(new_rows), citation_contributions(old_rows), citations)
+
+    info = {
+        "added_nodes": list(appended_names), "removed_nodes": [names_of[int(i)] for i in removed_ids],
+        "added_edges": added_edges, "removed_edges": removed_edges,
+        "lookup": table.lookup, "remap": None, "n_nodes": table.n_nodes,
+    }
+
+    compact = len(removed_ids) or len(removed_keys) or (citations is not None and len(removed_citations))
+    if not compact:
+        # 只有新增：追加到网络文件末尾，图存储插入新条目
+        _append_csv(pd.DataFrame({"节点": appended_names}), files["nodes_csv"])
+        _append_csv(pd.DataFrame(added_edges, columns=["节点1", "节点2"]), files["edges_csv"])
+        patch_graph_store(output_dir, layer, appended_names, added_keys >> KEY_SHIFT, added_keys & KEY_MASK,
+                          edges_path=files["edges_csv"])
+        if citations is not None:
+            _append_csv(pd.DataFrame(citation_to_names(added_citations), columns=["施引专利", "被引专利"]),
+                        files["citations_csv"])
+        return info
+
+    # 有节点或边失去全部支持：压缩编号后由支持计数重写该网络层
+    names = np.concatenate([_read_str_column(files["nodes_csv"]), appended_names]).astype(object)
+    lookup_before = NodeTable(table.hashes.copy(), table.hash_ids.copy(), table.support.copy()).lookup
+    remap = table.compact()
+    edges.compact(remap)
+    names = names[remap >= 0]
+    info.update({"lookup": lookup_before, "remap": remap, "n_nodes": table.n_nodes})
+
+    pd.DataFrame({"节点": names}).to_csv(files["nodes_csv"], index=False, encoding='utf-8-sig')
+    edges_df = _edge_names(lambda i: names[i], edges.keys)
+    edges_df.to_csv(files["edges_csv"], index=False, encoding='utf-8-sig')
+    src, dst = edges.endpoints
+    write_graph_store_from_ids(output_dir, layer, names, src, dst, edges_path=files["edges_csv"])
+    if citations is not None:
+        citations.compact(remap)
+        _edge_names(lambda i: names[i], citations.keys).set_axis(["施引专利", "被引专利"], axis=1).to_csv(
+            files["citations_csv"], index=False, encoding='utf-8-sig')
+    return info
+
+
+def _coupling_pairs(coupling: str, first, second, lookups: dict) -> tuple:
+    """耦合边（名称）转为 (源层编号, 目标层编号) 对；两种朝向都可能连接源层与目标层"""
+    src_layer, dst_layer = COUPLING_LAYERS[coupling]
+    first = np.asarray(first, dtype=object)
+    second = np.asarray(second, dtype=object)
+    rows = np.concatenate([lookups[src_layer](first), lookups[src_layer](second)])
+    cols = np.concatenate([lookups[dst_layer](second), lookups[dst_layer](first)])
+    valid = (rows >= 0) & (cols >= 0)
+    return rows[valid], cols[valid]
+
+
+def _patch_inter_layer_index(output_dir: Path, coupling: str, previous, infos: dict) -> None:
+    """在导入前的层间邻居编号对上删除、追加增量耦合边，按压缩映射重新编号后写回"""
+    src_layer, dst_layer = COUPLING_LAYERS[coupling]
+    lookups = {layer: infos[layer]["lookup"] for layer in (src_layer, dst_layer)}
+    rows, cols = previous
+    n_dst = infos[dst_layer]["n_nodes"] if infos[dst_layer]["remap"] is None else len(infos[dst_layer]["remap"])
+    removed = infos[coupling]["removed_edges"]
+    if removed:
+        removed_rows, removed_cols = _coupling_pairs(coupling, *zip(*removed), lookups)
+        width = max(n_dst, 1)
+        keep = ~np.isin(rows * width + cols, removed_rows * width + removed_cols)
+        rows, cols = rows[keep], cols[keep]
+    added = infos[coupling]["added_edges"]
+    if added:
+        added_rows, added_cols = _coupling_pairs(coupling, *zip(*added), lookups)
+        rows, cols = np.concatenate([rows, added_rows]), np.concatenate([cols, added_cols])
+    for layer, ids in ((src_layer, "rows"), (dst_layer, "cols")):
+        remap = infos[layer]["remap"]
+        if remap is not None:
+            if ids == "rows":
+                rows = remap[rows]
+            else:
+                cols = remap[cols]
+    valid = (rows >= 0) & (cols >= 0)
+    write_inter_layer_pairs(output_dir, coupling, rows[valid], cols[valid],
+                            infos[src_layer]["n_nodes"], infos[dst_layer]["n_nodes"])
+
+
+def ingest_patent_delta(delta_path=None, base_path=None, output_dir=None, merged_path=None):
+    """把新增或变更的专利记录增量合并进 step 2 的网络文件
+
+    Args:
+        delta_path (str/Path): 新增或变更记录的CSV（列同 patent_data_selected_columns.csv），
+            默认'../data/step1_output/patent_data_delta.csv'
+        base_path (str/Path): step 2 的全量输入，只读，默认'../data/step1_output/patent_data_selected_columns.csv'
+        output_dir (str/Path): step2输出目录，默认'../data/step2_output'
+        merged_path (str/Path): 合并后的记录（全量记录加历次增量，同一公开号以最后一条为准），
+            默认与全量文件同目录的 patent_data_merged.csv
+
+    Returns:
+        str: 处理结果报告
+    """
+    delta_path = Path(delta_path) if delta_path else Path('../data/step1_output/patent_data_delta.csv')
+    base_path = Path(base_path) if base_path else Path('../data/step1_output/patent_data_selected_columns.csv')
+    output_dir = Path(output_dir) if output_dir else Path('../data/step2_output')
+    merged_path = Path(merged_path) if merged_path else base_path.with_name('patent_data_merged.csv')
+    delta_dir = output_dir / 'delta'
+
+    try:
+        if not delta_path.exists():
+            raise FileNotFoundError(f"增量文件不存在：{delta_path}")
+        if not base_path.exists():
+            raise FileNotFoundError(f"全量文件不存在：{base_path}")
+
+        delta_df = pd.read_csv(delta_path, encoding='utf-8')
+        if KEY_COLUMN not in delta_df.columns:
+            raise ValueError(f"增量文件必须包含'{KEY_COLUMN}'列")
+        delta_df = _latest_records(delta_df)
+        delta_keys = delta_df[KEY_COLUMN].astype(str)
+
+        # 合并记录只在全量文件未被重新生成、且合并记录为上次导入写出的版本时沿用，否则由全量文件重新开始
+        state = IngestState(output_dir / 'ingest_state')
+        records_valid = merged_path.exists() and state.meta.get("base_csv") == file_signature(base_path) \
+            and state.meta.get("merged_csv") == file_signature(merged_path)
+        if not records_valid:
+            shutil.copyfile(base_path, merged_path)
+            state.meta = {"version": STATE_VERSION, "layers": {}, "base_csv": file_signature(base_path)}
+        valid = {layer: records_valid and state.layer_valid(layer, output_dir) for layer in LAYERS}
+        record_keys = state.load_record_keys() if records_valid else None
+
+        # 导入前的层间邻居编号对（三个相关网络层都沿用支持计数时才能在其上修补）
+        previous_pairs = {}
+        for coupling, (src_layer, dst_layer) in COUPLING_LAYERS.items():
+            if valid[coupling] and valid[src_layer] and valid[dst_layer]:
+                index = load_inter_layer_index(output_dir, src_layer, dst_layer, mmap=False)
+                previous_pairs[coupling] = (index.rows.astype(np.int64), index.indices.astype(np.int64))
+
+        # 被替换的旧记录：需要初始化时读取全部合并记录，否则只在有变更专利时分块扫描
+        records = None
+        if not all(valid.values()) or record_keys is None:
+            records = _latest_records(pd.read_csv(merged_path, encoding='utf-8'))
+            record_keys = np.unique(_hash(records[KEY_COLUMN].astype(str)))
+        delta_hashes = _hash(delta_keys)
+        slot = np.minimum(np.searchsorted(record_keys, delta_hashes), max(len(record_keys) - 1, 0))
+        known = (record_keys[slot] == delta_hashes) if len(record_keys) else np.zeros(len(delta_hashes), dtype=bool)
+        if records is not None:
+            old_rows = records[records[KEY_COLUMN].astype(str).isin(set(delta_keys[known]))]
+        elif known.any():
+            old_rows = _scan_records(merged_path, set(delta_keys[known]))
+        else:
+            old_rows = delta_df.iloc[:0]
+        changed = len(old_rows)
+
+        # 先使状态失效，写入中断时下次导入重新初始化
+        state.meta["layers"] = {}
+        state.write()
+        delta_dir.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            "created": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "delta_file": str(delta_path),
+            "rows": {"new": len(delta_df) - changed, "changed": changed},
+            "layers": {},
+        }
+
+        infos, layer_state = {}, {}
+        for layer in LAYERS:
+            if valid[layer]:
+                table, edges, citations = state.load_layer(layer)
+            else:
+                table, edges, citations = _initialize_layer(records, layer, output_dir)
+            info = _apply_layer_delta(layer, output_dir, table, edges, citations, delta_df, old_rows)
+            infos[layer] = info
+            layer_state[layer] = (table, edges, citations)
+
+            # 增量清单
+            pd.DataFrame({"节点": sorted(info["added_nodes"])}).to_csv(
+                delta_dir / f"{layer}_added_nodes.csv", index=False, encoding='utf-8-sig')
+            pd.DataFrame({"节点": sorted(info["removed_nodes"])}).to_csv(
+                delta_dir / f"{layer}_removed_nodes.csv", index=False, encoding='utf-8-sig')
+            pd.DataFrame(sorted(info["added_edges"]), columns=["节点1", "节点2"]).to_csv(
+                delta_dir / f"{layer}_added_edges.csv", index=False, encoding='utf-8-sig')
+            pd.DataFrame(sorted(info["removed_edges"]), columns=["节点1", "节点2"]).to_csv(
+                delta_dir / f"{layer}_removed_edges.csv", index=False, encoding='utf-8-sig')
+            manifest["layers"][layer] = {
+                "nodes": table.n_nodes, "edges": len(edges.keys),
+                "added_nodes": len(info["added_nodes"]), "removed_nodes": len(info["removed_nodes"]),
+                "added_edges": len(info["added_edges"]), "removed_edges": len(info["removed_edges"]),
+                "mode": "rewrite" if info["remap"] is not None or not valid[layer] else "append",
+            }
+
+        # 层间邻居索引：在导入前的编号对上修补；相关网络层被重新初始化时由CSV重建
+        for coupling, (src_layer, dst_layer) in COUPLING_LAYERS.items():
+            unchanged = all(
+                not infos[layer][kind] and infos[layer]["remap"] is None
+                for layer in (coupling, src_layer, dst_layer)
+                for kind in ("added_nodes", "removed_nodes", "added_edges", "removed_edges")
+            )
+            if coupling not in previous_pairs:
+                write_inter_layer_index(output_dir, coupling)
+            elif not unchanged:
+                _patch_inter_layer_index(output_dir, coupling, previous_pairs[coupling], infos)
+
+        # 合并记录只追加增量（列顺序与文件表头一致），step 1 的全量文件保持不变
+        header = pd.read_csv(merged_path, encoding='utf-8', nrows=0).columns
+        _append_csv(delta_df.reindex(columns=header), merged_path)
+        new_hashes = np.setdiff1d(delta_hashes, record_keys)
+        state.save_record_keys(np.insert(record_keys, np.searchsorted(record_keys, new_hashes), new_hashes))
+        for layer, arrays in layer_state.items():
+            state.save_layer(layer, *arrays)
+            state.meta["layers"][layer] = {
+                key: file_signature(path) for key, path in _layer_files(output_dir, layer).items()
+            }
+        state.meta["merged_csv"] = file_signature(merged_path)
+        state.write()
+
+        with open(delta_dir / 'manifest.json', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        lines = [f"增量导入完成\n新增专利：{manifest['rows']['new']}条 | 变更专利：{changed}条"]
+        for layer, info in manifest["layers"].items():
+            lines.append(
+                f"{layer}: 节点 +{info['added_nodes']}/-{info['removed_nodes']}，"
+                f"边 +{info['added_edges']}/-{info['removed_edges']}（{'追加' if info['mode'] == 'append' else '重写'}）"
+            )
+        lines.append(f"合并记录：{merged_path}")
+        lines.append(f"增量清单：{delta_dir / 'manifest.json'}")
+        report = "\n".join(lines)
+        print(report)
+        return report
+
+    except Exception as e:
+        error_msg = f"增量导入失败：{str(e)}"
+        print(error_msg)
+        return error_msg
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='step 2 增量导入')
+    parser.add_argument('--delta', type=str, help='新增或变更记录的CSV路径')
+    parser.add_argument('--base', type=str, help='step 2 的全量输入CSV路径（只读）')
+    parser.add_argument('--output_dir', type=str, help='step2输出目录路径')
+    parser.add_argument('--merged', type=str, help='合并后记录的CSV路径，默认与全量文件同目录的patent_data_merged.csv')
+
+    args = parser.parse_args()
+    ingest_patent_delta(args.delta, args.base, args.output_dir, args.merged)
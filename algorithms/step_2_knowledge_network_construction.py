@@ -2,10 +2,12 @@
 # License: MIT
 
 import pandas as pd
-import re
 import os
 from pathlib import Path
 
+from citation_parser import knowledge_network_tables
+from graph_store import write_graph_store
+
 def construct_knowledge_network(input_path=None, output_dir=None):
     """构建知识网络
     
@@ -23,6 +25,7 @@ def construct_knowledge_network(input_path=None, output_dir=None):
     # 设置输出文件路径
     nodes_path = output_dir / 'knowledge_network_nodes.csv'
     edges_path = output_dir / 'knowledge_network_edges.csv'
+    citations_path = output_dir / 'knowledge_network_citations.csv'
 
     # 确保输出目录存在
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -35,44 +38,23 @@ def construct_knowledge_network(input_path=None, output_dir=None):
         df = pd.read_csv(input_path, encoding='utf-8')
         original_records = len(df)
 
-        # 定义文本清洗函数
-        def clean_text(text):
-            if pd.isna(text):
-                return ""
-            cleaned = re.sub(r"\(.*?\)|（.*?）", "", str(text)).strip()
-            return cleaned if cleaned else ""
-
-        # 初始化数据容器
-        nodes = set()
-        edges = set()
-
-        # 处理数据
-        for _, row in df.iterrows():
-            patent_num = clean_text(row['公开（公告）号'])
-            citations = [x.strip() for x in clean_text(row['引文专利公开号']).split("|") if x.strip()]
-            citing = [x.strip() for x in clean_text(row['施引专利公开号']).split("|") if x.strip()]
-
-            # 添加节点和边
-            nodes.add(patent_num)
-            for target in citations + citing:
-                if target:
-                    nodes.add(target)
-                    edge = tuple(sorted([patent_num, target]))
-                    edges.add(edge)
-
-        # 生成数据框
-        nodes_df = pd.DataFrame(sorted(nodes), columns=["节点"])
-        edges_df = pd.DataFrame(sorted(edges), columns=["节点1", "节点2"])
+        # 向量化解析引文字段：节点、无向边及有向引用边（施引专利 -> 被引专利）
+        nodes_df, edges_df, citations_df = knowledge_network_tables(df)
 
         # 保存结果为CSV
         nodes_df.to_csv(nodes_path, index=False, encoding='utf-8-sig')
         edges_df.to_csv(edges_path, index=False, encoding='utf-8-sig')
+        citations_df.to_csv(citations_path, index=False, encoding='utf-8-sig')
+
+        # 保存CSR图存储，供后续步骤内存映射加载
+        write_graph_store(output_dir, 'knowledge', nodes_df['节点'], edges_df, edges_path=edges_path)
 
         # 生成统计报告
         report = (
             f"网络构建完成\n原始专利数：{original_records}条\n"
-            f"生成节点数：{len(nodes)}个\n生成边数：{len(edges)}条\n"
-            f"节点文件：{nodes_path}\n边文件：{edges_path}"
+            f"生成节点数：{len(nodes_df)}个\n生成边数：{len(edges_df)}条\n"
+            f"有向引用边数：{len(citations_df)}条\n"
+            f"节点文件：{nodes_path}\n边文件：{edges_path}\n引用边文件：{citations_path}"
         )
         print(report)
         return report
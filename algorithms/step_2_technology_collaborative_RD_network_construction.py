@@ -4,6 +4,9 @@
 import pandas as pd
 from pathlib import Path
 
+from graph_store import write_graph_store
+from inter_layer_index import write_inter_layer_index
+
 def construct_technology_collaborative_RD_network(input_path=None, output_dir=None):
     """构建技术-合作研发双层网络
     
@@ -62,6 +65,11 @@ def construct_technology_collaborative_RD_network(input_path=None, output_dir=No
         nodes_df.to_csv(nodes_path, index=False, encoding='utf-8-sig')
         edges_df.to_csv(edges_path, index=False, encoding='utf-8-sig')
 
+        # 保存CSR图存储，供后续步骤内存映射加载
+        write_graph_store(output_dir, 'technology-collaborative_R&D', nodes_df['节点'], edges_df, edges_path=edges_path)
+        # 按两个网络层节点编号保存层间邻居索引（两个方向），供step 3及4.3/5.3直接加载
+        write_inter_layer_index(output_dir, 'technology-collaborative_R&D')
+
         # 生成统计报告
         report = (
             f"网络构建完成\n原始专利数：{original_records}条\n"
@@ -1,17 +1,105 @@
 # Copyright © dongbingxue. All rights reserved.
 # License: MIT
 
+import time
 import numpy as np
 import pandas as pd
-import networkx as nx
 from pathlib import Path
 
-def calculate_network_weights(input_dir=None, output_dir=None):
+from hypergraph import Hypergraph, load_layer_graph
+from incremental_pagerank import DEFAULT_MAX_DELTA_RATIO, incremental_pagerank, load_edge_delta
+from inter_layer_index import load_inter_layer_index
+from pagerank_cache import DEFAULT_CACHE_SIZE_MB, cached_pagerank, load_cached_pagerank
+
+
+def _project_weights(candidate: np.ndarray, fallback: np.ndarray) -> np.ndarray:
+    """外推结果投影回概率单纯形，失效时退回普通不动点更新"""
+    candidate = np.clip(candidate, 0, None)
+    total = candidate.sum()
+    if not np.isfinite(total) or total <= 0:
+        return fallback
+    return candidate / total
+
+
+def _anderson_step(history: list, Y_new: np.ndarray) -> np.ndarray:
+    """Anderson加速：以最近若干次迭代的残差差分做最小二乘外推
+
+    Args:
+        history (list): [(Y_k, G(Y_k)), ...]，按时间顺序
+        Y_new (ndarray): 最近一次的 G(Y_k)
+    """
+    ys = np.array([y for y, _ in history])
+    gs = np.array([g for _, g in history])
+    residuals = gs - ys
+    d_residuals = np.diff(residuals, axis=0).T
+    d_gs = np.diff(gs, axis=0).T
+    gamma = np.linalg.lstsq(d_residuals, residuals[-1], rcond=None)[0]
+    return _project_weights(Y_new - d_gs @ gamma, Y_new)
+
+
+def _aitken_step(y0: np.ndarray, y1: np.ndarray, y2: np.ndarray) -> np.ndarray:
+    """逐分量Aitken Δ²外推，分母过小的分量保留 y2"""
+    denominator = y2 - 2 * y1 + y0
+    safe = np.abs(denominator) > 1e-15
+    accelerated = np.where(safe, y0 - (y1 - y0) ** 2 / np.where(safe, denominator, 1), y2)
+    return _project_weights(accelerated, y2)
+
+
+def _load_warm_weights(weights_path: Path):
+    """读取上次运行的层权重，不存在或无效时返回 None"""
+    try:
+        Y = np.loadtxt(weights_path)
+    except (OSError, ValueError):
+        return None
+    if Y.shape != (3,) or not np.all(np.isfinite(Y)) or Y.sum() <= 0:
+        return None
+    return Y / Y.sum()
+
+
+def _load_previous_vectors(warm_path: Path, layers: list) -> dict:
+    """读取上次运行保存的各层 (节点名, PageRank向量)"""
+    if not warm_path.exists():
+        return {}
+    previous = {}
+    with np.load(warm_path) as data:
+        for layer in layers:
+            if f"{layer}_nodes" in data:
+                previous[layer] = (data[f"{layer}_nodes"], data[f"{layer}_values"])
+    return previous
+
+
+def _align_vectors(previous: dict, networks: dict) -> dict:
+    """把上次的PageRank向量按节点名对齐到当前网络，新增节点取均值"""
+    vectors = {}
+    for layer, (nodes, values) in previous.items():
+        aligned = pd.Series(values, index=nodes).reindex(networks[layer].nodes.astype(str)).to_numpy()
+        if np.isnan(aligned).all():
+            continue
+        vectors[layer] = np.where(np.isnan(aligned), np.nanmean(aligned), aligned)
+    return vectors
+
+
+def _save_warm_vectors(warm_path: Path, networks: dict, pagerank: dict) -> None:
+    arrays = {}
+    for layer, graph in networks.items():
+        arrays[f"{layer}_nodes"] = graph.nodes.astype(str)
+        arrays[f"{layer}_values"] = pagerank[layer]
+    np.savez(warm_path, **arrays)
+
+
+def calculate_network_weights(input_dir=None, output_dir=None, cache_dir=None, use_cache=True,
+                              warm_start=False, acceleration="anderson", incremental=False, delta_dir=None):
     """计算多层网络权重
     
     Args:
         input_dir (str/Path): 输入目录路径，默认'../data/step2_output'
         output_dir (str/Path): 输出目录路径，默认'../data/step3_output'
+        cache_dir (str/Path): PageRank缓存目录，默认'{output_dir}/pagerank_cache'
+        use_cache (bool): 是否使用PageRank缓存
+        warm_start (bool): 是否以上次运行的层权重和各层PageRank向量为初值
+        acceleration (str): 外层不动点迭代的加速方式："anderson"、"aitken" 或 None（普通迭代）
+        incremental (bool): 是否以上次的PageRank向量和边增量做前向推送增量更新（超图模式的网络层按全量计算）
+        delta_dir (str/Path): 边增量目录，默认'{input_dir}/delta'
     
     Returns:
         str: 处理结果报告
@@ -19,6 +107,8 @@ def calculate_network_weights(input_dir=None, output_dir=None):
     # 设置默认路径
     input_dir = Path(input_dir) if input_dir else Path('../data/step2_output')
     output_dir = Path(output_dir) if output_dir else Path('../data/step3_output')
+    cache_dir = Path(cache_dir) if cache_dir else output_dir / 'pagerank_cache'
+    delta_dir = Path(delta_dir) if delta_dir else input_dir / 'delta'
     
     # 设置输出文件路径
     output_path = output_dir / 'network_layer_weights.txt'
@@ -27,92 +117,119 @@ def calculate_network_weights(input_dir=None, output_dir=None):
     output_dir.mkdir(parents=True, exist_ok=True)
 
     try:
+        if acceleration not in (None, "none", "anderson", "aitken"):
+            raise ValueError(f"未知的加速方式：{acceleration}")
+
         # 配置参数
         config = {
             "max_iter": 1000,
             "tol": 1e-6,
             "alpha": 0.85,
+            "pagerank_max_iter": 100,
+            "pagerank_tol": 1e-6,
+            "cache_size_mb": DEFAULT_CACHE_SIZE_MB,
+            "anderson_memory": 3,
+            "max_delta_ratio": DEFAULT_MAX_DELTA_RATIO,
             "layer_order": ["knowledge", "technology", "collaborative_R&D"]
         }
 
-        # 加载单层网络
-        def load_network(network_type):
-            G = nx.Graph()
-            nodes_path = input_dir / f"{network_type}_network_nodes.csv"
-            edges_path = input_dir / f"{network_type}_network_edges.csv"
-            
-            if not nodes_path.exists() or not edges_path.exists():
-                raise FileNotFoundError(f"网络文件不存在：{nodes_path} 或 {edges_path}")
-                
-            nodes = pd.read_csv(nodes_path, encoding='utf-8')
-            edges = pd.read_csv(edges_path, encoding='utf-8')
-            G.add_nodes_from(nodes['节点'].astype(str))
-            G.add_edges_from(edges[['节点1', '节点2']].astype(str).values.tolist())
-            return G
-
-        # 加载层间耦合网络
-        def load_coupling(coupling_type):
-            G = nx.Graph()
-            edges_path = input_dir / f"{coupling_type}_network_edges.csv"
-            
-            if not edges_path.exists():
-                raise FileNotFoundError(f"耦合网络文件不存在：{edges_path}")
-                
-            edges = pd.read_csv(edges_path, encoding='utf-8')
-            G.add_edges_from(edges[['节点1', '节点2']].astype(str).values.tolist())
-            return G
-
-        # 初始化网络
-        knowledge_net = load_network("knowledge")
-        technology_net = load_network("technology")
-        collaborative_RD_net = load_network("collaborative_R&D")
-
-        # 加载耦合网络
-        kt_coupling = load_coupling("knowledge-technology")
-        tc_coupling = load_coupling("technology-collaborative_R&D")
-        kc_coupling = load_coupling("knowledge-collaborative_R&D")
-
-        # 初始化权重矩阵
-        Y = np.ones(3) / 3
-        X = {
-            "knowledge": np.ones(knowledge_net.number_of_nodes()) / knowledge_net.number_of_nodes(),
-            "technology": np.ones(technology_net.number_of_nodes()) / technology_net.number_of_nodes(),
-            "collaborative_R&D": np.ones(collaborative_RD_net.number_of_nodes()) / collaborative_RD_net.number_of_nodes()
-        }
+        # 加载单层网络（超图模式的关联矩阵优先，其次内存映射step 2的CSR图存储）
+        networks = {layer: load_layer_graph(input_dir, layer) for layer in config["layer_order"]}
+
+        # 层间边为 (源层节点编号, 目标层节点编号)，直接取自step 2保存的层间邻居索引
+        def coupling_pairs(src_layer, dst_layer):
+            index = load_inter_layer_index(input_dir, src_layer, dst_layer)
+            if index.n_src != networks[src_layer].n_nodes or index.n_dst != networks[dst_layer].n_nodes:
+                raise ValueError(f"{src_layer}->{dst_layer}层间邻居索引与网络节点数不一致")
+            return index.rows, index.indices
+
+        pairs = [
+            (src, dst, *coupling_pairs(src, dst))
+            for src, dst in [("knowledge", "technology"), ("technology", "collaborative_R&D"),
+                             ("collaborative_R&D", "knowledge")]
+        ]
+
+        # 上次运行的各层PageRank向量：热启动时作为幂迭代初值（按节点名对齐），增量模式下作为推送起点
+        warm_path = output_dir / 'pagerank_warm_start.npz'
+        previous = _load_previous_vectors(warm_path, config["layer_order"]) if warm_start or incremental else {}
+        nstart = _align_vectors(previous, networks) if warm_start else {}
 
-        # 迭代计算
-        for _ in range(config["max_iter"]):
-            X_new = {
-                "knowledge": np.array(list(nx.pagerank(knowledge_net, alpha=config["alpha"]).values())),
-                "technology": np.array(list(nx.pagerank(technology_net, alpha=config["alpha"]).values())),
-                "collaborative_R&D": np.array(list(nx.pagerank(collaborative_RD_net, alpha=config["alpha"]).values()))
-            }
-
-            # 应用耦合效应
-            def apply_coupling(src_net, dst_net, coupling, src_layer, dst_layer):
-                src_nodes = list(src_net.nodes)
-                dst_nodes = list(dst_net.nodes)
-                for src, dst in coupling.edges():
-                    if src in src_nodes and dst in dst_nodes:
-                        src_idx = src_nodes.index(src)
-                        dst_idx = dst_nodes.index(dst)
-                        X_new[dst_layer][dst_idx] += X_new[src_layer][src_idx] * Y[config["layer_order"].index(src_layer)]
-
-            apply_coupling(knowledge_net, technology_net, kt_coupling, "knowledge", "technology")
-            apply_coupling(technology_net, collaborative_RD_net, tc_coupling, "technology", "collaborative_R&D")
-            apply_coupling(collaborative_RD_net, knowledge_net, kc_coupling, "collaborative_R&D", "knowledge")
-
-            # 更新全局权重
-            Y_new = np.array([
-                X_new["knowledge"].sum(),
-                X_new["technology"].sum(),
-                X_new["collaborative_R&D"].sum()
-            ])
-            Y_new /= Y_new.sum()
-
-            if np.linalg.norm(Y_new - Y) < config["tol"]:
+        # PageRank只依赖单层网络结构，与层权重无关，迭代外计算一次；结构未变时直接读取缓存
+        pagerank = {}
+        modes = {}
+        cache_hits = 0
+        for layer in config["layer_order"]:
+            graph = networks[layer]
+            values = load_cached_pagerank(
+                graph, config["alpha"], config["pagerank_max_iter"], config["pagerank_tol"], cache_dir
+            ) if use_cache else None
+            if values is not None:
+                pagerank[layer], modes[layer] = values, "缓存"
+                cache_hits += 1
+            elif incremental and layer in previous and not isinstance(graph, Hypergraph):
+                pagerank[layer], mode, pushes = incremental_pagerank(
+                    graph, *previous[layer], delta=load_edge_delta(delta_dir, layer),
+                    alpha=config["alpha"], tol=config["pagerank_tol"], max_delta_ratio=config["max_delta_ratio"]
+                )
+                modes[layer] = f"增量推送{pushes}次" if mode == "incremental" else "全量"
+            else:
+                pagerank[layer], _ = cached_pagerank(
+                    graph, alpha=config["alpha"], max_iter=config["pagerank_max_iter"], tol=config["pagerank_tol"],
+                    cache_dir=cache_dir if use_cache else None, max_size_mb=config["cache_size_mb"],
+                    nstart=nstart.get(layer)
+                )
+                modes[layer] = "全量"
+        if cache_hits < len(pagerank) or not warm_path.exists():
+            _save_warm_vectors(warm_path, networks, pagerank)
+
+        # 单次不动点映射：由层权重Y计算耦合后的各层得分，再归一化为新的层权重
+        def layer_weights(Y):
+            X_new = {layer: values.copy() for layer, values in pagerank.items()}
+
+            # 应用耦合效应（依次作用，后一耦合使用前一耦合更新后的得分）
+            for src_layer, dst_layer, src_ids, dst_ids in pairs:
+                weight = Y[config["layer_order"].index(src_layer)]
+                X_new[dst_layer] += np.bincount(
+                    dst_ids, weights=X_new[src_layer][src_ids] * weight, minlength=len(X_new[dst_layer])
+                )
+
+            Y_new = np.array([X_new[layer].sum() for layer in config["layer_order"]])
+            return Y_new / Y_new.sum()
+
+        # 初始化权重矩阵（热启动时读取上次的层权重）
+        Y = _load_warm_weights(output_path) if warm_start else None
+        if Y is None:
+            Y = np.ones(3) / 3
+
+        # 迭代计算，可选 Anderson / Aitken 外推加速
+        trace = []
+        history = []
+        start_time = time.perf_counter()
+        for iteration in range(1, config["max_iter"] + 1):
+            Y_new = layer_weights(Y)
+            residual = float(np.linalg.norm(Y_new - Y))
+            if residual < config["tol"]:
+                trace.append((iteration, residual, time.perf_counter() - start_time, "converged"))
                 break
-            Y = Y_new.copy()
+
+            Y_next, update = Y_new, "plain"
+            if acceleration == "anderson":
+                history = (history + [(Y, Y_new)])[-(config["anderson_memory"] + 1):]
+                if len(history) > 1:
+                    Y_next, update = _anderson_step(history, Y_new), "anderson"
+            elif acceleration == "aitken":
+                history = (history or [Y]) + [Y_new]
+                if len(history) == 3:
+                    Y_next, update = _aitken_step(*history), "aitken"
+                    history = [Y_next]
+            trace.append((iteration, residual, time.perf_counter() - start_time, update))
+            Y = Y_next
+
+        # 保存收敛轨迹
+        trace_path = output_dir / 'convergence_trace.csv'
+        pd.DataFrame(trace, columns=["iteration", "residual", "elapsed_seconds", "update"]).to_csv(
+            trace_path, index=False, encoding='utf-8-sig'
+        )
 
         # 保存结果
         np.savetxt(output_path, Y, fmt="%.6f")
@@ -123,6 +240,10 @@ def calculate_network_weights(input_dir=None, output_dir=None):
             f"知识层权重: {Y[0]:.4f}\n"
             f"技术层权重: {Y[1]:.4f}\n"
             f"合作研发层权重: {Y[2]:.4f}\n"
+            f"PageRank缓存命中: {cache_hits}/{len(pagerank)}\n"
+            f"PageRank计算方式: {'，'.join(f'{layer} {mode}' for layer, mode in modes.items())}\n"
+            f"迭代次数: {trace[-1][0]}，最终残差: {trace[-1][1]:.2e}\n"
+            f"收敛轨迹已保存至: {trace_path}\n"
             f"权重文件已保存至: {output_path}"
         )
         print(report)
@@ -139,6 +260,14 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='计算多层网络权重')
     parser.add_argument('--input_dir', type=str, help='输入目录路径')
     parser.add_argument('--output_dir', type=str, help='输出目录路径')
+    parser.add_argument('--cache_dir', type=str, help='PageRank缓存目录')
+    parser.add_argument('--no_cache', action='store_true', help='不使用PageRank缓存')
+    parser.add_argument('--warm_start', action='store_true', help='以上次运行结果为初值')
+    parser.add_argument('--acceleration', type=str, default='anderson', choices=['anderson', 'aitken', 'none'],
+                        help='外层迭代加速方式')
+    parser.add_argument('--incremental', action='store_true', help='按边增量增量更新PageRank')
+    parser.add_argument('--delta_dir', type=str, help='边增量目录')
     
     args = parser.parse_args()
-    calculate_network_weights(args.input_dir, args.output_dir)
\ No newline at end of file
+    calculate_network_weights(args.input_dir, args.output_dir, args.cache_dir, not args.no_cache,
+                              args.warm_start, args.acceleration, args.incremental, args.delta_dir)
\ No newline at end of file
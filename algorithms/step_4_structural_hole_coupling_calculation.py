@@ -1,11 +1,24 @@
 # Copyright © dongbingxue. All rights reserved.
 # License: MIT
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-from numba import jit
 from pathlib import Path
 
+from graph_components import component_blocks, dense_adjacency
+from graph_pruning import core_mask, induced_csr, internal_mask, leaf_mask, parse_prune_rules
+from graph_store import build_csr, load_graph_store
+from hypergraph import load_hypergraph
+from incremental_pagerank import load_edge_delta
+from jit_support import NUMBA_AVAILABLE, jit
+from node_ordering import restore_order
+
+NUMPY_CHUNK_PATHS = 4_000_000   # NumPy回退实现中单个分块展开的两步路径数上限
+BURT_COLUMNS = ["effective_size", "efficiency", "hierarchy"]   # 与限制度同一次遍历得到的 Burt 结构洞指标
+
 
 def load_network_data(network_type: str, input_dir: Path) -> tuple:
     """加载网络节点和边数据"""
@@ -29,7 +42,7 @@ def load_network_data(network_type: str, input_dir: Path) -> tuple:
             raise ValueError("边文件必须包含'节点1'和'节点2'列")
         edges_df = edges_df[["节点1", "节点2"]].rename(
             columns={"节点1": "source", "节点2": "target"}
-        ).applymap(str)
+        ).astype(str)
 
         return nodes, edges_df
     except Exception as e:
@@ -54,6 +67,14 @@ def create_adjacency_matrix(nodes: np.ndarray, edges_df: pd.DataFrame) -> tuple:
         raise RuntimeError(f"邻接矩阵构建失败: {str(e)}")
 
 
+def csr_to_adjacency_matrix(indptr: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """由CSR结构展开稠密邻接矩阵"""
+    n = len(indptr) - 1
+    adj_matrix = np.zeros((n, n), dtype=np.float32)
+    adj_matrix[np.repeat(np.arange(n), np.diff(indptr)), indices] = 1
+    return adj_matrix
+
+
 def calculate_probability_matrix(adj_matrix: np.ndarray) -> np.ndarray:
     """计算邻接概率矩阵"""
     try:
@@ -87,38 +108,453 @@ def calculate_constraint(prob_matrix: np.ndarray) -> np.ndarray:
     return constraint
 
 
-def calculate_structural_hole(network_type: str, input_dir: Path, output_dir: Path) -> str:
-    """主计算函数"""
+def create_csr_adjacency(nodes: np.ndarray, edges_df: pd.DataFrame) -> tuple:
+    """构建CSR格式的邻接结构（无向、去重，自环只记一次）"""
     try:
-        # 加载数据
-        nodes, edges_df = load_network_data(network_type, input_dir)
+        n = len(nodes)
+        node_ids = pd.Index(nodes)
+        src = node_ids.get_indexer(edges_df["source"])
+        dst = node_ids.get_indexer(edges_df["target"])
+        valid = (src >= 0) & (dst >= 0)
+        # 双向展开后按 (行, 列) 去重，与稠密邻接矩阵的置1语义一致
+        indptr, indices, _ = build_csr(n, src[valid], dst[valid])
+        return indptr, indices
+    except Exception as e:
+        raise RuntimeError(f"CSR邻接结构构建失败: {str(e)}")
 
-        # 构建邻接矩阵
-        node_index, adj_matrix = create_adjacency_matrix(nodes, edges_df)
 
-        # 计算概率矩阵
-        prob_matrix = calculate_probability_matrix(adj_matrix)
+@jit(nopython=True)
+def _node_ego_sums(indptr: np.ndarray, indices: np.ndarray, i: int, p_row: np.ndarray, out: np.ndarray) -> None:
+    """一次遍历节点 i 的自我中心网络，写出 out = [限制度之和, 联系人数, 联系人之间的有序连边数, sum c_ij·ln c_ij]
+
+    p_row 为长度n的全零工作数组，返回时恢复为全零。联系人为 i 的邻居（不含自身），
+    间接项中经过的中间节点 k 正是与 j 相连的联系人，因此连边数与限制度在同一次遍历中累计。
+    """
+    out[:] = 0.0
+    start, end = indptr[i], indptr[i + 1]
+    if end == start:
+        return
+    p_i = 1.0 / (end - start)
+    for a in range(start, end):
+        p_row[indices[a]] = p_i
+
+    for a in range(start, end):
+        j = indices[a]
+        if j == i:
+            continue
+        indirect = 0.0
+        for b in range(indptr[j], indptr[j + 1]):
+            k = indices[b]
+            if k != i and k != j and p_row[k] > 0:
+                indirect += p_row[k] / (indptr[k + 1] - indptr[k])
+                out[2] += 1.0
+        c_ij = (p_i + indirect) ** 2
+        out[0] += c_ij
+        out[1] += 1.0
+        out[3] += c_ij * np.log(c_ij)
+
+    for a in range(start, end):
+        p_row[indices[a]] = 0.0
+
+
+@jit(nopython=True)
+def calculate_ego_sums(indptr: np.ndarray, indices: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """targets 中各节点的自我中心网络累计量，返回 (len(targets), 4)，列含义见 _node_ego_sums"""
+    n = indptr.shape[0] - 1
+    sums = np.zeros((len(targets), 4))
+    p_row = np.zeros(n)
+    for a in range(len(targets)):
+        _node_ego_sums(indptr, indices, targets[a], p_row, sums[a])
+    return sums
+
+
+def burt_measures(sums: np.ndarray) -> np.ndarray:
+    """由自我中心网络累计量计算 Burt 结构洞指标，返回 (m, 4)：结构洞耦合与 BURT_COLUMNS
+
+    有效规模 = N - 2t/N（N 为联系人数，t 为联系人之间的连边数，与 networkx.effective_size 的无权定义一致），
+    效率 = 有效规模 / N；等级度 = sum_j (c_ij/c̄)·ln(c_ij/c̄) / (N·ln N)，c̄ = C/N，C 为限制度之和，
+    展开为 (sum c_ij ln c_ij / C + ln N - ln C) / ln N。没有联系人的节点各指标为NaN，只有一个联系人时等级度为0。
+    """
+    constraint, contacts, ties, clogc = sums.T
+    has_contacts = contacts > 0
+    safe_contacts = np.where(has_contacts, contacts, 1.0)
+    effective_size = np.where(has_contacts, contacts - ties / safe_contacts, np.nan)
+    efficiency = effective_size / np.where(has_contacts, contacts, np.nan)
+    log_contacts = np.log(safe_contacts)
+    safe_constraint = np.where(has_contacts, constraint, 1.0)
+    hierarchy = np.divide(clogc / safe_constraint + log_contacts - np.log(safe_constraint), log_contacts,
+                          where=contacts > 1, out=np.zeros(len(sums)))
+    hierarchy[~has_contacts] = np.nan
+    return np.column_stack([1 - constraint, effective_size, efficiency, hierarchy])
+
+
+def calculate_constraint_sparse(indptr: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """稀疏限制度计算，返回每个节点的限制度之和
+
+    与稠密版本逐项等价：p_ij = 1/deg(i)，间接项只在 i 的邻居 j 的邻居中累加，
+    内存占用与边数成正比。
+    """
+    return ego_sums_kernel(indptr, indices, np.arange(indptr.shape[0] - 1))[:, 0]
+
+
+def calculate_constraint_subset(indptr: np.ndarray, indices: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """只计算 targets 中节点的限制度之和（与 calculate_constraint_sparse 逐项一致）"""
+    return ego_sums_kernel(indptr, indices, np.asarray(targets, dtype=np.int64))[:, 0]
+
+
+def _constraint_terms(prob: np.ndarray) -> np.ndarray:
+    """由概率矩阵（或按最后两维堆叠的一批概率矩阵）计算逐项限制度 (p_ij + sum_{k != i,j} p_ik p_kj)²
+
+    间接项 sum_{k != i,j} p_ik p_kj = (P @ P)_ij - p_ii p_ij - p_ij p_jj，只保留 j != i 的联系人。
+    """
+    diagonal = np.diagonal(prob, axis1=-2, axis2=-1)
+    indirect = prob @ prob - diagonal[..., :, np.newaxis] * prob - prob * diagonal[..., np.newaxis, :]
+    contacts = (prob > 0) & ~np.eye(prob.shape[-1], dtype=bool)
+    return np.where(contacts, (prob + indirect) ** 2, 0.0)
+
+
+def _dense_ego_sums(prob: np.ndarray, terms: np.ndarray) -> np.ndarray:
+    """由概率矩阵和逐项限制度得到自我中心网络累计量，支持按最后两维堆叠，返回 (..., s, 4)
+
+    联系人之间的有序连边数为 ((A @ A) ∘ A) 的行和，A 为去掉对角线的0/1邻接矩阵。
+    """
+    contacts = (terms > 0).astype(prob.dtype)
+    ties = ((contacts @ contacts) * contacts).sum(axis=-1)
+    clogc = np.where(terms > 0, terms * np.log(np.where(terms > 0, terms, 1.0)), 0.0).sum(axis=-1)
+    return np.stack([terms.sum(axis=-1), contacts.sum(axis=-1), ties, clogc], axis=-1).astype(np.float64)
 
-        # 计算限制度
-        constraint_matrix = calculate_constraint(prob_matrix)
 
-        # 计算结构洞耦合值
-        stru_values = 1 - constraint_matrix.sum(axis=1)
+def calculate_constraint_numpy(prob_matrix: np.ndarray) -> np.ndarray:
+    """calculate_constraint 的向量化NumPy实现（未安装numba时使用）"""
+    return _constraint_terms(prob_matrix)
 
-        # 生成结果DataFrame
+
+def calculate_ego_sums_numpy(indptr: np.ndarray, indices: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """calculate_ego_sums 的向量化NumPy实现（未安装numba时使用）
+
+    按分块展开目标节点的两步路径 i -> k -> j（k != i，j != i,k），路径权重 p_ik·p_kj = 1/deg(i)·1/deg(k)，
+    在有序的 (i, j) 条目键上二分查找，只把终点是 i 的联系人的路径累加到对应的间接项；命中的路径数即联系人之间的有序连边数。
+    """
+    n = indptr.shape[0] - 1
+    degree = np.diff(indptr)
+    inv_degree = np.divide(1.0, degree, where=degree > 0, out=np.zeros(n))
+    targets = np.asarray(targets, dtype=np.int64)
+    sums = np.zeros((len(targets), 4))
+    # 每个目标节点的两步路径数 sum_{k in N(i)} deg(k)，按累计路径数分块
+    entry_paths = np.zeros(len(indices) + 1, dtype=np.int64)
+    np.cumsum(degree[indices], out=entry_paths[1:])
+    paths = np.cumsum(entry_paths[indptr[targets + 1]] - entry_paths[indptr[targets]])
+    start = 0
+    while start < len(targets):
+        stop = max(int(np.searchsorted(paths, paths[start] + NUMPY_CHUNK_PATHS, side='right')), start + 1)
+        chunk = targets[start:stop]
+        owner, positions = _expand_rows(indptr, chunk)
+        i, k = chunk[owner], indices[positions].astype(np.int64)
+
+        # 联系人条目 (i, j)：行内列号有序，键 owner*n + j 整体递增
+        contact = k != i
+        keys = owner[contact] * n + k[contact]
+        p_i = inv_degree[i[contact]]
+
+        # 两步路径 i -> k -> j
+        via = np.flatnonzero(contact)
+        path_owner, path_positions = _expand_rows(indptr, k[via])
+        mid = k[via][path_owner]
+        start_entry = via[path_owner]
+        j = indices[path_positions].astype(np.int64)
+        valid = (j != i[start_entry]) & (j != mid)
+        path_keys = owner[start_entry[valid]] * n + j[valid]
+        weights = inv_degree[i[start_entry[valid]]] * inv_degree[mid[valid]]
+        slot = np.searchsorted(keys, path_keys)
+        slot[slot == len(keys)] = 0
+        matched = keys[slot] == path_keys if len(keys) else np.zeros(len(path_keys), dtype=bool)
+        indirect = np.bincount(slot[matched], weights=weights[matched], minlength=len(keys))
+
+        terms = (p_i + indirect) ** 2
+        contact_owner = owner[contact]
+        block = sums[start:stop]
+        block[:, 0] = np.bincount(contact_owner, weights=terms, minlength=len(chunk))
+        block[:, 1] = np.bincount(contact_owner, minlength=len(chunk))
+        block[:, 2] = np.bincount(contact_owner[slot[matched]], minlength=len(chunk))
+        block[:, 3] = np.bincount(contact_owner, weights=terms * np.log(terms), minlength=len(chunk))
+        start = stop
+    return sums
+
+
+def _expand_rows(indptr: np.ndarray, rows: np.ndarray) -> tuple:
+    """rows 各行的CSR条目：返回 (条目所属的 rows 下标, 条目位置)"""
+    counts = indptr[rows + 1] - indptr[rows]
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    owner = np.repeat(np.arange(len(rows)), counts)
+    return owner, np.repeat(indptr[rows] - offsets[:-1], counts) + np.arange(offsets[-1])
+
+
+def calculate_constraint_sparse_numpy(indptr: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """calculate_constraint_sparse 的向量化NumPy实现（未安装numba时使用）"""
+    return calculate_ego_sums_numpy(indptr, indices, np.arange(indptr.shape[0] - 1))[:, 0]
+
+
+# 实际使用的限制度内核（供基准测试和耗时标定调用）：未安装numba时改用向量化NumPy实现，避免纯Python逐项循环
+constraint_kernel = calculate_constraint if NUMBA_AVAILABLE else calculate_constraint_numpy
+ego_sums_kernel = calculate_ego_sums if NUMBA_AVAILABLE else calculate_ego_sums_numpy
+
+
+def calculate_ego_sums_pruned(indptr: np.ndarray, indices: np.ndarray, keep: np.ndarray,
+                              method: str = "dense") -> np.ndarray:
+    """只在核心节点上计算自我中心网络累计量，剪除的节点回填，返回 (n, 4)
+
+    剪除的叶节点为闭式值（限制度1、一个联系人），孤立节点为0，其余剪除的节点在完整图上逐节点精确计算。
+    稠密方式只为核心构建矩阵：p_ij 按完整图的度数归一化，核心节点每个被剪除的邻居再加上直接项 p_ij²
+    （并计入联系人数）。叶节点的间接项恒为0、与其他联系人没有连边，因此只剪除叶节点时与不剪枝的结果逐项一致；
+    剪除了其他节点（k-核、数据集外节点）时，核心节点忽略经过这些节点的间接项和连边，为近似值。
+    稀疏（及按分量）方式本身不需要 n×n 矩阵，核心节点同样在完整图上精确计算。
+    """
+    n = indptr.shape[0] - 1
+    degree = np.diff(indptr)
+    sums = np.zeros((n, 4))
+    pruned_leaves = leaf_mask(indptr, indices) & ~keep
+    sums[pruned_leaves, 0] = 1.0
+    sums[pruned_leaves, 1] = 1.0
+    others = np.flatnonzero(~keep & ~pruned_leaves & (degree > 0))
+    if len(others):
+        sums[others] = ego_sums_kernel(indptr, indices, others)
+
+    core = np.flatnonzero(keep)
+    if len(core) == 0:
+        return sums
+    if method != "dense":
+        sums[core] = ego_sums_kernel(indptr, indices, core)
+        return sums
+
+    sub_indptr, sub_indices = induced_csr(indptr, indices, keep)
+    core_degree = degree[core].astype(np.float32)
+    prob_matrix = csr_to_adjacency_matrix(sub_indptr, sub_indices) / core_degree[:, np.newaxis]
+    core_sums = _dense_ego_sums(prob_matrix, constraint_kernel(prob_matrix))
+    # 被剪除的邻居 l 只计直接项 p_jl²（叶节点的间接项为0，且不出现在其他间接项中）
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    pruned_neighbors = np.bincount(rows[~keep[indices]], minlength=n)[core]
+    direct = (np.float32(1) / core_degree).astype(np.float64) ** 2
+    core_sums[:, 0] += pruned_neighbors * direct
+    core_sums[:, 1] += pruned_neighbors
+    core_sums[:, 3] += pruned_neighbors * direct * np.log(direct)
+    sums[core] = core_sums
+    return sums
+
+
+def calculate_constraint_pruned(indptr: np.ndarray, indices: np.ndarray, keep: np.ndarray,
+                                method: str = "dense") -> np.ndarray:
+    """只在核心节点上计算限制度之和，剪除的节点回填（见 calculate_ego_sums_pruned）"""
+    return calculate_ego_sums_pruned(indptr, indices, keep, method)[:, 0]
+
+
+def _batched_prob(adjacency: np.ndarray) -> np.ndarray:
+    degree = adjacency.sum(axis=2)
+    return np.divide(adjacency, degree[:, :, np.newaxis], where=degree[:, :, np.newaxis] != 0,
+                     out=np.zeros_like(adjacency))
+
+
+def calculate_constraint_batched(adjacency: np.ndarray) -> np.ndarray:
+    """一批补零对齐的小分量的限制度之和，adjacency 为 (m, s, s) 0/1 张量，返回 (m, s)
+
+    与逐节点计算逐项一致，见 _constraint_terms。
+    """
+    return _constraint_terms(_batched_prob(adjacency)).sum(axis=2)
+
+
+def _block_ego_sums(kind: str, sub_indptr: np.ndarray, sub_indices: np.ndarray, layout) -> np.ndarray:
+    """单个计算块的自我中心网络累计量（进程池任务），行顺序同块的节点顺序"""
+    if kind == "sparse":
+        return ego_sums_kernel(sub_indptr, sub_indices, np.arange(sub_indptr.shape[0] - 1))
+    slots, rows = layout[0], layout[1]
+    prob = _batched_prob(dense_adjacency(sub_indptr, sub_indices, layout))
+    return _dense_ego_sums(prob, _constraint_terms(prob))[slots, rows]
+
+
+def calculate_ego_sums_components(indptr: np.ndarray, indices: np.ndarray, workers: int = None) -> np.ndarray:
+    """按连通分量分块计算自我中心网络累计量（结果与 calculate_ego_sums 一致），返回 (n, 4)
+
+    巨型分量等较大的分量走稀疏路径，小分量成批稠密计算，各块按规模从大到小提交到进程池。
+
+    Args:
+        workers (int): 进程数，默认取 NUMBA_NUM_THREADS（流程执行器分配的线程预算），未设置时为CPU核数；
+            为1或只有一个块时在当前进程中计算
+    """
+    n = indptr.shape[0] - 1
+    sums = np.zeros((n, 4))
+    blocks = component_blocks(indptr, indices)
+    workers = workers or int(os.environ.get("NUMBA_NUM_THREADS") or os.cpu_count() or 1)
+    if workers <= 1 or len(blocks) <= 1:
+        for kind, nodes, sub_indptr, sub_indices, layout in blocks:
+            sums[nodes] = _block_ego_sums(kind, sub_indptr, sub_indices, layout)
+        return sums
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(blocks))) as executor:
+        futures = [(nodes, executor.submit(_block_ego_sums, kind, sub_indptr, sub_indices, layout))
+                   for kind, nodes, sub_indptr, sub_indices, layout in blocks]
+        for nodes, future in futures:
+            sums[nodes] = future.result()
+    return sums
+
+
+def calculate_constraint_components(indptr: np.ndarray, indices: np.ndarray, workers: int = None) -> np.ndarray:
+    """按连通分量分块计算限制度之和（见 calculate_ego_sums_components）"""
+    return calculate_ego_sums_components(indptr, indices, workers)[:, 0]
+
+
+def affected_by_delta(indptr: np.ndarray, indices: np.ndarray, endpoint_ids: np.ndarray) -> np.ndarray:
+    """边增量影响限制度的节点编号（升序）
+
+    节点 i 的限制度只取决于 deg(i)、i 的邻居、邻居的度数以及邻居之间的边，
+    因此边 (u, v) 的增删只影响 u、v 及其邻居，即自我中心网络包含该边的节点。
+    删除边的另一端点也是端点之一，故只需当前图中的邻居。
+    """
+    endpoint_ids = np.unique(endpoint_ids[endpoint_ids >= 0])
+    if len(endpoint_ids) == 0:
+        return endpoint_ids.astype(np.int64)
+    neighbors = [indices[indptr[u]:indptr[u + 1]] for u in endpoint_ids]
+    return np.unique(np.concatenate([endpoint_ids] + neighbors)).astype(np.int64)
+
+
+def _load_previous_result(output_path: Path, nodes: np.ndarray) -> pd.DataFrame:
+    """读取上次的结构洞耦合结果（结构洞耦合与 BURT_COLUMNS）并按当前节点对齐，新节点为NaN
+
+    文件不存在或缺少这些列（旧版输出）时返回 None。
+    """
+    if not output_path.exists():
+        return None
+    previous = pd.read_csv(output_path, encoding='utf-8', dtype={"节点": str}, keep_default_na=False)
+    columns = ["structural_hole_coupling"] + BURT_COLUMNS
+    if not {"节点", *columns}.issubset(previous.columns):
+        return None
+    values = previous[columns].apply(pd.to_numeric, errors='coerce').set_index(pd.Index(previous["节点"]))
+    return values[~values.index.duplicated()].reindex(pd.Index(nodes).astype(str))
+
+
+def calculate_structural_hole(network_type: str, input_dir: Path, output_dir: Path,
+                              method: str = "dense", incremental: bool = False, delta_dir=None,
+                              prune=None, workers=None) -> str:
+    """主计算函数
+
+    Args:
+        network_type (str): 网络类型（knowledge / technology / collaborative_R&D）
+        input_dir (str/Path): step2输出目录
+        output_dir (str/Path): step4输出目录
+        method (str): 计算方式，"dense"为稠密矩阵（内存O(n²)），"sparse"为CSR稀疏计算（内存O(E)），
+            "component"为按连通分量分块并行（小分量成批稠密、较大分量稀疏）；
+            网络层以超图模式构建时"dense"/"sparse"都直接在关联矩阵上按需展开计算（内存与隶属关系数成正比），
+            不支持"component"；
+            各方式在计算限制度的同一次自我中心网络遍历中得到 BURT_COLUMNS（见 burt_measures）
+        incremental (bool): 以已保存的结果为基础，只重算边增量影响到的节点并修补输出文件；
+            缺少上次结果或边增量时退回全量计算
+        delta_dir (str/Path): 边增量目录，默认为 input_dir/delta
+        prune (str): 剪枝规则，如 "leaf"、"kcore:2"、"leaf,external"，见 graph_pruning；
+            只剪除叶节点时结果与不剪枝一致，增量修补时不剪枝；超图模式不支持剪枝和增量修补
+        workers (int): "component"方式的进程数，默认取线程预算
+    """
+    input_dir = Path(input_dir)
+    output_dir = Path(output_dir)
+    output_path = output_dir / f"{network_type}_network_structural_hole_coupling.csv"
+    try:
+        if method not in ("dense", "sparse", "component"):
+            raise ValueError(f"未知的计算方式：{method}")
+        rules = parse_prune_rules(prune)
+
+        # 超图模式只有关联矩阵：在其上按需展开投影计算限制度
+        hypergraph = load_hypergraph(input_dir, network_type)
+        previous = delta = order = None
+        if hypergraph is not None:
+            if method == "component":
+                raise ValueError("超图模式不支持按连通分量计算（method=component），请使用dense或sparse")
+            if rules:
+                raise ValueError(f"超图模式不支持剪枝（prune={prune}）")
+            if incremental:
+                raise ValueError("超图模式不支持增量修补（incremental），请按全量计算")
+            nodes = hypergraph.nodes
+            measures = burt_measures(hypergraph.ego_sums())
+        else:
+            # 优先内存映射step 2写出的CSR图存储，不存在或已过期时回退到CSV
+            graph = load_graph_store(input_dir, network_type,
+                                     edges_path=input_dir / f"{network_type}_network_edges.csv")
+            if graph is not None:
+                nodes = graph.nodes
+                indptr, indices = graph.indptr, graph.indices
+                # 图存储带有节点重排时在重排后的编号上计算（增量修补按原编号定位节点，不使用重排）
+                reordered = None if incremental else graph.reordered()
+                if reordered is not None:
+                    order, indptr, indices, _ = reordered
+            else:
+                nodes, edges_df = load_network_data(network_type, input_dir)
+                indptr, indices = create_csr_adjacency(nodes, edges_df)
+
+            if incremental:
+                delta = load_edge_delta(Path(delta_dir) if delta_dir else input_dir / "delta", network_type)
+                if delta is not None:
+                    previous = _load_previous_result(output_path, nodes)
+
+            if previous is not None:
+                # 增量修补：增量边端点及其邻居、以及上次结果中没有的新节点重新计算，其余沿用上次结果
+                # （有效规模等指标同样只取决于自我中心网络，受影响的节点集合相同）
+                node_ids = pd.Index(nodes).astype(str)
+                endpoints = np.concatenate([
+                    node_ids.get_indexer(delta[kind][column].astype(str))
+                    for kind in ("added", "removed") for column in ("节点1", "节点2")
+                ])
+                targets = np.union1d(affected_by_delta(indptr, indices, endpoints),
+                                     np.flatnonzero(previous["structural_hole_coupling"].isna().to_numpy()))
+                measures = previous.to_numpy(dtype=np.float64)
+                measures[targets] = burt_measures(ego_sums_kernel(indptr, indices, targets))
+            elif rules:
+                # 剪枝：只在核心上计算，剪除的节点回填闭式值或逐节点精确值
+                internal = internal_mask(input_dir, len(nodes)) \
+                    if rules.get("external") and network_type == "knowledge" else None
+                if internal is not None and order is not None:
+                    internal = internal[order]
+                keep = core_mask(indptr, indices, rules, internal)
+                measures = burt_measures(calculate_ego_sums_pruned(indptr, indices, keep, method))
+            elif method == "component":
+                # 按连通分量分块，各块在进程池中计算，巨型分量优先
+                measures = burt_measures(calculate_ego_sums_components(indptr, indices, workers))
+            elif method == "sparse":
+                # 稀疏计算：不构建n×n矩阵
+                measures = burt_measures(ego_sums_kernel(indptr, indices, np.arange(len(nodes))))
+            else:
+                # 构建邻接矩阵
+                adj_matrix = csr_to_adjacency_matrix(indptr, indices)
+
+                # 计算概率矩阵
+                prob_matrix = calculate_probability_matrix(adj_matrix)
+
+                # 计算限制度
+                measures = burt_measures(_dense_ego_sums(prob_matrix, constraint_kernel(prob_matrix)))
+
+            if order is not None:
+                measures = restore_order(measures, order)
+
+        # 生成结果DataFrame（结构洞耦合值 = 1 - 限制度）
         result_df = pd.DataFrame({
             "节点": nodes,
-            "structural_hole_coupling": stru_values,
+            "structural_hole_coupling": measures[:, 0],
             "网络层": _get_layer_number(network_type)
         })
+        result_df[BURT_COLUMNS] = measures[:, 1:]
 
         # 确保输出目录存在
         output_dir.mkdir(parents=True, exist_ok=True)
 
         # 保存结果
-        output_path = output_dir / f"{network_type}_network_structural_hole_coupling.csv"
         result_df.to_csv(output_path, index=False, encoding='utf-8-sig')
 
+        if previous is not None:
+            return (f"[{network_type}]增量计算完成，重算{len(targets)}/{len(nodes)}个节点，"
+                    f"结果保存至：{output_path}")
+        if hypergraph is not None:
+            return f"[{network_type}]计算完成（超图模式），结果保存至：{output_path}"
+        if rules:
+            return (f"[{network_type}]计算完成（剪枝 {prune}：核心{int(keep.sum())}/{len(nodes)}个节点），"
+                    f"结果保存至：{output_path}")
+        if order is not None:
+            return f"[{network_type}]计算完成（节点重排 {graph.ordering}），结果保存至：{output_path}"
         return f"[{network_type}]计算完成，结果保存至：{output_path}"
 
     except Exception as e:
@@ -135,12 +571,18 @@ def _get_layer_number(network_type: str) -> int:
     return layer_mapping.get(network_type, 0)
 
 
-def structural_hole_calculation(input_dir=None, output_dir=None):
+def structural_hole_calculation(input_dir=None, output_dir=None, method="dense", incremental=False, delta_dir=None,
+                                prune=None, workers=None):
     """统一处理所有网络类型
     
     Args:
         input_dir (str/Path): 输入目录路径，默认'../data/step2_output'
         output_dir (str/Path): 输出目录路径，默认'../data/step4_output'
+        method (str): 计算方式，"dense"、"sparse"或"component"
+        incremental (bool): 按边增量只重算受影响节点并修补已保存的结果
+        delta_dir (str/Path): 边增量目录，默认'{input_dir}/delta'
+        prune (str): 剪枝规则，如 "leaf"、"kcore:2"、"leaf,external"
+        workers (int): "component"方式的进程数
     
     Returns:
         str: 处理结果报告
@@ -155,7 +597,8 @@ def structural_hole_calculation(input_dir=None, output_dir=None):
 
     for nt in network_types:
         try:
-            res = calculate_structural_hole(nt, input_dir, output_dir)
+            res = calculate_structural_hole(nt, input_dir, output_dir, method, incremental, delta_dir, prune,
+                                            workers)
             results.append(res)
             print(res)
         except Exception as e:
@@ -175,6 +618,15 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='计算结构洞耦合')
     parser.add_argument('--input_dir', type=str, help='输入目录路径')
     parser.add_argument('--output_dir', type=str, help='输出目录路径')
+    parser.add_argument('--method', type=str, default='dense', choices=['dense', 'sparse', 'component'],
+                        help='计算方式：dense（稠密矩阵）、sparse（CSR稀疏）或 component（按连通分量分块并行）')
+    parser.add_argument('--incremental', action='store_true',
+                        help='按step 2输出的边增量只重算受影响节点，修补已保存的结果')
+    parser.add_argument('--delta_dir', type=str, help='边增量目录，默认为输入目录下的delta')
+    parser.add_argument('--prune', type=str,
+                        help='剪枝规则：leaf（叶节点，结果不变）、kcore:k（k-核）、external（知识网络数据集外专利），可用逗号组合')
+    parser.add_argument('--workers', type=int, help='component方式的进程数，默认取线程预算')
     
     args = parser.parse_args()
-    structural_hole_calculation(args.input_dir, args.output_dir)
\ No newline at end of file
+    structural_hole_calculation(args.input_dir, args.output_dir, args.method, args.incremental, args.delta_dir,
+                                args.prune, args.workers)
\ No newline at end of file
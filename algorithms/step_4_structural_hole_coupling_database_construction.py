@@ -5,6 +5,8 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from step_4_structural_hole_coupling_calculation import BURT_COLUMNS
+
 
 def build_structural_hole_database(step3_dir=None, step4_dir=None):
     """构建结构洞耦合数据库
@@ -86,6 +88,8 @@ def build_structural_hole_database(step3_dir=None, step4_dir=None):
             'network_layer_weights',
             'structural_hole_coupling*weights'
         ]
+        # step 4.1 同时输出的 Burt 指标（有效规模、效率、等级度）；旧版结果文件中没有的层为空
+        output_columns += [col for col in BURT_COLUMNS if col in combined_df.columns]
 
         # 保存结果
         combined_df[output_columns].to_csv(output_path, index=False, encoding='utf-8-sig')
@@ -4,6 +4,9 @@
 import pandas as pd
 from pathlib import Path
 
+from graph_store import load_graph_store
+from hypergraph import load_hypergraph
+
 
 def calculate_centrality_coupling(input_dir=None, output_dir=None):
     """计算中心度耦合指标
@@ -53,36 +56,42 @@ def calculate_centrality_coupling(input_dir=None, output_dir=None):
             # 检查文件是否存在
             if not nodes_path.exists():
                 raise FileNotFoundError(f"节点文件不存在: {nodes_path}")
-            if not edges_path.exists():
-                raise FileNotFoundError(f"边文件不存在: {edges_path}")
 
             # 加载数据
             nodes_df = pd.read_csv(nodes_path, encoding='utf-8')
-            edges_df = pd.read_csv(edges_path, encoding='utf-8')
-
-            # 检查必要列是否存在
-            required_node_cols = ['节点']
-            required_edge_cols = ['节点1', '节点2']
-
-            missing_node_cols = [col for col in required_node_cols if col not in nodes_df.columns]
-            missing_edge_cols = [col for col in required_edge_cols if col not in edges_df.columns]
-
-            if missing_node_cols:
-                raise ValueError(f"{net_name}节点文件缺少必要列: {missing_node_cols}")
-            if missing_edge_cols:
-                raise ValueError(f"{net_name}边文件缺少必要列: {missing_edge_cols}")
+            if '节点' not in nodes_df.columns:
+                raise ValueError(f"{net_name}节点文件缺少必要列: ['节点']")
 
             # 计算度中心性
             centrality_df = nodes_df[['节点']].copy()
             centrality_df['centrality_coupling'] = 0
 
-            # 计算每个节点的连接数（使用'节点1'和'节点2'作为边端点）
-            for idx, node in nodes_df['节点'].items():
-                count = len(edges_df[
-                                (edges_df['节点1'] == node) |
-                                (edges_df['节点2'] == node)
-                                ])
-                centrality_df.at[idx, 'centrality_coupling'] = count
+            layer = net_name[:-len('_network')]
+            hypergraph = load_hypergraph(input_dir, layer)
+            if hypergraph is not None and hypergraph.n_nodes == len(nodes_df):
+                # 超图模式没有边文件：度数为投影图中的邻居数，由关联矩阵按需展开得到
+                centrality_df['centrality_coupling'] = hypergraph.degree
+            else:
+                if not edges_path.exists():
+                    raise FileNotFoundError(f"边文件不存在: {edges_path}")
+
+                # 图存储的节点编号与节点文件行号一致，度数即CSR行长度，无需读取边文件
+                graph = load_graph_store(input_dir, layer, edges_path=edges_path)
+                if graph is not None and graph.n_nodes == len(nodes_df):
+                    centrality_df['centrality_coupling'] = graph.degree
+                else:
+                    edges_df = pd.read_csv(edges_path, encoding='utf-8')
+                    missing_edge_cols = [col for col in ['节点1', '节点2'] if col not in edges_df.columns]
+                    if missing_edge_cols:
+                        raise ValueError(f"{net_name}边文件缺少必要列: {missing_edge_cols}")
+
+                    # 计算每个节点的连接数（使用'节点1'和'节点2'作为边端点）
+                    for idx, node in nodes_df['节点'].items():
+                        count = len(edges_df[
+                                        (edges_df['节点1'] == node) |
+                                        (edges_df['节点2'] == node)
+                                        ])
+                        centrality_df.at[idx, 'centrality_coupling'] = count
 
             # 保存结果
             centrality_df.to_csv(output_path, index=False, encoding='utf-8-sig')
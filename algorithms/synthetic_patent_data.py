@@ -0,0 +1,222 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+合成专利数据生成器
+生成与 original_patent_data.csv 列结构一致的合成数据，引文数、IPC分类数、专利权人数
+以及名称复用均服从幂律分布，按随机种子可复现，用于各步骤的基准测试和复杂度分析。
+"""
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+REQUIRED_COLUMNS = ["公开（公告）号", "引文专利公开号", "施引专利公开号", "IPC分类", "专利权人"]
+
+IPC_SECTIONS = list("ABCDEFGH")
+ORG_PREFIXES = ["华", "中", "东", "南", "北", "西", "海", "天", "新", "长", "恒", "鼎", "瑞", "博", "宏", "金"]
+ORG_WORDS = ["科", "信", "通", "达", "智", "联", "创", "微", "电", "能", "芯", "光", "云", "安", "精", "盛"]
+ORG_INDUSTRIES = ["技术", "电子", "通信", "科技", "半导体", "新能源", "智能装备", "生物医药", "材料", "软件"]
+ORG_SUFFIXES = ["有限公司", "股份有限公司", "集团有限公司", "研究院", "大学"]
+SURNAMES = list("王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗")
+GIVEN_NAMES = list("伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚")
+
+
+def _power_law_counts(rng: np.random.Generator, size: int, alpha: float, minimum: int, maximum: int) -> np.ndarray:
+    """生成服从截断Zipf分布的计数"""
+    counts = rng.zipf(alpha, size) - 1 + minimum
+    return np.minimum(counts, maximum)
+
+
+def _zipf_choice(rng: np.random.Generator, size: int, pool_size: int, alpha: float) -> np.ndarray:
+    """按Zipf流行度从 [0, pool_size) 中抽样，编号越小越热门"""
+    ranks = rng.zipf(alpha, size) - 1
+    return ranks % pool_size
+
+
+def _build_ipc_vocabulary(rng: np.random.Generator, size: int) -> np.ndarray:
+    """生成分层结构的IPC编码表（部/大类/小类/大组/小组）"""
+    sections = rng.choice(IPC_SECTIONS, size)
+    classes = rng.integers(1, 100, size)
+    subclasses = rng.choice(list("ABCDEFGHJKLMNPQ"), size)
+    main_groups = np.minimum(rng.zipf(1.6, size), 999)
+    subgroups = rng.choice([0, 2, 4, 6, 8, 10, 12, 14, 16, 18, 20, 22, 24, 26, 28, 30, 32, 34, 36, 38], size)
+    vocabulary = pd.unique(pd.Series([
+        f"{s}{c:02d}{sc}{mg}/{sg:02d}"
+        for s, c, sc, mg, sg in zip(sections, classes, subclasses, main_groups, subgroups)
+    ]))
+    return np.asarray(vocabulary, dtype=object)
+
+
+def _build_applicant_pool(rng: np.random.Generator, size: int, personal_ratio: float,
+                          variant_ratio: float) -> np.ndarray:
+    """生成申请人名称池：机构名称为主，含一定比例的个人和书写变体"""
+    def pick(options):
+        return pd.Series(np.asarray(options, dtype=object)[rng.integers(0, len(options), size)])
+
+    organizations = (pick(ORG_PREFIXES) + pick(ORG_WORDS) + pick(ORG_WORDS)
+                     + pick(ORG_INDUSTRIES) + pick(ORG_SUFFIXES))
+    given = pick(GIVEN_NAMES) + np.where(rng.random(size) < 0.5, pick(GIVEN_NAMES), "")
+    persons = pick(SURNAMES) + given
+
+    # 同一机构的不同书写形式，模拟真实导出数据中的名称不一致
+    variant = np.where(rng.random(size) < variant_ratio, rng.integers(0, 3, size), -1)
+    organizations = organizations.mask(variant == 0, organizations.str.replace("有限公司", "(有限公司)", regex=False))
+    organizations = organizations.mask(variant == 1, organizations + " ")
+    organizations = organizations.mask(variant == 2, organizations.str.replace("股份有限公司", "股份公司", regex=False))
+
+    names = organizations.mask(rng.random(size) < personal_ratio, persons)
+    # 去重后的编号即为流行度排名
+    return np.asarray(pd.unique(names), dtype=object)
+
+
+def _patent_ids(idx: np.ndarray) -> np.ndarray:
+    """数据集内专利的公开号"""
+    return np.char.add(np.char.add("CN", (100_000_000 + idx).astype(str)), "A")
+
+
+def _external_ids(idx: np.ndarray) -> np.ndarray:
+    """数据集外专利的公开号"""
+    return np.char.add(np.char.add("US", (10_000_000 + idx).astype(str)), "B2")
+
+
+def _join_lists(row_ids: np.ndarray, values: np.ndarray, n_rows: int) -> list:
+    """按行号（已升序）将值用'|'拼接，空行返回空字符串"""
+    bounds = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(row_ids, minlength=n_rows), out=bounds[1:])
+    values = values.tolist()
+    return ["|".join(values[a:b]) for a, b in zip(bounds[:-1].tolist(), bounds[1:].tolist())]
+
+
+def _unique_pairs(row_ids: np.ndarray, codes: np.ndarray, pool_size: int) -> tuple:
+    """对 (行号, 编号) 去重，保证同一专利内不出现重复编码"""
+    keys = np.unique(row_ids.astype(np.int64) * pool_size + codes)
+    return keys // pool_size, keys % pool_size
+
+
+def generate_synthetic_patent_data(output_path=None, n_patents=1000, seed=42, chunk_size=100_000,
+                                   citation_alpha=2.2, ipc_alpha=2.5, applicant_alpha=3.0,
+                                   name_reuse_alpha=1.3, max_citations=200, max_ipc=60,
+                                   max_applicants=40, external_ratio=0.3, personal_ratio=0.1,
+                                   variant_ratio=0.05):
+    """生成合成专利数据
+
+    Args:
+        output_path (str/Path): CSV输出路径，默认'../data/input/original_patent_data.csv'
+        n_patents (int): 专利数
+        seed (int): 随机种子，相同种子与分块大小生成完全相同的数据
+        chunk_size (int): 分块生成并写出的行数，用于控制大规模数据的内存
+        citation_alpha (float): 引文/施引数的幂律指数
+        ipc_alpha (float): 单件专利IPC分类数的幂律指数
+        applicant_alpha (float): 单件专利专利权人数的幂律指数
+        name_reuse_alpha (float): 专利权人和IPC编码复用的Zipf指数
+        max_citations (int): 单件专利引文数上限
+        max_ipc (int): 单件专利IPC分类数上限
+        max_applicants (int): 单件专利专利权人数上限
+        external_ratio (float): 指向数据集外专利的引文比例
+        personal_ratio (float): 申请人池中个人名称的比例
+        variant_ratio (float): 机构名称出现书写变体的比例
+
+    Returns:
+        str: 处理结果报告
+    """
+    output_path = Path(output_path) if output_path else Path('../data/input/original_patent_data.csv')
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        # 名称池只依赖种子，与分块无关
+        pool_rng = np.random.default_rng([seed, 0])
+        ipc_vocabulary = _build_ipc_vocabulary(pool_rng, min(70_000, max(200, n_patents // 10)))
+        applicant_pool = _build_applicant_pool(pool_rng, max(100, n_patents // 4), personal_ratio, variant_ratio)
+        external_pool_size = max(1000, n_patents)
+
+        total_citations = 0
+        total_ipc = 0
+        total_applicants = 0
+
+        for chunk_index, start in enumerate(range(0, n_patents, chunk_size)):
+            rng = np.random.default_rng([seed, chunk_index + 1])
+            end = min(start + chunk_size, n_patents)
+            size = end - start
+            rows = np.arange(size)
+            global_ids = np.arange(start, end)
+
+            # 引文：以较早专利为主（越早越常被引用），部分指向数据集外
+            n_cited = _power_law_counts(rng, size, citation_alpha, 0, max_citations)
+            cited_rows = np.repeat(rows, n_cited)
+            owner = global_ids[cited_rows]
+            targets = (rng.random(len(cited_rows)) ** 3 * owner).astype(np.int64)
+            external = (rng.random(len(cited_rows)) < external_ratio) | (owner == 0)
+            cited_text = np.where(
+                external,
+                _external_ids(_zipf_choice(rng, len(cited_rows), external_pool_size, name_reuse_alpha)),
+                _patent_ids(targets)
+            ).astype(object)
+
+            # 施引：指向较晚专利，部分来自数据集外
+            n_citing = _power_law_counts(rng, size, citation_alpha, 0, max_citations)
+            citing_rows = np.repeat(rows, n_citing)
+            owner = global_ids[citing_rows]
+            later = owner + 1 + (rng.random(len(citing_rows)) * np.maximum(n_patents - owner - 1, 0)).astype(np.int64)
+            external = (rng.random(len(citing_rows)) < external_ratio) | (later >= n_patents)
+            citing_text = np.where(
+                external,
+                _external_ids(_zipf_choice(rng, len(citing_rows), external_pool_size, name_reuse_alpha)),
+                _patent_ids(np.minimum(later, n_patents - 1))
+            ).astype(object)
+
+            # IPC分类：至少1个，按流行度复用
+            n_ipc = _power_law_counts(rng, size, ipc_alpha, 1, max_ipc)
+            ipc_rows = np.repeat(rows, n_ipc)
+            ipc_codes = _zipf_choice(rng, len(ipc_rows), len(ipc_vocabulary), name_reuse_alpha)
+            ipc_rows, ipc_codes = _unique_pairs(ipc_rows, ipc_codes, len(ipc_vocabulary))
+
+            # 专利权人：至少1个，按流行度复用
+            n_app = _power_law_counts(rng, size, applicant_alpha, 1, max_applicants)
+            app_rows = np.repeat(rows, n_app)
+            app_codes = _zipf_choice(rng, len(app_rows), len(applicant_pool), name_reuse_alpha)
+            app_rows, app_codes = _unique_pairs(app_rows, app_codes, len(applicant_pool))
+
+            chunk_df = pd.DataFrame({
+                "公开（公告）号": _patent_ids(global_ids),
+                "引文专利公开号": _join_lists(cited_rows, cited_text, size),
+                "施引专利公开号": _join_lists(citing_rows, citing_text, size),
+                "IPC分类": _join_lists(ipc_rows, ipc_vocabulary[ipc_codes], size),
+                "专利权人": _join_lists(app_rows, applicant_pool[app_codes], size),
+            })[REQUIRED_COLUMNS]
+
+            # 首块写入表头和BOM，后续块追加
+            if chunk_index == 0:
+                chunk_df.to_csv(output_path, index=False, encoding='utf-8-sig')
+            else:
+                chunk_df.to_csv(output_path, index=False, header=False, mode='a', encoding='utf-8')
+
+            total_citations += len(cited_rows) + len(citing_rows)
+            total_ipc += len(ipc_rows)
+            total_applicants += len(app_rows)
+
+        report = (
+            f"合成数据生成完成\n专利数：{n_patents}条（种子：{seed}）\n"
+            f"引文/施引总数：{total_citations}条\nIPC分类总数：{total_ipc}个\n"
+            f"专利权人总数：{total_applicants}个\n输出文件：{output_path}"
+        )
+        print(report)
+        return report
+
+    except Exception as e:
+        error_msg = f"合成数据生成失败：{str(e)}"
+        print(error_msg)
+        return error_msg
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='生成合成专利数据')
+    parser.add_argument('--output', type=str, help='输出CSV文件路径')
+    parser.add_argument('--n_patents', type=int, default=1000, help='专利数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--chunk_size', type=int, default=100_000, help='分块生成的行数')
+
+    args = parser.parse_args()
+    generate_synthetic_patent_data(args.output, args.n_patents, args.seed, args.chunk_size)
@@ -0,0 +1,270 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+内核级基准测试（asv 格式）
+覆盖限制度计算、邻接矩阵构建、step 2 团展开、step 3 PageRank 与耦合传播、超图模式、节点重排和 step 4.3/5.3 指数聚合。
+"""
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from .common import SIZES, SMALL_SIZES, LAYERS, prepare_dataset, with_peakmem
+from .reference_impl import (
+    reference_adjacency_matrix, reference_bipartite_edges, reference_clique_edges,
+    reference_coupling_propagation, reference_index_aggregation, reference_knowledge_edges
+)
+from array_graph import ArrayGraph, load_array_graph
+from citation_parser import knowledge_network_tables
+from graph_pruning import core_mask, parse_prune_rules
+from hypergraph import Hypergraph, build_incidence
+from index_aggregation import InterLayerOperator, node_values
+from inter_layer_index import COUPLING_LAYERS, layer_nodes, load_inter_layer_index, write_inter_layer_index
+from node_ordering import ORDERINGS, node_order, permute_csr
+from step_4_structural_hole_coupling_calculation import (
+    load_network_data, create_adjacency_matrix, create_csr_adjacency,
+    calculate_probability_matrix, constraint_kernel, calculate_constraint_sparse, calculate_constraint_pruned,
+    calculate_constraint_components, calculate_constraint_numpy, calculate_constraint_sparse_numpy
+)
+
+INTER_LAYER_EDGES = {
+    "knowledge": ['knowledge-technology_network_edges.csv', 'knowledge-collaborative_R&D_network_edges.csv'],
+    "technology": ['knowledge-technology_network_edges.csv', 'technology-collaborative_R&D_network_edges.csv'],
+    "collaborative_R&D": ['knowledge-collaborative_R&D_network_edges.csv',
+                          'technology-collaborative_R&D_network_edges.csv'],
+}
+
+
+@with_peakmem
+class ConstraintKernel:
+    params = (SMALL_SIZES, LAYERS)
+    param_names = ['n_patents', 'layer']
+    timeout = 600
+
+    def setup(self, n_patents, layer):
+        root = prepare_dataset(n_patents, 'step2')
+        nodes, edges_df = load_network_data(layer, root / 'step2_output')
+        _, adj_matrix = create_adjacency_matrix(nodes, edges_df)
+        self.prob_matrix = calculate_probability_matrix(adj_matrix)
+        self.indptr, self.indices = create_csr_adjacency(nodes, edges_df)
+        self.leaf_core = core_mask(self.indptr, self.indices, parse_prune_rules("leaf"))
+        # 预编译，避免把JIT编译时间计入
+        constraint_kernel(np.zeros((2, 2), dtype=np.float32))
+        calculate_constraint_sparse(np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64))
+
+    def time_dense(self, n_patents, layer):
+        constraint_kernel(self.prob_matrix)
+
+    def time_sparse(self, n_patents, layer):
+        calculate_constraint_sparse(self.indptr, self.indices)
+
+    def time_dense_numpy(self, n_patents, layer):
+        calculate_constraint_numpy(self.prob_matrix)
+
+    def time_sparse_numpy(self, n_patents, layer):
+        calculate_constraint_sparse_numpy(self.indptr, self.indices)
+
+    def time_dense_pruned_leaf(self, n_patents, layer):
+        calculate_constraint_pruned(self.indptr, self.indices, self.leaf_core, "dense")
+
+    def time_components(self, n_patents, layer):
+        calculate_constraint_components(self.indptr, self.indices, workers=1)
+
+
+@with_peakmem
+class AdjacencyKernel:
+    params = (SMALL_SIZES, LAYERS)
+    param_names = ['n_patents', 'layer']
+
+    def setup(self, n_patents, layer):
+        root = prepare_dataset(n_patents, 'step2')
+        self.nodes, self.edges_df = load_network_data(layer, root / 'step2_output')
+
+    def time_reference_adjacency_matrix(self, n_patents, layer):
+        reference_adjacency_matrix(self.nodes, self.edges_df)
+
+    def time_create_adjacency_matrix(self, n_patents, layer):
+        create_adjacency_matrix(self.nodes, self.edges_df)
+
+    def time_create_csr_adjacency(self, n_patents, layer):
+        create_csr_adjacency(self.nodes, self.edges_df)
+
+
+@with_peakmem
+class PairGeneration:
+    params = SIZES
+    param_names = ['n_patents']
+
+    def setup(self, n_patents):
+        root = prepare_dataset(n_patents, 'step1')
+        self.df = pd.read_csv(root / 'step1_output' / 'patent_data_selected_columns.csv', encoding='utf-8')
+
+    def time_reference_citation_pairs(self, n_patents):
+        reference_knowledge_edges(self.df)
+
+    def time_citation_tables(self, n_patents):
+        knowledge_network_tables(self.df)
+
+    def time_reference_ipc_clique(self, n_patents):
+        reference_clique_edges(self.df, 'IPC分类')
+
+    def time_reference_applicant_clique(self, n_patents):
+        reference_clique_edges(self.df, '专利权人')
+
+    def time_reference_ipc_applicant_product(self, n_patents):
+        reference_bipartite_edges(self.df, 'IPC分类', '专利权人')
+
+
+@with_peakmem
+class CouplingPropagation:
+    params = SMALL_SIZES
+    param_names = ['n_patents']
+    timeout = 600
+
+    def setup(self, n_patents):
+        root = prepare_dataset(n_patents, 'step2')
+        step2 = root / 'step2_output'
+        self.src_nodes = pd.read_csv(step2 / 'knowledge_network_nodes.csv')['节点'].astype(str).tolist()
+        self.dst_nodes = pd.read_csv(step2 / 'technology_network_nodes.csv')['节点'].astype(str).tolist()
+        coupling = nx.Graph()
+        edges = pd.read_csv(step2 / 'knowledge-technology_network_edges.csv')
+        coupling.add_edges_from(edges[['节点1', '节点2']].astype(str).values.tolist())
+        self.coupling_edges = list(coupling.edges())
+        self.x_src = np.ones(len(self.src_nodes)) / len(self.src_nodes)
+        self.x_dst = np.ones(len(self.dst_nodes)) / len(self.dst_nodes)
+
+        # 数组图路径：层间边预先映射为编号对（含两种方向）
+        knowledge = load_array_graph(step2, 'knowledge')
+        technology = load_array_graph(step2, 'technology')
+        coupling = load_array_graph(step2, 'knowledge-technology')
+        src_ids = knowledge.index_of(coupling.nodes)[coupling.rows]
+        dst_ids = technology.index_of(coupling.nodes)[coupling.indices]
+        valid = (src_ids >= 0) & (dst_ids >= 0)
+        self.src_ids, self.dst_ids = src_ids[valid], dst_ids[valid]
+
+    def time_reference_knowledge_to_technology(self, n_patents):
+        reference_coupling_propagation(self.src_nodes, self.dst_nodes, self.coupling_edges,
+                                       self.x_src, self.x_dst, 1 / 3)
+
+    def time_array_knowledge_to_technology(self, n_patents):
+        self.x_dst + np.bincount(self.dst_ids, weights=self.x_src[self.src_ids] / 3, minlength=len(self.x_dst))
+
+
+@with_peakmem
+class PageRankKernel:
+    params = (SIZES, LAYERS)
+    param_names = ['n_patents', 'layer']
+
+    def setup(self, n_patents, layer):
+        root = prepare_dataset(n_patents, 'step2')
+        self.graph = load_array_graph(root / 'step2_output', layer)
+        self.nx_graph = self.graph.to_networkx()
+
+    def time_networkx(self, n_patents, layer):
+        nx.pagerank(self.nx_graph, alpha=0.85)
+
+    def time_array_graph(self, n_patents, layer):
+        self.graph.pagerank(alpha=0.85)
+
+
+@with_peakmem
+class NodeOrderingKernel:
+    """节点重排前后的稀疏限制度和PageRank（ordering 为 none 时是原始的按节点名编号）"""
+    params = (SIZES, LAYERS, ['none', *ORDERINGS])
+    param_names = ['n_patents', 'layer', 'ordering']
+    timeout = 600
+
+    def setup(self, n_patents, layer, ordering):
+        root = prepare_dataset(n_patents, 'step2')
+        graph = load_array_graph(root / 'step2_output', layer)
+        if ordering != 'none':
+            order = node_order(graph.indptr, graph.indices, ordering)
+            graph = ArrayGraph(graph.nodes[order], *permute_csr(graph.indptr, graph.indices, order, graph.weights))
+        self.graph = graph
+        # 预编译，避免把JIT编译时间计入
+        calculate_constraint_sparse(np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64))
+
+    def time_constraint_sparse(self, n_patents, layer, ordering):
+        calculate_constraint_sparse(self.graph.indptr, self.graph.indices)
+
+    def time_pagerank(self, n_patents, layer, ordering):
+        self.graph.pagerank(alpha=0.85)
+
+
+@with_peakmem
+class HypergraphKernel:
+    params = (SIZES, ['technology', 'collaborative_R&D'])
+    param_names = ['n_patents', 'layer']
+    timeout = 600
+
+    def setup(self, n_patents, layer):
+        root = prepare_dataset(n_patents, 'step2')
+        df = pd.read_csv(root / 'step1_output' / 'patent_data_selected_columns.csv', encoding='utf-8')
+        column = 'IPC分类' if layer == 'technology' else '专利权人'
+        self.series = df[column]
+        self.hypergraph = Hypergraph(*build_incidence(self.series))
+        self.graph = load_array_graph(root / 'step2_output', layer)
+        # 预编译，避免把JIT编译时间计入
+        self.hypergraph.pagerank(alpha=0.85)
+        self.hypergraph.constraint()
+        calculate_constraint_sparse(self.graph.indptr, self.graph.indices)
+
+    def time_build_incidence(self, n_patents, layer):
+        build_incidence(self.series)
+
+    def time_pagerank_clique(self, n_patents, layer):
+        self.graph.pagerank(alpha=0.85)
+
+    def time_pagerank_hypergraph(self, n_patents, layer):
+        self.hypergraph.pagerank(alpha=0.85)
+
+    def time_constraint_clique(self, n_patents, layer):
+        calculate_constraint_sparse(self.graph.indptr, self.graph.indices)
+
+    def time_constraint_hypergraph(self, n_patents, layer):
+        self.hypergraph.constraint()
+
+
+@with_peakmem
+class IndexAggregation:
+    params = (SMALL_SIZES, LAYERS)
+    param_names = ['n_patents', 'layer']
+    timeout = 600
+
+    def setup(self, n_patents, layer):
+        root = prepare_dataset(n_patents, 'step5')
+        step2 = root / 'step2_output'
+        self.nodes = pd.read_csv(step2 / f'{layer}_network_nodes.csv', encoding='utf-8')['节点']
+        self.edge_dfs = [pd.read_csv(step2 / name, encoding='utf-8') for name in INTER_LAYER_EDGES[layer]]
+        self.structural_db = pd.read_csv(root / 'step4_output' / 'structural_hole_coupling_database.csv')
+        self.centrality_db = pd.read_csv(root / 'step5_output' / 'centrality_coupling_database.csv')
+        for coupling in COUPLING_LAYERS:
+            write_inter_layer_index(step2, coupling)
+        self.step2 = step2
+        self.layer_names = {name: layer_nodes(step2, name) for name in INTER_LAYER_EDGES}
+
+    def time_reference_criticality(self, n_patents, layer):
+        reference_index_aggregation(self.nodes, self.edge_dfs, self.structural_db,
+                                    'structural_hole_coupling*weights')
+
+    def time_reference_centrality(self, n_patents, layer):
+        reference_index_aggregation(self.nodes, self.edge_dfs, self.centrality_db,
+                                    'centrality_coupling*weights')
+
+    def time_operator_criticality(self, n_patents, layer):
+        values = node_values(self.structural_db, 'structural_hole_coupling*weights').to_frame()
+        InterLayerOperator.from_edges(self.nodes, self.edge_dfs).apply(values)
+
+    def time_operator_fused(self, n_patents, layer):
+        values = pd.concat([node_values(self.structural_db, 'structural_hole_coupling*weights'),
+                            node_values(self.centrality_db, 'centrality_coupling*weights')], axis=1).fillna(0)
+        InterLayerOperator.from_edges(self.nodes, self.edge_dfs).apply(values)
+
+    def time_operator_fused_index(self, n_patents, layer):
+        values = pd.concat([node_values(self.structural_db, 'structural_hole_coupling*weights'),
+                            node_values(self.centrality_db, 'centrality_coupling*weights')], axis=1).fillna(0)
+        InterLayerOperator.from_indices(self.layer_names[layer], [
+            (load_inter_layer_index(self.step2, layer, other), self.layer_names[other])
+            for other in INTER_LAYER_EDGES if other != layer
+        ]).apply(values)
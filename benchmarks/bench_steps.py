@@ -0,0 +1,199 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+各流程步骤的端到端基准测试（asv 格式）
+step 1.2 依赖外部API，不纳入基准测试。
+"""
+
+from .common import (
+    SIZES, SMALL_SIZES, LAYERS, STEP2_BUILDERS, prepare_dataset, quiet, scratch_dir, with_peakmem
+)
+from step_1_clean_patent_data import clean_patent_data
+from step_3_network_layer_weights import calculate_network_weights
+from step_4_structural_hole_coupling_calculation import calculate_structural_hole
+from step_4_structural_hole_coupling_database_construction import build_structural_hole_database
+from step_4_criticality_index_calculation import calculate_criticality
+from step_5_centrality_coupling_calculation import calculate_centrality_coupling
+from step_5_centrality_coupling_database_construction import build_centrality_coupling_database
+from step_5_centrality_index_calculation import calculate_centrality_index
+from index_aggregation import calculate_criticality_and_centrality
+from step_6_criticality_and_centrality_database_construction import build_criticality_centrality_database
+
+
+@with_peakmem
+class Step1Clean:
+    params = SIZES
+    param_names = ['n_patents']
+
+    def setup(self, n_patents):
+        self.root = prepare_dataset(n_patents, 'step1')
+        self.out = scratch_dir('step1')
+
+    def time_clean_patent_data(self, n_patents):
+        with quiet():
+            clean_patent_data(self.root / 'input' / 'original_patent_data.csv', self.out / 'cleaned.csv')
+
+
+@with_peakmem
+class Step2Construction:
+    params = SIZES
+    param_names = ['n_patents']
+
+    def setup(self, n_patents):
+        self.input = prepare_dataset(n_patents, 'step1') / 'step1_output' / 'patent_data_selected_columns.csv'
+        self.out = scratch_dir('step2')
+
+    def _run(self, index):
+        with quiet():
+            STEP2_BUILDERS[index](self.input, self.out)
+
+    def time_knowledge(self, n_patents):
+        self._run(0)
+
+    def time_technology(self, n_patents):
+        self._run(1)
+
+    def time_collaborative_RD(self, n_patents):
+        self._run(2)
+
+    def time_knowledge_technology(self, n_patents):
+        self._run(3)
+
+    def time_technology_collaborative_RD(self, n_patents):
+        self._run(4)
+
+    def time_knowledge_collaborative_RD(self, n_patents):
+        self._run(5)
+
+    def time_technology_out_of_core(self, n_patents):
+        with quiet():
+            STEP2_BUILDERS[1](self.input, self.out, out_of_core=True)
+
+    def time_collaborative_RD_out_of_core(self, n_patents):
+        with quiet():
+            STEP2_BUILDERS[2](self.input, self.out, out_of_core=True)
+
+
+@with_peakmem
+class Step3Weights:
+    params = SMALL_SIZES
+    param_names = ['n_patents']
+    timeout = 600
+
+    def setup(self, n_patents):
+        self.root = prepare_dataset(n_patents, 'step2')
+        self.out = scratch_dir('step3')
+
+    def time_calculate_network_weights(self, n_patents):
+        with quiet():
+            calculate_network_weights(self.root / 'step2_output', self.out, use_cache=False)
+
+    def time_calculate_network_weights_cached(self, n_patents):
+        with quiet():
+            calculate_network_weights(self.root / 'step2_output', self.out)
+
+
+@with_peakmem
+class Step4StructuralHole:
+    params = (SMALL_SIZES, LAYERS, ["dense", "sparse"])
+    param_names = ['n_patents', 'layer', 'method']
+    timeout = 600
+
+    def setup(self, n_patents, layer, method):
+        self.root = prepare_dataset(n_patents, 'step2')
+        self.out = scratch_dir('step4')
+
+    def time_calculate_structural_hole(self, n_patents, layer, method):
+        calculate_structural_hole(layer, self.root / 'step2_output', self.out, method=method)
+
+
+@with_peakmem
+class Step4Database:
+    params = SIZES
+    param_names = ['n_patents']
+
+    def setup(self, n_patents):
+        self.root = prepare_dataset(n_patents, 'step4')
+
+    def time_build_structural_hole_database(self, n_patents):
+        with quiet():
+            build_structural_hole_database(self.root / 'step3_output', self.root / 'step4_output')
+
+
+@with_peakmem
+class Step4Criticality:
+    params = SMALL_SIZES
+    param_names = ['n_patents']
+    timeout = 600
+
+    def setup(self, n_patents):
+        self.root = prepare_dataset(n_patents, 'step4')
+
+    def time_calculate_criticality(self, n_patents):
+        with quiet():
+            calculate_criticality(self.root / 'step2_output', self.root / 'step4_output')
+
+
+@with_peakmem
+class Step5Centrality:
+    params = SMALL_SIZES
+    param_names = ['n_patents']
+    timeout = 600
+
+    def setup(self, n_patents):
+        self.root = prepare_dataset(n_patents, 'step3')
+        self.out = scratch_dir('step5')
+
+    def time_calculate_centrality_coupling(self, n_patents):
+        with quiet():
+            calculate_centrality_coupling(self.root / 'step2_output', self.out)
+
+
+@with_peakmem
+class Step5Database:
+    params = SIZES
+    param_names = ['n_patents']
+
+    def setup(self, n_patents):
+        self.root = prepare_dataset(n_patents, 'step5')
+
+    def time_build_centrality_coupling_database(self, n_patents):
+        with quiet():
+            build_centrality_coupling_database(self.root / 'step3_output', self.root / 'step5_output')
+
+
+@with_peakmem
+class Step5Index:
+    params = SMALL_SIZES
+    param_names = ['n_patents']
+    timeout = 600
+
+    def setup(self, n_patents):
+        self.root = prepare_dataset(n_patents, 'step5')
+
+    def time_calculate_centrality_index(self, n_patents):
+        with quiet():
+            calculate_centrality_index(self.root / 'step2_output', self.root / 'step5_output')
+
+    def time_calculate_criticality_and_centrality(self, n_patents):
+        with quiet():
+            calculate_criticality_and_centrality(self.root / 'step2_output', self.root / 'step4_output',
+                                                 self.root / 'step5_output')
+
+
+@with_peakmem
+class Step6Database:
+    params = SMALL_SIZES
+    param_names = ['n_patents']
+
+    def setup(self, n_patents):
+        self.root = prepare_dataset(n_patents, 'step5')
+        with quiet():
+            calculate_criticality(self.root / 'step2_output', self.root / 'step4_output')
+            calculate_centrality_index(self.root / 'step2_output', self.root / 'step5_output')
+        self.out = scratch_dir('step6')
+
+    def time_build_criticality_centrality_database(self, n_patents):
+        with quiet():
+            build_criticality_centrality_database(self.root / 'step4_output', self.root / 'step5_output', self.out)
@@ -0,0 +1,126 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+基准测试公共工具
+负责把 algorithms 目录加入导入路径，并按规模生成、缓存各步骤所需的合成输入数据。
+"""
+
+import io
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager, redirect_stdout
+from pathlib import Path
+
+import numpy as np
+
+ALGORITHMS_DIR = Path(__file__).resolve().parent.parent / 'algorithms'
+if str(ALGORITHMS_DIR) not in sys.path:
+    sys.path.insert(0, str(ALGORITHMS_DIR))
+
+from synthetic_patent_data import generate_synthetic_patent_data
+from step_1_clean_patent_data import clean_patent_data
+from step_2_knowledge_network_construction import construct_knowledge_network
+from step_2_technology_network_construction import construct_technology_network
+from step_2_collaborative_RD_network_construction import construct_collaborative_RD_network
+from step_2_knowledge_technology_network_construction import construct_knowledge_technology_network
+from step_2_technology_collaborative_RD_network_construction import construct_technology_collaborative_RD_network
+from step_2_knowledge_collaborative_RD_network_construction import construct_knowledge_collaborative_RD_network
+from step_4_structural_hole_coupling_calculation import calculate_structural_hole
+from step_4_structural_hole_coupling_database_construction import build_structural_hole_database
+from step_5_centrality_coupling_calculation import calculate_centrality_coupling
+from step_5_centrality_coupling_database_construction import build_centrality_coupling_database
+
+# 默认规模（专利数）与随机种子
+SIZES = [500, 2000, 5000]
+SMALL_SIZES = [200, 500, 1000]
+SEED = 42
+
+LAYERS = ["knowledge", "technology", "collaborative_R&D"]
+STEP2_BUILDERS = [
+    construct_knowledge_network,
+    construct_technology_network,
+    construct_collaborative_RD_network,
+    construct_knowledge_technology_network,
+    construct_technology_collaborative_RD_network,
+    construct_knowledge_collaborative_RD_network,
+]
+STAGES = ["step1", "step2", "step3", "step4", "step5"]
+
+CACHE_ROOT = Path(tempfile.gettempdir()) / 'network_benchmarks'
+
+
+@contextmanager
+def quiet():
+    """屏蔽步骤函数的打印输出"""
+    with redirect_stdout(io.StringIO()):
+        yield
+
+
+def dataset_dir(n_patents: int, seed: int = SEED) -> Path:
+    """某一规模合成数据的缓存根目录"""
+    return CACHE_ROOT / f"n{n_patents}_s{seed}"
+
+
+def prepare_dataset(n_patents: int, stage: str, seed: int = SEED) -> Path:
+    """准备到指定阶段为止的输入数据，已存在的阶段直接复用
+
+    阶段说明：
+        step1: 合成原始数据并清洗（跳过依赖外部API的去除个人申请步骤）
+        step2: 六个网络构建步骤的输出
+        step3: 均匀的网络层权重（不运行耗时的step 3，避免基准数据准备依赖其结果）
+        step4: 结构洞耦合（稀疏计算）与结构洞数据库
+        step5: 中心度耦合与中心度数据库
+
+    Returns:
+        Path: 数据根目录，其下为 input/ step1_output/ ... step5_output/
+    """
+    root = dataset_dir(n_patents, seed)
+    for current in STAGES[:STAGES.index(stage) + 1]:
+        marker = root / f".{current}_done"
+        if marker.exists():
+            continue
+        with quiet():
+            _build_stage(root, current, n_patents, seed)
+        marker.touch()
+    return root
+
+
+def _build_stage(root: Path, stage: str, n_patents: int, seed: int) -> None:
+    step1, step2 = root / 'step1_output', root / 'step2_output'
+    step3, step4, step5 = root / 'step3_output', root / 'step4_output', root / 'step5_output'
+    if stage == "step1":
+        raw = root / 'input' / 'original_patent_data.csv'
+        generate_synthetic_patent_data(raw, n_patents=n_patents, seed=seed)
+        clean_patent_data(raw, step1 / 'patent_data_cleaned.csv')
+        shutil.copyfile(step1 / 'patent_data_cleaned.csv', step1 / 'patent_data_selected_columns.csv')
+    elif stage == "step2":
+        for builder in STEP2_BUILDERS:
+            builder(step1 / 'patent_data_selected_columns.csv', step2)
+    elif stage == "step3":
+        step3.mkdir(parents=True, exist_ok=True)
+        np.savetxt(step3 / 'network_layer_weights.txt', np.ones(3) / 3, fmt="%.6f")
+    elif stage == "step4":
+        for layer in LAYERS:
+            calculate_structural_hole(layer, step2, step4, method="sparse")
+        build_structural_hole_database(step3, step4)
+    elif stage == "step5":
+        calculate_centrality_coupling(step2, step5)
+        build_centrality_coupling_database(step3, step5)
+
+
+def scratch_dir(name: str) -> Path:
+    """基准测试写输出用的临时目录（每次调用清空）"""
+    path = CACHE_ROOT / 'scratch' / name
+    shutil.rmtree(path, ignore_errors=True)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def with_peakmem(cls):
+    """为每个 time_* 方法生成同名的 peakmem_* 方法，供 asv 统计峰值内存"""
+    for name in list(vars(cls)):
+        if name.startswith('time_'):
+            setattr(cls, 'peakmem_' + name[len('time_'):], getattr(cls, name))
+    return cls
@@ -0,0 +1,350 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+输出等价性检查
+在合成数据上比较各步骤（含优化路径）的输出与 reference_impl 中冻结的原始实现是否一致。
+每个 check_* 函数返回检查记录列表：{"name", "passed", "max_diff"}。
+"""
+
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .common import LAYERS, STEP2_BUILDERS, prepare_dataset, quiet, scratch_dir
+from .reference_impl import (
+    reference_adjacency_matrix, reference_bipartite_edges, reference_clique_edges,
+    reference_burt_measures, reference_degree, reference_knowledge_edges, reference_index_aggregation,
+    reference_structural_hole
+)
+from .bench_kernels import INTER_LAYER_EDGES
+from array_graph import load_array_graph
+from index_aggregation import calculate_criticality_and_centrality
+from inter_layer_index import COUPLING_LAYERS
+from node_ordering import ORDERINGS
+from step_2_node_reordering import reorder_networks
+from step_2_collaborative_RD_network_construction import construct_collaborative_RD_network
+from step_2_delta_ingestion import ingest_patent_delta
+from step_2_technology_network_construction import construct_technology_network
+from step_3_network_layer_weights import calculate_network_weights
+from step_4_structural_hole_coupling_calculation import (
+    BURT_COLUMNS, burt_measures, calculate_constraint_numpy, calculate_constraint_sparse_numpy,
+    calculate_ego_sums_numpy, calculate_probability_matrix, calculate_structural_hole, create_csr_adjacency,
+    csr_to_adjacency_matrix, load_network_data
+)
+from step_4_criticality_index_calculation import calculate_criticality
+from step_4_structural_hole_coupling_database_construction import build_structural_hole_database
+from step_5_centrality_coupling_calculation import calculate_centrality_coupling
+from step_5_centrality_coupling_database_construction import build_centrality_coupling_database
+from step_5_centrality_index_calculation import calculate_centrality_index
+
+TOLERANCE = 1e-6
+# 增量与全量结果的比较：PageRank向量比较L1距离，允许二者误差上界之和——
+# 增量推送为 n·tol/(1-α)（见 incremental_pagerank），全量幂迭代在L1变化小于 n·tol 时停止，误差约 n·tol·α/(1-α)；
+# 4.3/5.3 的指数量级随度数增长，按相对误差比较
+PAGERANK_ALPHA = 0.85
+PAGERANK_TOL = 1e-6
+INCREMENTAL_TOLERANCE = 1e-4
+
+
+def _record(name: str, expected, actual, tolerance: float = TOLERANCE, relative: bool = False) -> dict:
+    expected = np.asarray(expected, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+    if expected.shape != actual.shape:
+        return {"name": name, "passed": False, "max_diff": float('inf')}
+    diff = np.abs(expected - actual)
+    if relative:
+        diff = diff / np.maximum(np.abs(expected), 1.0)
+    max_diff = float(np.max(diff)) if expected.size else 0.0
+    return {"name": name, "passed": max_diff <= tolerance, "max_diff": max_diff}
+
+
+def _record_by_node(name: str, expected: pd.DataFrame, actual: pd.DataFrame, columns: list,
+                    tolerance: float = TOLERANCE, relative: bool = False) -> dict:
+    """按节点名对齐两个结果表后比较（增量结果中追加的节点位于文件末尾，顺序与全量结果不同）"""
+    expected = expected.set_index(expected['节点'].astype(str))[columns].fillna(-1.0)
+    actual = actual.set_index(actual['节点'].astype(str))[columns].fillna(-1.0)
+    if set(expected.index) != set(actual.index):
+        return {"name": name, "passed": False, "max_diff": float('inf')}
+    return _record(name, expected, actual.reindex(expected.index), tolerance, relative)
+
+
+def _edge_set(path) -> set:
+    edges = pd.read_csv(path, encoding='utf-8', dtype=str, keep_default_na=False)
+    return set(zip(edges['节点1'], edges['节点2']))
+
+
+def check_step2_edges(n_patents: int) -> list:
+    """step 2 各网络的边集合与原始团展开/笛卡尔积一致"""
+    root = prepare_dataset(n_patents, 'step2')
+    df = pd.read_csv(root / 'step1_output' / 'patent_data_selected_columns.csv', encoding='utf-8')
+    step2 = root / 'step2_output'
+    expected = {
+        'knowledge': reference_knowledge_edges(df),
+        'technology': reference_clique_edges(df, 'IPC分类'),
+        'collaborative_R&D': reference_clique_edges(df, '专利权人'),
+        'knowledge-technology': reference_bipartite_edges(df, '公开（公告）号', 'IPC分类'),
+        'technology-collaborative_R&D': reference_bipartite_edges(df, 'IPC分类', '专利权人'),
+        'knowledge-collaborative_R&D': reference_bipartite_edges(df, '公开（公告）号', '专利权人'),
+    }
+    records = []
+    for name, edges in expected.items():
+        actual = _edge_set(step2 / f'{name}_network_edges.csv')
+        diff = len(edges ^ actual)
+        records.append({"name": f"step2 {name} edges", "passed": diff == 0, "max_diff": float(diff)})
+    return records
+
+
+def check_out_of_core_edges(n_patents: int) -> list:
+    """step 2.2/2.3 外存模式（小溢写段，强制多段归并）与团展开的边集合一致"""
+    root = prepare_dataset(n_patents, 'step1')
+    input_path = root / 'step1_output' / 'patent_data_selected_columns.csv'
+    df = pd.read_csv(input_path, encoding='utf-8')
+    out = scratch_dir('equivalence_step2_out_of_core')
+    records = []
+    for name, column, builder in [('technology', 'IPC分类', construct_technology_network),
+                                  ('collaborative_R&D', '专利权人', construct_collaborative_RD_network)]:
+        with quiet():
+            builder(input_path, out, out_of_core=True, run_edges=1000)
+        diff = len(reference_clique_edges(df, column) ^ _edge_set(out / f'{name}_network_edges.csv'))
+        records.append({"name": f"step2 {name} out-of-core edges", "passed": diff == 0, "max_diff": float(diff)})
+    return records
+
+
+def check_structural_hole(n_patents: int) -> list:
+    """step 4.1 稠密/稀疏/按分量三种计算方式（含叶节点剪枝）及未安装numba时的NumPy实现与矩阵形式的参考结果一致，
+    同时输出的有效规模、效率、等级度与其矩阵形式一致"""
+    root = prepare_dataset(n_patents, 'step2')
+    step2 = root / 'step2_output'
+    records = []
+    for layer in LAYERS:
+        nodes, edges_df = load_network_data(layer, step2)
+        adj_matrix = reference_adjacency_matrix(nodes, edges_df)
+        expected = reference_structural_hole(adj_matrix)
+        expected_burt = np.nan_to_num(reference_burt_measures(adj_matrix), nan=-1.0)
+        for method in ["dense", "sparse", "component"]:
+            for prune in [None, "leaf"]:
+                suffix = f" 剪枝{prune}" if prune else ""
+                out = scratch_dir(f'equivalence_step4_{method}_{prune}')
+                calculate_structural_hole(layer, step2, out, method=method, prune=prune)
+                result = pd.read_csv(out / f'{layer}_network_structural_hole_coupling.csv')
+                records.append(_record(f"step4.1 {layer} {method}{suffix}", expected,
+                                       result['structural_hole_coupling']))
+                records.append(_record(f"step4.1 {layer} {method}{suffix} Burt指标", expected_burt,
+                                       result[BURT_COLUMNS].fillna(-1.0)))
+        indptr, indices = create_csr_adjacency(nodes, edges_df)
+        prob_matrix = calculate_probability_matrix(csr_to_adjacency_matrix(indptr, indices))
+        records.append(_record(f"step4.1 {layer} dense NumPy", expected,
+                               1 - calculate_constraint_numpy(prob_matrix).sum(axis=1)))
+        records.append(_record(f"step4.1 {layer} sparse NumPy", expected,
+                               1 - calculate_constraint_sparse_numpy(indptr, indices)))
+        records.append(_record(f"step4.1 {layer} sparse NumPy Burt指标", expected_burt, np.nan_to_num(
+            burt_measures(calculate_ego_sums_numpy(indptr, indices, np.arange(len(nodes))))[:, 1:], nan=-1.0)))
+    return records
+
+
+def check_node_ordering(n_patents: int) -> list:
+    """节点重排后 step 4.1 稀疏限制度与参考结果一致、PageRank与重排前一致（输出顺序不变）"""
+    root = prepare_dataset(n_patents, 'step2')
+    step2 = scratch_dir('equivalence_ordering_step2')
+    # copytree 保留修改时间，图存储不会因边CSV签名不符而被视为过期
+    shutil.copytree(root / 'step2_output', step2, dirs_exist_ok=True)
+    expected_pagerank = {layer: load_array_graph(step2, layer).pagerank() for layer in LAYERS}
+    records = []
+    for ordering in ORDERINGS:
+        with quiet():
+            reorder_networks(step2, ordering)
+        for layer in LAYERS:
+            nodes, edges_df = load_network_data(layer, step2)
+            expected = reference_structural_hole(reference_adjacency_matrix(nodes, edges_df))
+            out = scratch_dir(f'equivalence_step4_ordering_{ordering}')
+            calculate_structural_hole(layer, step2, out, method="sparse")
+            actual = pd.read_csv(out / f'{layer}_network_structural_hole_coupling.csv')['structural_hole_coupling']
+            records.append(_record(f"step4.1 {layer} 重排{ordering}", expected, actual))
+            graph = load_array_graph(step2, layer)
+            records.append(_record(f"step3 PageRank {layer} 重排{ordering}", expected_pagerank[layer],
+                                   graph.pagerank() if graph.ordering is not None else np.full(len(nodes), np.nan)))
+    return records
+
+
+def check_centrality_coupling(n_patents: int) -> list:
+    """step 5.1 度中心性与逐节点掩码计数一致"""
+    root = prepare_dataset(n_patents, 'step2')
+    step2 = root / 'step2_output'
+    out = scratch_dir('equivalence_step5')
+    with quiet():
+        calculate_centrality_coupling(step2, out)
+    records = []
+    for layer in LAYERS:
+        nodes = pd.read_csv(step2 / f'{layer}_network_nodes.csv', encoding='utf-8')['节点']
+        edges_df = pd.read_csv(step2 / f'{layer}_network_edges.csv', encoding='utf-8')
+        actual = pd.read_csv(out / f'{layer}_network_centrality_coupling.csv')['centrality_coupling']
+        records.append(_record(f"step5.1 {layer}", reference_degree(nodes, edges_df), actual))
+    return records
+
+
+def check_index_aggregation(n_patents: int) -> list:
+    """step 4.3/5.3 指数与逐节点聚合的参考结果一致"""
+    root = prepare_dataset(n_patents, 'step5')
+    step2, step4, step5 = root / 'step2_output', root / 'step4_output', root / 'step5_output'
+    with quiet():
+        calculate_criticality(step2, step4)
+        calculate_centrality_index(step2, step5)
+    structural_db = pd.read_csv(step4 / 'structural_hole_coupling_database.csv', encoding='utf-8')
+    centrality_db = pd.read_csv(step5 / 'centrality_coupling_database.csv', encoding='utf-8')
+    records = []
+    for layer in LAYERS:
+        nodes = pd.read_csv(step2 / f'{layer}_network_nodes.csv', encoding='utf-8')['节点']
+        edge_dfs = [pd.read_csv(step2 / name, encoding='utf-8') for name in INTER_LAYER_EDGES[layer]]
+        expected = reference_index_aggregation(nodes, edge_dfs, structural_db, 'structural_hole_coupling*weights')
+        actual = pd.read_csv(step4 / f'{layer}_network_criticality_index.csv')['criticality_index']
+        records.append(_record(f"step4.3 {layer}", expected, actual))
+        expected = reference_index_aggregation(nodes, edge_dfs, centrality_db, 'centrality_coupling*weights')
+        actual = pd.read_csv(step5 / f'{layer}_network_centrality_index.csv')['centrality_index']
+        records.append(_record(f"step5.3 {layer}", expected, actual))
+    return records
+
+
+def _run_downstream(root, incremental: bool) -> list:
+    """在 step 2 输出上依次执行 step 3、4.1/4.2、5.1/5.2 和 4.3/5.3（增量时带 incremental）
+
+    step 3 的层权重另存为 computed_network_layer_weights.txt，4.2/5.2 使用固定的均匀层权重：
+    层权重每轮都会微小变化，若用于数据库则所有节点值都变化，4.3/5.3 的增量修补退化为全量重算。
+
+    Returns:
+        list: step 3、4.1（各层）和 4.3/5.3 的结果报告
+    """
+    step2, step3 = root / 'step2_output', root / 'step3_output'
+    step4, step5 = root / 'step4_output', root / 'step5_output'
+    with quiet():
+        reports = [calculate_network_weights(step2, step3, use_cache=False, incremental=incremental)]
+        shutil.copyfile(step3 / 'network_layer_weights.txt', step3 / 'computed_network_layer_weights.txt')
+        np.savetxt(step3 / 'network_layer_weights.txt', np.ones(3) / 3, fmt="%.6f")
+        for layer in LAYERS:
+            reports.append(calculate_structural_hole(layer, step2, step4, method="sparse", incremental=incremental))
+        build_structural_hole_database(step3, step4)
+        calculate_centrality_coupling(step2, step5)
+        build_centrality_coupling_database(step3, step5)
+        reports.append(calculate_criticality_and_centrality(step2, step4, step5, incremental=incremental))
+    return reports
+
+
+def _build_step2(records: pd.DataFrame, root) -> None:
+    input_path = root / 'step1_output' / 'patent_data_selected_columns.csv'
+    input_path.parent.mkdir(parents=True, exist_ok=True)
+    records.to_csv(input_path, index=False, encoding='utf-8')
+    with quiet():
+        for builder in STEP2_BUILDERS:
+            builder(input_path, root / 'step2_output')
+
+
+def _pagerank_vectors(step3_dir) -> dict:
+    with np.load(step3_dir / 'pagerank_warm_start.npz') as data:
+        return {layer: pd.DataFrame({'节点': data[f"{layer}_nodes"], 'pagerank': data[f"{layer}_values"]})
+                for layer in LAYERS}
+
+
+def _compare_pipelines(label: str, actual, expected) -> list:
+    """比较增量导入并增量执行后续步骤的结果与全量重建的结果"""
+    records = []
+    for name in LAYERS + list(COUPLING_LAYERS):
+        diff = len(_edge_set(expected / 'step2_output' / f'{name}_network_edges.csv')
+                   ^ _edge_set(actual / 'step2_output' / f'{name}_network_edges.csv'))
+        records.append({"name": f"{label} step2 {name} edges", "passed": diff == 0, "max_diff": float(diff)})
+
+    weights_file = 'computed_network_layer_weights.txt'
+    records.append(_record(f"{label} step3 层权重", np.loadtxt(expected / 'step3_output' / weights_file),
+                           np.loadtxt(actual / 'step3_output' / weights_file), INCREMENTAL_TOLERANCE))
+    expected_pagerank, actual_pagerank = (_pagerank_vectors(root / 'step3_output') for root in (expected, actual))
+    for layer in LAYERS:
+        pagerank = expected_pagerank[layer].merge(actual_pagerank[layer], on='节点', how='outer')
+        l1 = float(np.abs(pagerank['pagerank_x'] - pagerank['pagerank_y']).sum())
+        records.append({"name": f"{label} step3 PageRank {layer} (L1)",
+                        "passed": l1 <= len(pagerank) * PAGERANK_TOL * (1 + PAGERANK_ALPHA) / (1 - PAGERANK_ALPHA),
+                        "max_diff": l1})
+        file_name = f'{layer}_network_structural_hole_coupling.csv'
+        records.append(_record_by_node(
+            f"{label} step4.1 {layer}", pd.read_csv(expected / 'step4_output' / file_name),
+            pd.read_csv(actual / 'step4_output' / file_name), ['structural_hole_coupling'] + BURT_COLUMNS))
+        for step, directory, column in [("4.3", 'step4_output', 'criticality_index'),
+                                        ("5.3", 'step5_output', 'centrality_index')]:
+            file_name = f'{layer}_network_{column}.csv'
+            records.append(_record_by_node(
+                f"{label} step{step} {layer}", pd.read_csv(expected / directory / file_name),
+                pd.read_csv(actual / directory / file_name), [column], relative=True))
+    return records
+
+
+def _incremental_paths(label: str, reports: list) -> list:
+    """增量流程确实走了增量路径（而不是退回全量计算），否则上面的比较不能覆盖增量代码"""
+    step3_report, *step4_reports, index_report = reports
+    # 稠密的技术层在改写轮次中边增量可能超过 max_delta_ratio 而合理地退回全量，只要求至少一层走增量推送
+    records = [{"name": f"{label} step3 增量推送", "passed": "增量推送" in step3_report, "max_diff": 0.0}]
+    records += [{"name": f"{label} step4.1 {layer} 增量修补", "passed": "增量计算完成" in report, "max_diff": 0.0}
+                for layer, report in zip(LAYERS, step4_reports)]
+    recomputed = [(int(count), int(total)) for total, count in re.findall(r"节点(\d+)个，重算(\d+)个", index_report)]
+    records.append({"name": f"{label} step4.3/5.3 增量修补",
+                    "passed": len(recomputed) == len(LAYERS) and any(count < total for count, total in recomputed),
+                    "max_diff": 0.0})
+    return records
+
+
+def check_incremental_pipeline(n_patents: int) -> list:
+    """增量导入后以 --incremental 执行 step 3、4.1、4.3/5.3，与对合并记录全量重建的结果一致
+
+    两轮增量（各约1%的专利，低于 step 3 退回全量计算的增量比例）：第一轮替换部分已有专利的IPC分类和专利权人
+    （使节点和边失去支持，网络层被压缩重写）并新增专利，第二轮只新增专利（追加到网络文件末尾、就地修补图存储和层间邻居索引）。
+    """
+    root = prepare_dataset(n_patents, 'step1')
+    df = pd.read_csv(root / 'step1_output' / 'patent_data_selected_columns.csv', encoding='utf-8')
+    size = max(len(df) // 100, 2)
+    n_base, n_first = len(df) - 2 * size, len(df) - size
+    changed = df.iloc[:max(size // 2, 1)].copy()
+    middle = len(df) // 2
+    changed[['IPC分类', '专利权人']] = df[['IPC分类', '专利权人']].iloc[middle:middle + len(changed)].to_numpy()
+    deltas = [pd.concat([changed, df.iloc[n_base:n_first]]), df.iloc[n_first:]]
+
+    actual = scratch_dir('equivalence_incremental')
+    merged = df.iloc[:n_base]
+    _build_step2(merged, actual)
+    _run_downstream(actual, incremental=False)
+    base_path = actual / 'step1_output' / 'patent_data_selected_columns.csv'
+
+    records = []
+    for round_number, delta in enumerate(deltas, start=1):
+        label = f"增量第{round_number}轮"
+        delta_path = actual / 'step1_output' / f'patent_data_delta_{round_number}.csv'
+        delta.to_csv(delta_path, index=False, encoding='utf-8')
+        with quiet():
+            report = ingest_patent_delta(delta_path, base_path, actual / 'step2_output')
+        records.append({"name": f"{label} step2 增量导入", "passed": "失败" not in report, "max_diff": 0.0})
+        records.extend(_incremental_paths(label, _run_downstream(actual, incremental=True)))
+
+        keys = delta['公开（公告）号'].astype(str)
+        merged = pd.concat([merged[~merged['公开（公告）号'].astype(str).isin(keys)], delta], ignore_index=True)
+        expected = scratch_dir('equivalence_incremental_full')
+        _build_step2(merged, expected)
+        _run_downstream(expected, incremental=False)
+        records.extend(_compare_pipelines(label, actual, expected))
+    return records
+
+
+CHECKS = [
+    check_step2_edges,
+    check_out_of_core_edges,
+    check_structural_hole,
+    check_node_ordering,
+    check_centrality_coupling,
+    check_index_aggregation,
+    check_incremental_pipeline,
+]
+
+
+def run_equivalence_checks(n_patents: int) -> list:
+    """执行全部等价性检查"""
+    records = []
+    for check in CHECKS:
+        records.extend(check(n_patents))
+    return records
@@ -0,0 +1,149 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+参考实现
+冻结各步骤内核的原始（逐行循环）写法，作为基准测试的对照组和优化路径的等价性基准。
+这里的代码刻意保持原样，不要对其做性能优化。
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+
+def reference_adjacency_matrix(nodes: np.ndarray, edges_df: pd.DataFrame) -> np.ndarray:
+    """step 4.1 原始邻接矩阵构建：iterrows 逐边置1"""
+    node_index = {node: i for i, node in enumerate(nodes)}
+    n = len(nodes)
+    adj_matrix = np.zeros((n, n), dtype=np.float32)
+    for _, row in edges_df.iterrows():
+        src, dst = row["source"], row["target"]
+        if src in node_index and dst in node_index:
+            i, j = node_index[src], node_index[dst]
+            adj_matrix[i, j] = 1
+            adj_matrix[j, i] = 1
+    return adj_matrix
+
+
+def reference_structural_hole(adj_matrix: np.ndarray) -> np.ndarray:
+    """step 4.1 结构洞耦合值的矩阵形式：1 - Σ_j (p_ij + Σ_{k≠i,j} p_ik p_kj)²"""
+    adj = adj_matrix.astype(np.float64)
+    degree = adj.sum(axis=1)
+    prob = np.divide(adj, degree[:, None], where=degree[:, None] != 0, out=np.zeros_like(adj))
+    diag = np.diag(prob)
+    indirect = prob @ prob - diag[:, None] * prob - prob * diag[None, :]
+    mask = (prob > 0) & ~np.eye(len(prob), dtype=bool)
+    constraint = np.where(mask, (prob + indirect) ** 2, 0.0)
+    return 1 - constraint.sum(axis=1)
+
+
+def _split(cell) -> list:
+    return [x.strip() for x in str(cell).split('|') if x.strip()]
+
+
+def reference_clique_edges(df: pd.DataFrame, column: str) -> set:
+    """step 2.2/2.3 原始团展开：同一专利内的编码两两连边"""
+    edges = set()
+    for _, row in df.iterrows():
+        items = _split(row[column])
+        for i in range(len(items)):
+            for j in range(i + 1, len(items)):
+                edges.add(tuple(sorted([items[i], items[j]])))
+    return edges
+
+
+def reference_knowledge_edges(df: pd.DataFrame) -> set:
+    """step 2.1 原始引文连边：逐行正则清洗，引文与施引合并后构造排序元组"""
+    def clean_text(text):
+        if pd.isna(text):
+            return ""
+        return re.sub(r"\(.*?\)|（.*?）", "", str(text)).strip()
+
+    edges = set()
+    for _, row in df.iterrows():
+        patent_num = clean_text(row['公开（公告）号'])
+        citations = [x.strip() for x in clean_text(row['引文专利公开号']).split("|") if x.strip()]
+        citing = [x.strip() for x in clean_text(row['施引专利公开号']).split("|") if x.strip()]
+        for target in citations + citing:
+            if target:
+                edges.add(tuple(sorted([patent_num, target])))
+    return edges
+
+
+def reference_bipartite_edges(df: pd.DataFrame, column_a: str, column_b: str) -> set:
+    """step 2.4-2.6 原始层间连边：两列元素的笛卡尔积"""
+    edges = set()
+    for _, row in df.iterrows():
+        if column_a == '公开（公告）号':
+            left = [str(row[column_a]).strip()]
+        else:
+            left = _split(row[column_a])
+        right = _split(row[column_b])
+        if left and left[0] and right:
+            for a in left:
+                for b in right:
+                    edges.add(tuple(sorted([a, b])))
+    return edges
+
+
+def reference_degree(nodes: pd.Series, edges_df: pd.DataFrame) -> np.ndarray:
+    """step 5.1 原始度中心性：逐节点布尔掩码计数"""
+    return np.array([
+        len(edges_df[(edges_df['节点1'] == node) | (edges_df['节点2'] == node)])
+        for node in nodes
+    ])
+
+
+def reference_coupling_propagation(src_nodes: list, dst_nodes: list, coupling_edges: list,
+                                   x_src: np.ndarray, x_dst: np.ndarray, weight: float) -> np.ndarray:
+    """step 3 原始耦合效应：对每条层间边做列表线性查找并累加"""
+    x_dst = x_dst.copy()
+    for src, dst in coupling_edges:
+        if src in src_nodes and dst in dst_nodes:
+            src_idx = src_nodes.index(src)
+            dst_idx = dst_nodes.index(dst)
+            x_dst[dst_idx] += x_src[src_idx] * weight
+    return x_dst
+
+
+def reference_index_aggregation(nodes: pd.Series, edge_dfs: list, database: pd.DataFrame,
+                                value_column: str) -> np.ndarray:
+    """step 4.3/5.3 原始指数聚合：自身值 + 层间邻居值之和，逐节点布尔掩码"""
+    indices = []
+    for node in nodes:
+        node_value = database.loc[database['节点'] == node, value_column].sum()
+        related_nodes = set()
+        for edge_df in edge_dfs:
+            mask = (edge_df['节点1'] == node) | (edge_df['节点2'] == node)
+            related_nodes.update(edge_df[mask]['节点1'].tolist())
+            related_nodes.update(edge_df[mask]['节点2'].tolist())
+        related_nodes.discard(node)
+        related_value = database[database['节点'].isin(related_nodes)][value_column].sum()
+        indices.append(node_value + related_value)
+    return np.array(indices)
+
+
+def reference_burt_measures(adj_matrix: np.ndarray) -> np.ndarray:
+    """step 4.1 Burt 指标的矩阵形式，返回 (n, 3)：有效规模、效率、等级度（无联系人为NaN）
+
+    有效规模 N - 2t/N，t 为联系人之间的边数；等级度 Σ_j (c_ij/c̄)ln(c_ij/c̄) / (N ln N)，c̄ = Σ_j c_ij / N。
+    """
+    adj = adj_matrix.astype(np.float64)
+    degree = adj.sum(axis=1)
+    prob = np.divide(adj, degree[:, None], where=degree[:, None] != 0, out=np.zeros_like(adj))
+    diag = np.diag(prob)
+    indirect = prob @ prob - diag[:, None] * prob - prob * diag[None, :]
+    contacts = adj * (1 - np.eye(len(adj)))
+    constraint = np.where(contacts > 0, (prob + indirect) ** 2, 0.0)
+    n_contacts = contacts.sum(axis=1)
+    ties = ((contacts @ contacts) * contacts).sum(axis=1)
+    result = np.full((len(adj), 3), np.nan)
+    for i in np.flatnonzero(n_contacts):
+        result[i, 0] = n_contacts[i] - ties[i] / n_contacts[i]
+        result[i, 1] = result[i, 0] / n_contacts[i]
+        c = constraint[i][contacts[i] > 0]
+        ratio = c / c.mean()
+        result[i, 2] = (ratio * np.log(ratio)).sum() / (len(c) * np.log(len(c))) if len(c) > 1 else 0.0
+    return result
@@ -0,0 +1,162 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+"""
+基准测试运行器
+不依赖 asv 直接运行 bench_*.py 中的基准测试：记录耗时与峰值内存（tracemalloc），
+与保存的基线JSON对比，并可执行输出等价性检查。
+
+用法（在项目根目录）：
+    python -m benchmarks.run_benchmarks --sizes 500 --filter Constraint
+    python -m benchmarks.run_benchmarks --save-baseline
+    python -m benchmarks.run_benchmarks --check
+"""
+
+import inspect
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+if __package__ in (None, ''):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    __package__ = 'benchmarks'
+
+from benchmarks import bench_kernels, bench_steps
+from benchmarks.equivalence import run_equivalence_checks
+
+BENCHMARK_MODULES = [bench_steps, bench_kernels]
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+
+
+def _param_grid(cls, sizes=None) -> list:
+    """展开 asv 风格的 params（单列表或多列表的笛卡尔积），sizes 覆盖第一维的专利规模"""
+    params = getattr(cls, 'params', [None])
+    dims = list(params) if isinstance(params, tuple) else [params]
+    if sizes:
+        dims[0] = sizes
+    return [tuple(combo) for combo in itertools.product(*dims)]
+
+
+def _param_key(combo: tuple) -> str:
+    return ",".join(str(p) for p in combo)
+
+
+def discover(name_filter=None) -> list:
+    """收集所有基准测试：(名称, 类, 方法名)"""
+    found = []
+    for module in BENCHMARK_MODULES:
+        for cls_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            for attr in sorted(vars(cls)):
+                if not attr.startswith('time_'):
+                    continue
+                name = f"{module.__name__.split('.')[-1]}.{cls_name}.{attr}"
+                if name_filter and name_filter not in name:
+                    continue
+                found.append((name, cls, attr))
+    return found
+
+
+def run_benchmark(cls, method: str, combo: tuple, repeat: int) -> dict:
+    """执行单个基准测试：取多次运行的最短耗时，并单独一次运行统计峰值内存"""
+    instance = cls()
+    if hasattr(instance, 'setup'):
+        instance.setup(*combo)
+    func = getattr(instance, method)
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*combo)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(*combo)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if hasattr(instance, 'teardown'):
+        instance.teardown(*combo)
+    return {"time": min(times), "peak_memory": peak}
+
+
+def compare_with_baseline(results: dict, baseline: dict, threshold: float) -> list:
+    """与基线对比，返回耗时或内存超过阈值的退化记录"""
+    regressions = []
+    for name, by_param in results.items():
+        for key, current in by_param.items():
+            previous = baseline.get(name, {}).get(key)
+            if not previous:
+                continue
+            for metric in ("time", "peak_memory"):
+                if previous[metric] > 0 and current[metric] > previous[metric] * (1 + threshold):
+                    regressions.append({
+                        "name": name, "params": key, "metric": metric,
+                        "baseline": previous[metric], "current": current[metric],
+                        "ratio": current[metric] / previous[metric]
+                    })
+    return regressions
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='运行基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', help='覆盖各基准测试的专利规模')
+    parser.add_argument('--filter', type=str, help='只运行名称包含该字符串的基准测试')
+    parser.add_argument('--repeat', type=int, default=3, help='每个基准测试的重复次数')
+    parser.add_argument('--output', type=str, help='结果JSON保存路径')
+    parser.add_argument('--baseline', type=str, default=str(DEFAULT_BASELINE), help='基线JSON路径')
+    parser.add_argument('--save-baseline', action='store_true', help='将本次结果保存为基线')
+    parser.add_argument('--threshold', type=float, default=0.2, help='判定退化的相对阈值')
+    parser.add_argument('--check', action='store_true', help='执行输出等价性检查')
+    parser.add_argument('--check-size', type=int, default=500, help='等价性检查使用的专利规模')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, cls, method in discover(args.filter):
+        for combo in _param_grid(cls, args.sizes):
+            key = _param_key(combo)
+            record = run_benchmark(cls, method, combo, args.repeat)
+            results.setdefault(name, {})[key] = record
+            print(f"{name} [{key}]: {record['time']:.4f}秒 | 峰值内存 {record['peak_memory'] / 1024 ** 2:.1f}MB")
+
+    payload = {
+        "created": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "machine": platform.platform(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"基线已保存至：{baseline_path}")
+    elif baseline_path.exists() and results:
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8'))['results']
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        print(f"\n与基线对比（阈值 {args.threshold:.0%}）：{len(regressions)} 项退化")
+        for r in regressions:
+            print(f"  ✗ {r['name']} [{r['params']}] {r['metric']}: "
+                  f"{r['baseline']:.4g} → {r['current']:.4g} (×{r['ratio']:.2f})")
+
+    failed = 0
+    if args.check:
+        print(f"\n输出等价性检查（规模 {args.check_size}）：")
+        for record in run_equivalence_checks(args.check_size):
+            symbol = "✓" if record['passed'] else "✗"
+            failed += not record['passed']
+            print(f"  {symbol} {record['name']}: 最大偏差 {record['max_diff']:.3g}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,18 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks.equivalence import check_incremental_pipeline
+
+
+def test_incremental_pipeline_matches_full_rebuild():
+    """两轮增量导入（含改写、仅追加）后增量执行 step 3、4.1、4.3/5.3，与全量重建一致"""
+    failed = [(record["name"], record["max_diff"]) for record in check_incremental_pipeline(300)
+              if not record["passed"]]
+    assert not failed
@@ -0,0 +1,16 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+import sys
+from pathlib import Path
+
+ALGORITHMS_DIR = Path(__file__).resolve().parent.parent / 'algorithms'
+if str(ALGORITHMS_DIR) not in sys.path:
+    sys.path.insert(0, str(ALGORITHMS_DIR))
+
+from ipc_hierarchy import rollup_codes
+
+
+def test_lowercase_codes_roll_up_with_uppercase():
+    rolled = rollup_codes(["h01l21/336", "H01L 21/338", "g06f"], "main_group")
+    assert rolled.to_dict() == {"h01l21/336": "H01L21/00", "H01L 21/338": "H01L21/00", "g06f": "G06F"}
@@ -0,0 +1,73 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+ALGORITHMS_DIR = Path(__file__).resolve().parent.parent / 'algorithms'
+if str(ALGORITHMS_DIR) not in sys.path:
+    sys.path.insert(0, str(ALGORITHMS_DIR))
+# 去除个人申请模块导入时创建API客户端，测试不调用该步骤
+os.environ.setdefault("DEEPSEEK_API_KEY", "test")
+
+import pipeline_executor
+from synthetic_patent_data import generate_synthetic_patent_data
+
+CLIQUE_STEPS = ("2.2 技术网络构建", "2.3 协作研发网络构建")
+build_pipeline_steps = pipeline_executor.build_pipeline_steps
+
+
+def _steps_without_api(data_root, *args, **kwargs):
+    """只保留数据清洗和两个团展开网络层，跳过调用外部API的去除个人申请"""
+    steps = [step for step in build_pipeline_steps(data_root, *args, **kwargs)
+             if step['name'] == "1.1 数据清洗" or step['name'] in CLIQUE_STEPS]
+    cleaned_path = steps[0]['params']['output_path']
+    for step in steps[1:]:
+        step['params']['input_path'] = cleaned_path
+    return steps
+
+
+def test_out_of_core_plan_runs_through_executor(tmp_path, monkeypatch, capsys):
+    generate_synthetic_patent_data(tmp_path / 'data' / 'input' / 'original_patent_data.csv', n_patents=200, seed=7)
+    build_plan = pipeline_executor.build_pipeline_plan
+
+    def out_of_core_plan(*args, **kwargs):
+        plan = build_plan(*args, **kwargs)
+        plan['out_of_core_layers'] = ["technology", "collaborative_R&D"]
+        plan['refused'] = []
+        return plan
+
+    monkeypatch.setattr(pipeline_executor, 'build_pipeline_steps', _steps_without_api)
+    monkeypatch.setattr(pipeline_executor, 'build_pipeline_plan', out_of_core_plan)
+    monkeypatch.setattr(pipeline_executor, 'warm_up_kernels', lambda: None)
+    monkeypatch.setattr('builtins.input', lambda prompt='': 'n')
+
+    results = pipeline_executor.run_full_pipeline(project_root=tmp_path, memory_budget_gb=1.0)
+
+    assert [results[name]['status'] for name in CLIQUE_STEPS] == ["成功", "成功"], results
+    assert "外存" in capsys.readouterr().out
+    step2_dir = tmp_path / 'data' / 'step2_output'
+    for layer in ("technology", "collaborative_R&D"):
+        edges = pd.read_csv(step2_dir / f"{layer}_network_edges.csv", encoding='utf-8')
+        assert len(edges) > 0
+
+
+def test_ipc_rollup_inserted_after_personal_application_removal(tmp_path):
+    names = [step['name'] for step in build_pipeline_steps(tmp_path, ipc_level="class")]
+    assert names[names.index("1.2 去除个人申请") + 1] == "1.3 IPC分类粒度归并"
+
+
+def test_applicant_resolution_is_opt_in(tmp_path):
+    default = build_pipeline_steps(tmp_path)
+    assert "1.1.1 专利权人实体消解" not in [step['name'] for step in default]
+    assert default[1]['params']['input_path'].endswith('patent_data_cleaned.csv')
+    assert 'mapping_path' not in default[1]['params']
+
+    resolved = build_pipeline_steps(tmp_path, ipc_level="class", resolve_applicants=True)
+    names = [step['name'] for step in resolved]
+    assert names[:4] == ["1.1 数据清洗", "1.1.1 专利权人实体消解", "1.2 去除个人申请", "1.3 IPC分类粒度归并"]
+    assert resolved[2]['params']['input_path'] == resolved[1]['params']['output_path']
+    assert resolved[2]['params']['mapping_path'] == resolved[1]['params']['mapping_path']
@@ -0,0 +1,60 @@
+# Copyright © dongbingxue. All rights reserved.
+# License: MIT
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+ALGORITHMS_DIR = Path(__file__).resolve().parent.parent / 'algorithms'
+if str(ALGORITHMS_DIR) not in sys.path:
+    sys.path.insert(0, str(ALGORITHMS_DIR))
+# 模块导入时创建API客户端，测试中分类API由 fake_api 代替
+os.environ.setdefault("DEEPSEEK_API_KEY", "test")
+
+import step_1_remove_personal_application as step_1_2
+from pipeline_planner import count_uncached_names
+
+# 规范键（去掉公司后缀）都是"王伟"，但不是同一申请人
+NAMES = ["王伟", "王伟有限公司", "王伟公司"]
+CACHED = {"王伟": False, "王伟有限公司": True}
+
+
+def _run(tmp_path, monkeypatch, mapping_path=None):
+    input_path = tmp_path / 'patent_data_cleaned.csv'
+    output_path = tmp_path / 'patent_data_selected_columns.csv'
+    pd.DataFrame({'公开（公告）号': ["CN1", "CN2", "CN3"], '专利权人': NAMES}).to_csv(input_path, index=False)
+    with open(tmp_path / step_1_2.CACHE_FILENAME, 'w', encoding='utf-8') as f:
+        json.dump({'version': step_1_2.CACHE_VERSION, 'mapping': CACHED}, f, ensure_ascii=False)
+
+    # 执行前的API调用数估算应与实际调用一致
+    uncached = count_uncached_names(set(NAMES), tmp_path / step_1_2.CACHE_FILENAME, mapping_path)
+    calls = []
+
+    def fake_api(name):
+        calls.append(name)
+        return False
+
+    monkeypatch.setattr(step_1_2, 'call_deepseek_api', fake_api)
+    step_1_2.remove_personal_applications(input_path, output_path, mapping_path)
+    kept = pd.read_csv(output_path, encoding='utf-8-sig')['专利权人'].tolist()
+    return kept, calls, uncached
+
+
+def test_default_classification_is_per_name(tmp_path, monkeypatch):
+    kept, calls, uncached = _run(tmp_path, monkeypatch)
+    assert kept == ["王伟有限公司"]
+    assert calls == ["王伟公司"]
+    assert uncached == 1
+
+
+def test_entity_mapping_shares_classification(tmp_path, monkeypatch):
+    mapping_path = tmp_path / 'applicant_entity_mapping.csv'
+    pd.DataFrame({'原始名称': NAMES, '规范键': ["王伟"] * 3, '实体编号': ["E000000", "E000001", "E000001"],
+                  '规范名称': ["王伟", "王伟有限公司", "王伟有限公司"], '出现次数': [1, 1, 1]}).to_csv(mapping_path, index=False)
+    kept, calls, uncached = _run(tmp_path, monkeypatch, mapping_path)
+    assert sorted(kept) == ["王伟公司", "王伟有限公司"]
+    assert calls == []
+    assert uncached == 0